@@ -0,0 +1,124 @@
+# agents/context_compaction.py
+import json
+import threading
+import redis
+from collections import OrderedDict
+from core.config import settings
+from core.caching import async_redis_client
+
+SUMMARIZER_SYSTEM_MESSAGE = """You maintain a running summary of a technical Excel interview between an interviewer and a candidate.
+            You will be given the current summary (possibly empty) and the next part of the conversation.
+            Return an updated summary that keeps: topics and questions already covered, the candidate's answers and
+            demonstrated skill level, and any open threads the interviewer intended to follow up on.
+            Write plain prose, at most 200 words. Output ONLY the summary.
+            """
+
+
+def estimate_tokens(messages: list) -> int:
+    """Cheap token estimate (~4 characters per token plus per-message overhead), good enough for budgeting."""
+    return sum(len(str(m.get("content") or "")) // 4 + 4 for m in messages)
+
+
+class ContextCompactor:
+    """
+    Keeps the interviewer's prompt within a token budget on long interviews.
+    - The last CONTEXT_KEEP_MESSAGES messages are always sent verbatim.
+    - Older messages are folded into a running summary written by the cheaper evaluator model.
+    - The summary is cached per interview (in process and in Redis) together with how many
+      messages it covers, so each update only summarises the newly aged-out messages, and only
+      once CONTEXT_SUMMARY_BATCH of them have accumulated.
+    - Compaction never fails a turn: on a Redis or summarizer error the messages it could not
+      summarise are sent verbatim.
+    """
+    def __init__(self, summarize):
+        self._summarize = summarize  # async callable(previous_summary, messages) -> str
+        self._local = OrderedDict()  # interview_id -> {"upto": int, "summary": str}
+        self._lock = threading.Lock()
+        self._stats = {"turns": 0, "turns_compacted": 0, "prompt_tokens_sent": 0, "prompt_tokens_saved": 0}
+
+    @staticmethod
+    def _redis_key(interview_id: int) -> str:
+        return f"context_summary:{interview_id}"
+
+    async def _load(self, interview_id: int) -> dict:
+        entry = self._local.get(interview_id)
+        if entry is None and async_redis_client:
+            try:
+                cached = await async_redis_client.get(self._redis_key(interview_id))
+            except redis.exceptions.RedisError as e:
+                print(f"Context compaction: Redis read failed for interview {interview_id}: {e}")
+                cached = None
+            if cached:
+                entry = json.loads(cached)
+        return entry or {"upto": 0, "summary": ""}
+
+    async def _save(self, interview_id: int, entry: dict):
+        self._local[interview_id] = entry
+        self._local.move_to_end(interview_id)
+        while len(self._local) > settings.CONVERSATION_CACHE_SIZE:
+            self._local.popitem(last=False)
+        if async_redis_client:
+            try:
+                await async_redis_client.set(self._redis_key(interview_id), json.dumps(entry), ex=settings.CONVERSATION_CACHE_TTL)
+            except redis.exceptions.RedisError as e:
+                print(f"Context compaction: Redis write failed for interview {interview_id}: {e}")
+
+    def _record(self, full_tokens: int, sent_tokens: int):
+        with self._lock:
+            self._stats["turns"] += 1
+            self._stats["prompt_tokens_sent"] += sent_tokens
+            if sent_tokens < full_tokens:
+                self._stats["turns_compacted"] += 1
+                self._stats["prompt_tokens_saved"] += full_tokens - sent_tokens
+
+    async def compact(self, interview_id: int, history: list):
+        """
+        Returns (messages_to_send, turn_stats). `turn_stats` holds the estimated prompt tokens of the
+        full history, of what is actually sent, and the difference saved by compaction.
+        """
+        full_tokens = estimate_tokens(history)
+        keep = settings.CONTEXT_KEEP_MESSAGES
+        if interview_id is None or full_tokens <= settings.CONTEXT_TOKEN_BUDGET or len(history) <= keep:
+            self._record(full_tokens, full_tokens)
+            return history, {"prompt_tokens": full_tokens, "prompt_tokens_sent": full_tokens, "prompt_tokens_saved": 0}
+
+        older, recent = history[:-keep], history[-keep:]
+        entry = await self._load(interview_id)
+        if entry["upto"] > len(older):
+            # The cached summary is ahead of this history (e.g. it was rebuilt); start over.
+            entry = {"upto": 0, "summary": ""}
+        unsummarized = older[entry["upto"]:]
+        pending_tokens = estimate_tokens(unsummarized)
+        if len(unsummarized) >= settings.CONTEXT_SUMMARY_BATCH or (
+            estimate_tokens(recent) + pending_tokens > settings.CONTEXT_TOKEN_BUDGET
+        ):
+            try:
+                summary = await self._summarize(entry["summary"], unsummarized)
+            except Exception as e:
+                # Sent verbatim this turn; the next turn tries to summarise them again.
+                print(f"Context compaction: summarizer failed for interview {interview_id}, sending the history uncompacted: {e}")
+            else:
+                entry = {"upto": len(older), "summary": summary}
+                await self._save(interview_id, entry)
+                unsummarized = []
+
+        messages = []
+        if entry["summary"]:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier part of this interview:\n{entry['summary']}",
+            })
+        messages.extend(unsummarized)
+        messages.extend(recent)
+
+        sent_tokens = estimate_tokens(messages)
+        self._record(full_tokens, sent_tokens)
+        return messages, {
+            "prompt_tokens": full_tokens,
+            "prompt_tokens_sent": sent_tokens,
+            "prompt_tokens_saved": max(full_tokens - sent_tokens, 0),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,96 @@
+# agents/detector_registry.py
+import os
+import threading
+import time
+import cv2
+from core.config import settings
+
+
+class DetectorRegistry:
+    """
+    Loads each detection model once per process (the API process or a pool worker) and hands
+    out the shared instance, so opening a proctoring session never touches the model files.
+    """
+    def __init__(self):
+        self._loaders = {}  # name -> zero-argument callable returning the model
+        self._models = {}
+        self._load_ms = {}
+        self._lock = threading.Lock()
+        self._sessions = 0
+        self._total_setup_ms = 0.0
+        self._max_setup_ms = 0.0
+
+    def register(self, name: str, loader):
+        self._loaders[name] = loader
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    started = time.perf_counter()
+                    model = self._loaders[name]()
+                    self._load_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+                    self._models[name] = model
+        return model
+
+    def warm(self, names=None) -> dict:
+        """Loads the given (default: all registered) models and returns their load times in ms."""
+        for name in names or list(self._loaders):
+            self.get(name)
+        return dict(self._load_ms)
+
+    def record_session_setup(self, seconds: float):
+        with self._lock:
+            self._sessions += 1
+            self._total_setup_ms += seconds * 1000
+            self._max_setup_ms = max(self._max_setup_ms, seconds * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "loaded_models": dict(self._load_ms),
+                "sessions": self._sessions,
+                "avg_session_setup_ms": round(self._total_setup_ms / self._sessions, 3) if self._sessions else None,
+                "max_session_setup_ms": round(self._max_setup_ms, 3),
+            }
+
+
+def _model_file(path: str, hint: str) -> str:
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Face model not found at '{path}'. {hint}")
+    return path
+
+def _load_dnn_face():
+    hint = "Download OpenCV's res10_300x300_ssd face detector (deploy.prototxt and the .caffemodel) and set PROCTORING_DNN_PROTOTXT / PROCTORING_DNN_WEIGHTS."
+    return cv2.dnn.readNetFromCaffe(
+        _model_file(settings.PROCTORING_DNN_PROTOTXT, hint), _model_file(settings.PROCTORING_DNN_WEIGHTS, hint)
+    )
+
+def _load_yunet_face():
+    hint = "Download face_detection_yunet_2023mar.onnx from the OpenCV model zoo and set PROCTORING_YUNET_MODEL."
+    return cv2.FaceDetectorYN.create(
+        _model_file(settings.PROCTORING_YUNET_MODEL, hint), "", (320, 320), settings.PROCTORING_DNN_CONFIDENCE
+    )
+
+
+detector_registry = DetectorRegistry()
+detector_registry.register(
+    "haar_face", lambda: cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+)
+detector_registry.register(
+    "haar_eye", lambda: cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+)
+detector_registry.register("dnn_face", _load_dnn_face)
+detector_registry.register("yunet_face", _load_yunet_face)
+
+
+# Module-level helpers so they can be sent to process-pool workers.
+
+def warm_detectors(names=None):
+    return detector_registry.warm(names)
+
+def detector_stats():
+    return detector_registry.stats()
@@ -0,0 +1,174 @@
+# agents/face_detectors.py
+import cv2
+import numpy as np
+from core.config import settings
+from agents.detector_registry import detector_registry
+
+# --- FACE DETECTOR BACKENDS ---
+# Each backend turns one decoded frame into the observations the anomaly rules need:
+# the face boxes (full-resolution x, y, w, h) and whether the single face is looking at the
+# screen (`eyes_found`). Backends are stateless; models come from the per-process registry and
+# ROI-tracking state is passed in and returned, so they can run in the frame-analysis pool.
+
+
+def _downscale(image):
+    """Returns (image resized to PROCTORING_DETECT_WIDTH if wider, scale factor applied)."""
+    scale = min(1.0, settings.PROCTORING_DETECT_WIDTH / image.shape[1])
+    if scale < 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image, scale
+
+
+class FaceDetectorBackend:
+    name = ""
+    models = ()  # registry names this backend loads
+
+    def detect(self, gray, frame, tracked_face=None, frames_since_full_search=0, fast_mode=True):
+        """
+        `gray` is the single-channel frame; `frame` the BGR frame (or None if only gray was decoded).
+        Returns (faces, eyes_found, tracked_face, frames_since_full_search); `eyes_found` is None
+        unless exactly one face was found.
+        """
+        raise NotImplementedError
+
+
+class HaarBackend(FaceDetectorBackend):
+    """The original Haar cascades: frontal-face cascade, then an eye cascade inside the face."""
+    name = "haar"
+    models = ("haar_face", "haar_eye")
+
+    @staticmethod
+    def _detect_faces_fast(face_cascade, gray, tracked_face, frames_since_full_search):
+        """
+        Returns (faces, tracked_face, frames_since_full_search) with face boxes in full-resolution
+        coordinates, searching a downscaled copy of the frame. Uses the tracked ROI when possible and
+        falls back to a full-frame search every PROCTORING_FULL_SEARCH_INTERVAL frames or whenever
+        the track is lost.
+        """
+        frame_h, frame_w = gray.shape[:2]
+        small, scale = _downscale(gray)
+
+        frames_since_full_search += 1
+        if tracked_face is not None and frames_since_full_search < settings.PROCTORING_FULL_SEARCH_INTERVAL:
+            x, y, w, h = tracked_face
+            pad_x = int(w * settings.PROCTORING_ROI_PADDING)
+            pad_y = int(h * settings.PROCTORING_ROI_PADDING)
+            x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+            x1, y1 = min(frame_w, x + w + pad_x), min(frame_h, y + h + pad_y)
+            sx0, sy0, sx1, sy1 = int(x0 * scale), int(y0 * scale), int(x1 * scale), int(y1 * scale)
+            window_faces = face_cascade.detectMultiScale(small[sy0:sy1, sx0:sx1], 1.1, 4)
+            if len(window_faces) == 1:
+                fx, fy, fw, fh = window_faces[0]
+                face = (int((fx + sx0) / scale), int((fy + sy0) / scale), int(fw / scale), int(fh / scale))
+                return [face], face, frames_since_full_search
+            # Track lost (or a second face appeared near the first): confirm with a full search.
+
+        faces = [
+            (int(fx / scale), int(fy / scale), int(fw / scale), int(fh / scale))
+            for fx, fy, fw, fh in face_cascade.detectMultiScale(small, 1.1, 4)
+        ]
+        return faces, (faces[0] if len(faces) == 1 else None), 0
+
+    def detect(self, gray, frame, tracked_face=None, frames_since_full_search=0, fast_mode=True):
+        face_cascade = detector_registry.get("haar_face")
+        eye_cascade = detector_registry.get("haar_eye")
+        if fast_mode:
+            faces, tracked_face, frames_since_full_search = self._detect_faces_fast(
+                face_cascade, gray, tracked_face, frames_since_full_search
+            )
+        else:
+            faces = [tuple(int(v) for v in face) for face in face_cascade.detectMultiScale(gray, 1.1, 4)]
+
+        eyes_found = None
+        if len(faces) == 1:
+            x, y, w, h = faces[0]
+            face_roi_gray = gray[y:y+h, x:x+w] # Region of Interest for the face
+            eyes_found = len(eye_cascade.detectMultiScale(face_roi_gray)) > 0
+        return faces, eyes_found, tracked_face, frames_since_full_search
+
+
+class DnnBackend(FaceDetectorBackend):
+    """
+    OpenCV's CPU DNN face detector (ResNet-10 SSD, 300x300 input). Far fewer missed faces than
+    the cascade on turned or poorly lit faces; the eye check still uses the Haar eye cascade.
+    """
+    name = "dnn"
+    models = ("dnn_face", "haar_eye")
+
+    def detect(self, gray, frame, tracked_face=None, frames_since_full_search=0, fast_mode=True):
+        net = detector_registry.get("dnn_face")
+        eye_cascade = detector_registry.get("haar_eye")
+        if frame is None:
+            frame = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        frame_h, frame_w = frame.shape[:2]
+
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        net.setInput(blob)
+        detections = net.forward()[0, 0]  # rows of (_, _, confidence, x0, y0, x1, y1), coordinates in [0, 1]
+
+        faces = []
+        for confidence, x0, y0, x1, y1 in detections[:, 2:7]:
+            if confidence < settings.PROCTORING_DNN_CONFIDENCE:
+                continue
+            x0, x1 = int(max(0.0, x0) * frame_w), int(min(1.0, x1) * frame_w)
+            y0, y1 = int(max(0.0, y0) * frame_h), int(min(1.0, y1) * frame_h)
+            if x1 > x0 and y1 > y0:
+                faces.append((x0, y0, x1 - x0, y1 - y0))
+
+        eyes_found = None
+        if len(faces) == 1:
+            x, y, w, h = faces[0]
+            eyes_found = len(eye_cascade.detectMultiScale(gray[y:y+h, x:x+w])) > 0
+        return faces, eyes_found, None, 0
+
+
+class LandmarkGazeBackend(FaceDetectorBackend):
+    """
+    YuNet face detector (OpenCV FaceDetectorYN), which also returns five facial landmarks.
+    Instead of looking for eyes with a cascade, the head yaw is estimated from the landmarks:
+    the horizontal offset of the nose tip from the midpoint between the eyes, relative to the
+    eye distance. The candidate counts as looking at the screen while |yaw| stays within
+    PROCTORING_GAZE_MAX_YAW.
+    """
+    name = "landmark_gaze"
+    models = ("yunet_face",)
+
+    @staticmethod
+    def estimate_yaw(landmarks) -> float:
+        """`landmarks` is YuNet's (right eye, left eye, nose, right mouth, left mouth) as x, y pairs."""
+        right_eye, left_eye, nose = landmarks[0:2], landmarks[2:4], landmarks[4:6]
+        eye_distance = float(np.hypot(left_eye[0] - right_eye[0], left_eye[1] - right_eye[1]))
+        if eye_distance < 1e-3:
+            return float("inf")
+        return float((nose[0] - (right_eye[0] + left_eye[0]) / 2) / eye_distance)
+
+    def detect(self, gray, frame, tracked_face=None, frames_since_full_search=0, fast_mode=True):
+        detector = detector_registry.get("yunet_face")
+        if frame is None:
+            frame = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+        small, scale = _downscale(frame) if fast_mode else (frame, 1.0)
+        detector.setInputSize((small.shape[1], small.shape[0]))
+        _, detections = detector.detect(small)
+        if detections is None:
+            return [], None, None, 0
+
+        faces = [
+            (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+            for x, y, w, h in detections[:, 0:4]
+        ]
+        eyes_found = None
+        if len(faces) == 1:
+            eyes_found = abs(self.estimate_yaw(detections[0, 4:14])) <= settings.PROCTORING_GAZE_MAX_YAW
+        return faces, eyes_found, None, 0
+
+
+BACKENDS = {backend.name: backend for backend in (HaarBackend(), DnnBackend(), LandmarkGazeBackend())}
+
+
+def get_backend(name: str = None) -> FaceDetectorBackend:
+    """Returns the named backend (default: PROCTORING_DETECTOR_BACKEND)."""
+    name = name or settings.PROCTORING_DETECTOR_BACKEND
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown face detector backend '{name}'. Available: {', '.join(BACKENDS)}")
@@ -0,0 +1,92 @@
+# agents/frame_protocol.py
+import struct
+from collections import namedtuple
+from core.config import settings
+
+# --- COMPACT PROCTORING FRAME PROTOCOL ---
+# Negotiation: right after connecting, the client sends a text message
+#     {"type": "hello", "format": "gray_jpeg" | "luma"}
+# and the server answers {"type": "format", "format": ..., "maxFramesPerMessage": N, "detectWidth": W}.
+# Clients that never send a hello keep the legacy format: one color-encoded image per message.
+#
+# After negotiation every binary message is (all integers little-endian):
+#     message header  magic b"PF", version u8, frame count u8
+#     per frame       seq u32, timestamp_ms u64, encoding u8, reserved u8, width u16, height u16,
+#                     payload length u32, then the payload
+# encoding 0 is a grayscale JPEG (width/height informational), 1 a raw 8-bit luma plane of width x height.
+
+MAGIC = b"PF"
+VERSION = 1
+MESSAGE_HEADER = struct.Struct("<2sBB")
+FRAME_HEADER = struct.Struct("<IQBxHHI")
+
+ENCODING_GRAY_JPEG = 0
+ENCODING_LUMA = 1
+FORMATS = {"gray_jpeg": ENCODING_GRAY_JPEG, "luma": ENCODING_LUMA}
+ENCODING_NAMES = {code: name for name, code in FORMATS.items()}
+
+# One decoded-from-the-wire frame. `encoding` is "color" (legacy), "gray_jpeg" or "luma".
+Frame = namedtuple("Frame", ["seq", "timestamp_ms", "encoding", "width", "height", "data"])
+
+
+class FrameProtocolError(ValueError):
+    pass
+
+
+def legacy_frame(data: bytes) -> Frame:
+    return Frame(None, None, "color", None, None, data)
+
+
+def negotiate(hello: dict):
+    """Returns the server's reply to a client hello; an unsupported format falls back to legacy."""
+    requested = hello.get("format")
+    return {
+        "type": "format",
+        "format": requested if requested in FORMATS else "legacy",
+        "version": VERSION,
+        "maxFramesPerMessage": settings.PROCTORING_MAX_FRAMES_PER_MESSAGE,
+        "detectWidth": settings.PROCTORING_DETECT_WIDTH,
+    }
+
+
+def parse_message(payload: bytes) -> list:
+    """Splits one binary message into Frames, validating the header and payload sizes."""
+    if len(payload) < MESSAGE_HEADER.size:
+        raise FrameProtocolError("Message shorter than its header.")
+    magic, version, count = MESSAGE_HEADER.unpack_from(payload, 0)
+    if magic != MAGIC or version != VERSION:
+        raise FrameProtocolError("Not a compact frame message (bad magic or version).")
+    if count > settings.PROCTORING_MAX_FRAMES_PER_MESSAGE:
+        raise FrameProtocolError(f"Too many frames in one message ({count}).")
+
+    frames, offset = [], MESSAGE_HEADER.size
+    for _ in range(count):
+        if len(payload) < offset + FRAME_HEADER.size:
+            raise FrameProtocolError("Truncated frame header.")
+        seq, timestamp_ms, encoding, width, height, length = FRAME_HEADER.unpack_from(payload, offset)
+        offset += FRAME_HEADER.size
+        if encoding not in ENCODING_NAMES:
+            raise FrameProtocolError(f"Unknown frame encoding {encoding}.")
+        if encoding == ENCODING_LUMA and (
+            length != width * height or width * height > settings.PROCTORING_MAX_FRAME_PIXELS
+        ):
+            raise FrameProtocolError("Luma plane size does not match its dimensions.")
+        if len(payload) < offset + length:
+            raise FrameProtocolError("Truncated frame payload.")
+        frames.append(Frame(seq, timestamp_ms, ENCODING_NAMES[encoding], width, height,
+                            bytes(payload[offset:offset + length])))
+        offset += length
+    if offset != len(payload):
+        raise FrameProtocolError("Trailing bytes after the last frame.")
+    return frames
+
+
+def encode_message(frames) -> bytes:
+    """Packs Frames (encoding "gray_jpeg" or "luma") into one message; used by clients and benchmarks."""
+    parts = [MESSAGE_HEADER.pack(MAGIC, VERSION, len(frames))]
+    for frame in frames:
+        parts.append(FRAME_HEADER.pack(
+            frame.seq, frame.timestamp_ms, FORMATS[frame.encoding], frame.width or 0, frame.height or 0, len(frame.data)
+        ))
+        parts.append(frame.data)
+    return b"".join(parts)
@@ -0,0 +1,102 @@
+# agents/hedging.py
+import asyncio
+import threading
+from core.config import settings
+from core.latency import latency_tracker
+
+# --- HEDGED REQUESTS ---
+# An interviewer turn that is slower than the primary model usually is (its observed p95) is most
+# likely stuck in upstream queueing. Instead of waiting it out, the same request is also sent to the
+# fallback model; whichever answers first is used and the other call is cancelled. A primary that
+# fails outright falls back immediately. The latency of every completion is recorded per model, so
+# the threshold follows how the model is behaving right now.
+
+def model_latency_metric(model: str, streaming: bool = False) -> str:
+    """Latency metric name of a model: full completion time, or time-to-first-token when streaming."""
+    return f"llm_model_ttft:{model}" if streaming else f"llm_model:{model}"
+
+
+class HedgePolicy:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "hedged": 0, "primary_errors": 0, "primary_wins": 0, "fallback_wins": 0}
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(settings.LLM_FALLBACK_MODEL)
+
+    @staticmethod
+    def threshold(metric: str) -> float:
+        """
+        Seconds to wait for the primary before hedging: the configured percentile of its recent
+        latency, never below LLM_HEDGE_MIN_DELAY. Until enough samples exist, LLM_HEDGE_INITIAL_DELAY.
+        """
+        if latency_tracker.count(metric) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return settings.LLM_HEDGE_INITIAL_DELAY
+        return max(settings.LLM_HEDGE_MIN_DELAY, latency_tracker.percentile(metric, settings.LLM_HEDGE_PERCENTILE))
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    async def run(self, primary, fallback, metric: str, discard=None):
+        """
+        Awaits `primary()`. If it hasn't finished after `threshold(metric)` seconds, or fails, also
+        starts `fallback()`, and returns the first successful result, cancelling the other call.
+        `discard(result)` is awaited for a result that completed but lost (e.g. to close a stream).
+        Raises the last error if both calls fail.
+        """
+        self._count("requests")
+        primary_task = asyncio.ensure_future(primary())
+        tasks = {primary_task: "primary"}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.threshold(metric))
+            if not done:
+                self._count("hedged")
+            elif primary_task.exception() is None:
+                self._count("primary_wins")
+                return primary_task.result()
+            else:
+                self._count("primary_errors")
+                print(f"Primary LLM call failed, using the fallback model: {primary_task.exception()}")
+
+            fallback_task = asyncio.ensure_future(fallback())
+            tasks[fallback_task] = "fallback"
+            pending = {task for task in tasks if not task.done()}
+            error = primary_task.exception() if primary_task.done() else None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in done if task.exception() is None]
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                if winners:
+                    for loser in winners[1:]:
+                        if discard is not None:
+                            await discard(loser.result())
+                    self._count(f"{tasks[winners[0]]}_wins")
+                    return winners[0].result()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        """Hedging counters plus the current threshold per model with recorded latency."""
+        with self._lock:
+            counts = dict(self._counts)
+        thresholds = {}
+        for name in latency_tracker.snapshot():
+            if name.startswith(("llm_model:", "llm_model_ttft:")):
+                thresholds[name] = round(self.threshold(name) * 1000, 1)
+        return {
+            "enabled": self.enabled(),
+            "fallback_model": settings.LLM_FALLBACK_MODEL,
+            "percentile": settings.LLM_HEDGE_PERCENTILE,
+            "counts": counts,
+            "threshold_ms": thresholds,
+        }
+
+
+hedge_policy = HedgePolicy()
@@ -1,22 +1,75 @@
+import asyncio
 import json
-from autogen import ConversableAgent, GroupChat, GroupChatManager
+import threading
+import time
 from core.config import settings
+from core.latency import latency_tracker
+from core.metrics import timed, add_stage_time, record_llm_tokens
+from agents.llm_clients import client_pool, llm_agent, sdk_max_retries
+from agents.rate_limiter import llm_priority, rate_limiter
+from agents.context_compaction import ContextCompactor, SUMMARIZER_SYSTEM_MESSAGE, estimate_tokens
+from agents.response_cache import response_cache
+from agents.hedging import hedge_policy, model_latency_metric
+
+INTERVIEWER_SYSTEM_MESSAGE = """You are Alex, an expert AI interviewer for Excel roles. Your primary goal is to assess a candidate's skills through a structured conversation.
+            **Your Task:** Your only job is to generate the NEXT response in the conversation based on the history provided.
+            - Ask one clear question at a time.
+            - Guide the conversation through foundational, scenario-based, and practical tasks.
+            - After your final concluding remarks, you MUST end your response with the single word "TERMINATE".
+            """
+
+EVALUATOR_SYSTEM_MESSAGE = """You are a silent evaluation agent. Your only task is to analyze the provided interview transcript.
+            Generate ONLY a single, valid JSON object with the following keys:
+            - "score": An integer from 0 to 100 representing the candidate's overall proficiency.
+            - "summary": A concise 2-3 sentence summary of the candidate's performance.
+            - "strengths": A string containing a bulleted list of the candidate's key strengths.
+            - "weaknesses": A string containing a bulleted list of the candidate's areas for improvement.
+            Do not add any text or formatting before or after the JSON object.
+            """
+
+FEEDBACK_SYSTEM_MESSAGE = """You are an AI System Analyst. You will be given an interview transcript and feedback from a human admin. 
+            Your task is to analyze both and provide a concise, one-sentence, actionable suggestion for how the Interviewer Agent can improve in future interviews.
+            Example: "Suggestion: The Interviewer Agent should ask for a specific code example when a candidate discusses complex formulas."
+            Output ONLY the single sentence suggestion.
+            """
+
+FALLBACK_REPORT_JSON = '{"score": 0, "summary": "Error generating report.", "strengths": "N/A", "weaknesses": "The AI evaluation agent did not return a valid JSON response."}'
+
+SIMULATION_OPENING_MESSAGE = "Hello Candidate. Let's start the simulation. Can you explain what a PivotTable is?"
+SIMULATION_MAX_ROUND = 8  # A short, simulated interview
+
+CANDIDATE_SYSTEM_MESSAGE = """You are a job candidate with intermediate Excel skills. You are confident about VLOOKUP, PivotTables, and basic formulas, but you might be slightly hesitant or need a moment to think about complex nested formulas or advanced topics like dynamic arrays. Answer questions naturally and professionally as this persona.
+            """
+
+# Candidate personas for batch simulations; "intermediate" is the default simulated candidate.
+CANDIDATE_PERSONAS = {
+    "intermediate": CANDIDATE_SYSTEM_MESSAGE,
+    "beginner": """You are a job candidate who has only used Excel for simple lists and SUM formulas. You have heard of VLOOKUP and PivotTables but have rarely used them, and you are unsure about anything more advanced. Answer honestly as this persona, admitting when you don't know something.
+            """,
+    "advanced": """You are a job candidate who is an Excel power user. You are fluent with XLOOKUP, INDEX/MATCH, dynamic arrays, LET/LAMBDA, Power Query and PivotTables, and you explain trade-offs precisely and concisely. Answer as this persona.
+            """,
+    "overconfident": """You are a job candidate with basic Excel skills who presents themselves as an expert. You answer quickly and confidently, sometimes with subtly wrong details about advanced functions. Answer as this persona without admitting uncertainty.
+            """,
+    "nervous": """You are a job candidate with solid intermediate Excel skills who is very nervous in interviews. You often hedge, ask for clarification, and give short answers, but what you say is mostly correct. Answer as this persona.
+            """,
+}
+
 
 class AgentOrchestrator:
-    def __init__(self, past_feedback: str = ""):
+    def __init__(self):
         """
         Initializes all agents with their specific models, API keys, and system prompts.
+        Agents are stateless between calls, so one orchestrator is shared by the whole
+        process (see `get_orchestrator`); per-interview context is passed into each call.
         """
         # --- LLM CONFIGURATIONS PER AGENT ---
-        # Added a dummy price to silence the "Model not found" warning from autogen.
-        # This tells autogen not to worry about cost tracking for these custom models.
         
         llm_config_interviewer = {
             "config_list": [{
                 "model": "openai/gpt-oss-120b",
                 "api_key": settings.GROQ_API_KEY_INTERVIEWER,
-                "base_url": "https://api.groq.com/openai/v1",
-                "price": [0, 0] # Silences cost tracking warning
+                "base_url": settings.LLM_BASE_URL,
+                "max_retries": sdk_max_retries(),
             }],
             "temperature": 0.7,
             "max_tokens": 8192
@@ -26,8 +79,8 @@ class AgentOrchestrator:
             "config_list": [{
                 "model": "meta-llama/llama-4-maverick-17b-128e-instruct",
                 "api_key": settings.GROQ_API_KEY_EVALUATOR,
-                "base_url": "https://api.groq.com/openai/v1",
-                "price": [0, 0] # Silences cost tracking warning
+                "base_url": settings.LLM_BASE_URL,
+                "max_retries": sdk_max_retries(),
             }],
             "temperature": 0.5,
             "max_tokens": 1024
@@ -37,105 +90,352 @@ class AgentOrchestrator:
             "config_list": [{
                 "model": "gemma2-9b-it",
                 "api_key": settings.GROQ_API_KEY_SIMULATOR,
-                "base_url": "https://api.groq.com/openai/v1",
-                "price": [0, 0] # Silences cost tracking warning
+                "base_url": settings.LLM_BASE_URL,
+                "max_retries": sdk_max_retries(),
             }],
             "temperature": 1,
             "max_tokens": 1024
         }
-        
-        # --- AGENT DEFINITIONS ---
-        
-        self.interviewer_agent = ConversableAgent(
-            name="Interviewer_Agent",
-            system_message=f"""You are Alex, an expert AI interviewer for Excel roles. Your primary goal is to assess a candidate's skills through a structured conversation.
-            **Past Feedback for Improvement:** Based on previous reviews, remember the following: '{past_feedback or "No specific feedback yet. Follow standard procedure."}'
-            **Your Task:** Your only job is to generate the NEXT response in the conversation based on the history provided.
-            - Ask one clear question at a time.
-            - Guide the conversation through foundational, scenario-based, and practical tasks.
-            - After your final concluding remarks, you MUST end your response with the single word "TERMINATE".
-            """,
-            llm_config=llm_config_interviewer,
-        )
 
-        self.evaluation_agent = ConversableAgent(
-            name="Evaluation_Agent",
-            system_message="""You are a silent evaluation agent. Your only task is to analyze the provided interview transcript.
-            Generate ONLY a single, valid JSON object with the following keys:
-            - "score": An integer from 0 to 100 representing the candidate's overall proficiency.
-            - "summary": A concise 2-3 sentence summary of the candidate's performance.
-            - "strengths": A string containing a bulleted list of the candidate's key strengths.
-            - "weaknesses": A string containing a bulleted list of the candidate's areas for improvement.
-            Do not add any text or formatting before or after the JSON object.
-            """,
-            llm_config=llm_config_evaluator,
-        )
-        
-        self.feedback_agent = ConversableAgent(
-            name="Feedback_Agent",
-            system_message="""You are an AI System Analyst. You will be given an interview transcript and feedback from a human admin. 
-            Your task is to analyze both and provide a concise, one-sentence, actionable suggestion for how the Interviewer Agent can improve in future interviews.
-            Example: "Suggestion: The Interviewer Agent should ask for a specific code example when a candidate discusses complex formulas."
-            Output ONLY the single sentence suggestion.
-            """,
-            llm_config=llm_config_evaluator,
-        )
+        # Optional fallback model for interviewer turns, which are hedged to it when slow or failing.
+        llm_config_interviewer_fallback = None
+        if settings.LLM_FALLBACK_MODEL:
+            fallback_key = settings.LLM_FALLBACK_API_KEY or settings.GROQ_API_KEY_INTERVIEWER
+            llm_config_interviewer_fallback = {
+                "config_list": [{
+                    "model": settings.LLM_FALLBACK_MODEL,
+                    "api_key": fallback_key,
+                    "base_url": settings.LLM_FALLBACK_BASE_URL or settings.LLM_BASE_URL,
+                    "max_retries": sdk_max_retries(),
+                }],
+                "temperature": llm_config_interviewer["temperature"],
+                "max_tokens": llm_config_interviewer["max_tokens"]
+            }
 
-        self.candidate_agent = ConversableAgent(
-            name="Candidate_Agent",
-            system_message="""You are a job candidate with intermediate Excel skills. You are confident about VLOOKUP, PivotTables, and basic formulas, but you might be slightly hesitant or need a moment to think about complex nested formulas or advanced topics like dynamic arrays. Answer questions naturally and professionally as this persona.
-            """,
-            llm_config=llm_config_simulator,
-        )
+        self.llm_config_interviewer = llm_config_interviewer
+        self.llm_config_interviewer_fallback = llm_config_interviewer_fallback
+        self.llm_config_evaluator = llm_config_evaluator
+        self.llm_config_simulator = llm_config_simulator
+        self._async_clients = {}
+        self.context_compactor = ContextCompactor(self._a_summarize)
 
-    def get_initial_message(self, candidate_name: str):
+    @staticmethod
+    def _with_past_feedback(messages: list, past_feedback: str):
+        """Prepends the per-interview feedback as an extra system message instead of baking it into the agent."""
+        feedback = past_feedback or "No specific feedback yet. Follow standard procedure."
+        feedback_message = {
+            "role": "system",
+            "content": f"**Past Feedback for Improvement:** Based on previous reviews, remember the following: '{feedback}'",
+        }
+        return [feedback_message] + messages
+
+    @staticmethod
+    def _extract_report_json(response: str):
+        """Extracts and validates the JSON object returned by the Evaluation Agent."""
+        try:
+            # Clean the response to extract only the JSON part, making it more robust.
+            json_str = response.strip().split('```json')[-1].split('```')[0].strip()
+            json.loads(json_str) # Validate that it's proper JSON
+            return json_str
+        except (json.JSONDecodeError, IndexError, AttributeError):
+            # Fallback in case the LLM response is not formatted as expected
+            return FALLBACK_REPORT_JSON
+
+    @classmethod
+    def _is_valid_report(cls, response: str) -> bool:
+        return cls._extract_report_json(response) != FALLBACK_REPORT_JSON
+
+    # --- AGENT REPLIES ---
+    # Every agent call is a single AsyncOpenAI chat completion on the pooled async HTTP client,
+    # so no LLM call blocks the event loop or a worker thread.
+
+    def _async_client(self, role: str, llm_config: dict):
+        client = self._async_clients.get(role)
+        if client is None:
+            from openai import AsyncOpenAI
+            config = llm_config["config_list"][0]
+            client = AsyncOpenAI(
+                api_key=config["api_key"],
+                base_url=config["base_url"],
+                http_client=client_pool.async_client_for(config["api_key"], role),
+                max_retries=config["max_retries"],
+            )
+            self._async_clients[role] = client
+        return client
+
+    async def _a_complete(self, role: str, llm_config: dict, system_message: str, messages: list,
+                          max_tokens: int = None) -> str:
+        """One chat completion; its latency is recorded per model to drive hedging."""
+        config = llm_config["config_list"][0]
+        started = time.perf_counter()
+        try:
+            response = await self._async_client(role, llm_config).chat.completions.create(
+                model=config["model"],
+                messages=[{"role": "system", "content": system_message}] + messages,
+                temperature=llm_config["temperature"],
+                max_tokens=max_tokens or llm_config["max_tokens"],
+            )
+        except asyncio.CancelledError:
+            # A hedged-out call took at least this long; recording it keeps the tail in the histogram,
+            # otherwise cancelling everything above p95 would keep pulling p95 down.
+            latency_tracker.record(model_latency_metric(config["model"]), time.perf_counter() - started)
+            raise
+        latency_tracker.record(model_latency_metric(config["model"]), time.perf_counter() - started)
+        return response.choices[0].message.content or ""
+
+    async def _a_generate(self, role: str, llm_config: dict, system_message: str, messages: list,
+                          max_tokens: int = None, cache: bool = False, validate=None, hedge: bool = False,
+                          agent: str = None) -> str:
+        """
+        Runs one chat completion for an agent without blocking the event loop.
+        With `cache=True` the response goes through the content-addressed response cache
+        (still subject to the temperature opt-out); `validate` can reject a response (e.g. malformed
+        JSON) so it is not cached and is retried next time.
+        With `hedge=True` (interviewer turns) a slow or failed call is hedged to the fallback model.
+        `agent` names the caller in the metrics (defaults to `role`).
+        """
+        key = None
+        if cache:
+            if response_cache.is_cacheable(llm_config):
+                key = response_cache.make_key(llm_config, system_message, messages)
+                cached = await response_cache.a_get(key)
+                if cached is not None:
+                    return cached
+            else:
+                response_cache.count_bypass()
+
+        fallback = self.llm_config_interviewer_fallback if hedge else None
+        with llm_agent(agent or role):
+            if fallback is None:
+                content = await self._a_complete(role, llm_config, system_message, messages, max_tokens)
+            else:
+                content = await hedge_policy.run(
+                    lambda: self._a_complete(role, llm_config, system_message, messages, max_tokens),
+                    lambda: self._a_complete(f"{role}_fallback", fallback, system_message, messages, max_tokens),
+                    model_latency_metric(llm_config["config_list"][0]["model"]),
+                )
+        if key and content and (validate is None or validate(content)):
+            await response_cache.a_set(key, content)
+        return content
+
+    @timed()
+    async def a_get_initial_message(self, candidate_name: str, past_feedback: str = ""):
         """Generates the very first message from the AI without any prior conversation history."""
-        # We manually craft the initial prompt to the LLM to kick things off.
         initial_prompt = f"The candidate, {candidate_name}, has just joined the interview. Please provide a professional and welcoming introduction and ask your first foundational question."
         initial_history = [{"role": "user", "content": initial_prompt}]
-        ai_response = self.interviewer_agent.generate_reply(messages=initial_history)
-        return ai_response
+        return await self._a_generate(
+            "interviewer", self.llm_config_interviewer, INTERVIEWER_SYSTEM_MESSAGE,
+            self._with_past_feedback(initial_history, past_feedback), hedge=True,
+        )
 
-    def get_ai_reply(self, chat_history: list):
+    @timed()
+    async def a_get_ai_reply(self, chat_history: list, past_feedback: str = ""):
+        """Generates the AI's next response based on the entire conversation history."""
+        return await self._a_generate(
+            "interviewer", self.llm_config_interviewer, INTERVIEWER_SYSTEM_MESSAGE,
+            self._with_past_feedback(chat_history, past_feedback), hedge=True,
+        )
+
+    # --- CONTEXT MANAGEMENT ---
+
+    async def _a_summarize(self, previous_summary: str, messages: list) -> str:
+        """Folds `messages` into the running interview summary using the cheaper evaluator model."""
+        conversation = "\n".join(
+            f"{'Interviewer' if m['role'] == 'assistant' else 'Candidate'}: {m['content']}" for m in messages
+        )
+        prompt = f"CURRENT SUMMARY:\n{previous_summary or '(none yet)'}\n\nNEXT PART OF THE CONVERSATION:\n{conversation}"
+        return await self._a_generate(
+            "evaluator", self.llm_config_evaluator, SUMMARIZER_SYSTEM_MESSAGE,
+            [{"role": "user", "content": prompt}],
+            max_tokens=settings.CONTEXT_SUMMARY_MAX_TOKENS, agent="summarizer",
+        )
+
+    @timed()
+    async def a_compact_history(self, interview_id: int, chat_history: list):
         """
-        Generates the AI's next response based on the entire conversation history.
-        This is the new core method for the turn-by-turn interview.
+        Context-management stage for interviewer turns: keeps recent turns verbatim and replaces
+        older ones with a cached, incrementally updated summary once the history exceeds
+        CONTEXT_TOKEN_BUDGET. Returns (messages, turn_stats) where turn_stats reports prompt tokens saved.
         """
-        # The 'chat_history' is a list of OpenAI-formatted message dicts, e.g., [{"role": "user", "content": "..."}]
-        ai_response = self.interviewer_agent.generate_reply(messages=chat_history)
-        return ai_response
+        return await self.context_compactor.compact(interview_id, chat_history)
 
-    def generate_report(self, transcript: str):
-        """Generates a JSON report from the Evaluation Agent."""
-        response = self.evaluation_agent.generate_reply(messages=[{"role": "user", "content": transcript}])
+    async def _a_open_stream(self, role: str, llm_config: dict, messages: list):
+        """
+        Starts a streamed interviewer completion and waits for its first text chunk.
+        Returns (first_text, stream, chunks, model); time-to-first-token is recorded per model.
+        """
+        config = llm_config["config_list"][0]
+        metric = model_latency_metric(config["model"], streaming=True)
+        started = time.perf_counter()
+        stream = None
         try:
-            # Clean the response to extract only the JSON part, making it more robust.
-            json_str = response.strip().split('```json')[-1].split('```')[0].strip()
-            json.loads(json_str) # Validate that it's proper JSON
-            return json_str
-        except (json.JSONDecodeError, IndexError):
-            # Fallback in case the LLM response is not formatted as expected
-            return '{"score": 0, "summary": "Error generating report.", "strengths": "N/A", "weaknesses": "The AI evaluation agent did not return a valid JSON response."}'
+            stream = await self._async_client(role, llm_config).chat.completions.create(
+                model=config["model"],
+                messages=[{"role": "system", "content": INTERVIEWER_SYSTEM_MESSAGE}] + messages,
+                temperature=llm_config["temperature"],
+                max_tokens=llm_config["max_tokens"],
+                stream=True,
+            )
+            chunks = stream.__aiter__()
+            async for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    latency_tracker.record(metric, time.perf_counter() - started)
+                    return chunk.choices[0].delta.content, stream, chunks, config["model"]
+            latency_tracker.record(metric, time.perf_counter() - started)
+            return "", stream, chunks, config["model"]
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                latency_tracker.record(metric, time.perf_counter() - started)
+            if stream is not None:
+                await stream.close()
+            raise
+
+    @staticmethod
+    async def _close_stream(opened):
+        await opened[1].close()
 
-    def process_feedback(self, transcript: str, admin_feedback: str):
-        """Generates an actionable suggestion from the Feedback Agent."""
+    @timed()
+    async def a_stream_ai_reply(self, chat_history: list, past_feedback: str = ""):
+        """
+        Streams the interviewer's next response, yielding text chunks as the model produces them.
+        With a fallback model configured, a stream whose first token is slower than the model's
+        usual time-to-first-token is hedged, and the first stream to produce text is used.
+        """
+        messages = self._with_past_feedback(chat_history, past_feedback)
+        fallback = self.llm_config_interviewer_fallback
+        started = time.perf_counter()
+        with llm_agent("interviewer"):
+            if fallback is None:
+                opened = await self._a_open_stream("interviewer", self.llm_config_interviewer, messages)
+            else:
+                opened = await hedge_policy.run(
+                    lambda: self._a_open_stream("interviewer", self.llm_config_interviewer, messages),
+                    lambda: self._a_open_stream("interviewer_fallback", fallback, messages),
+                    model_latency_metric(self.llm_config_interviewer["config_list"][0]["model"], streaming=True),
+                    discard=self._close_stream,
+                )
+        first_text, stream, chunks, model = opened
+        texts = [first_text]
+        usage = None
+        try:
+            if first_text:
+                yield first_text
+            async for chunk in chunks:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    texts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+            # Streamed responses carry no usage unless the provider adds it; estimate it otherwise.
+            add_stage_time("llm", time.perf_counter() - started)
+            if usage is not None:
+                record_llm_tokens("interviewer", model, usage.prompt_tokens, usage.completion_tokens)
+            else:
+                record_llm_tokens(
+                    "interviewer", model,
+                    estimate_tokens([{"role": "system", "content": INTERVIEWER_SYSTEM_MESSAGE}] + messages),
+                    estimate_tokens([{"role": "assistant", "content": "".join(texts)}]),
+                )
+
+    @timed()
+    async def a_generate_report(self, transcript: str):
+        """Generates a JSON report from the Evaluation Agent (cached per identical transcript)."""
+        with llm_priority("report"):
+            response = await self._a_generate(
+                "evaluator", self.llm_config_evaluator, EVALUATOR_SYSTEM_MESSAGE,
+                [{"role": "user", "content": transcript}],
+                cache=True, validate=self._is_valid_report,
+            )
+        return self._extract_report_json(response)
+
+    @timed()
+    async def a_process_feedback(self, transcript: str, admin_feedback: str):
+        """Generates an actionable suggestion from the Feedback Agent (cached per identical input)."""
         prompt = f"TRANSCRIPT:\n{transcript}\n\nADMIN FEEDBACK:\n{admin_feedback}"
-        suggestion = self.feedback_agent.generate_reply(messages=[{"role": "user", "content": prompt}])
-        return suggestion
-
-    def run_simulation(self):
-        """Runs a full, automated simulation between the Interviewer and Candidate agents."""
-        # GroupChat is now ONLY used for the simulation, which is the correct approach.
-        groupchat = GroupChat(
-            agents=[self.interviewer_agent, self.candidate_agent],
-            messages=[],
-            max_round=8, # A short, simulated interview
-            speaker_selection_method="round_robin" # Silences the "underpopulated" warning
-        )
-        manager = GroupChatManager(groupchat=groupchat, llm_config=self.candidate_agent.llm_config)
-        
-        self.interviewer_agent.initiate_chat(manager, message="Hello Candidate. Let's start the simulation. Can you explain what a PivotTable is?")
-        
-        # Filter out empty messages that can sometimes occur in autogen
-        transcript = [{"sender": msg['name'], "text": msg['content']} for msg in groupchat.messages if msg['content']]
-        return transcript
\ No newline at end of file
+        with llm_priority("report"):
+            return await self._a_generate(
+                "evaluator", self.llm_config_evaluator, FEEDBACK_SYSTEM_MESSAGE,
+                [{"role": "user", "content": prompt}],
+                cache=True, agent="feedback",
+            )
+
+    @timed()
+    async def a_run_simulation(self, max_round: int = SIMULATION_MAX_ROUND,
+                               candidate_system_message: str = CANDIDATE_SYSTEM_MESSAGE):
+        """
+        Runs a simulated interview between the Interviewer and Candidate agents, yielding each turn
+        ({"sender", "text"}) as soon as it is generated. Speakers alternate round-robin (the
+        interviewer's opening message counts as the first of `max_round` messages; each agent sees its
+        own turns as "assistant" and the other's as "user"), and every reply is a single non-blocking
+        LLM call, so the first turn is visible immediately and cancelling the consumer stops the remaining rounds.
+        `candidate_system_message` selects the candidate persona (see CANDIDATE_PERSONAS).
+        """
+        speakers = [
+            ("Interviewer_Agent", "interviewer", "interviewer", self.llm_config_interviewer, INTERVIEWER_SYSTEM_MESSAGE),
+            ("Candidate_Agent", "simulator", "candidate", self.llm_config_simulator, candidate_system_message),
+        ]
+        transcript = [{"sender": "Interviewer_Agent", "text": SIMULATION_OPENING_MESSAGE}]
+        yield transcript[0]
+
+        for round_index in range(1, max_round):
+            name, role, agent, llm_config, system_message = speakers[round_index % len(speakers)]
+            messages = [
+                {"role": "assistant" if turn["sender"] == name else "user", "content": turn["text"]}
+                for turn in transcript
+            ]
+            # Set per call: the priority must not leak to the consumer across yields.
+            with llm_priority("simulation"):
+                text = await self._a_generate(role, llm_config, system_message, messages, agent=agent)
+            terminated = "TERMINATE" in text
+            text = text.replace("TERMINATE", "").strip()
+            # Skip empty replies; they add nothing to the transcript.
+            if text:
+                turn = {"sender": name, "text": text}
+                transcript.append(turn)
+                yield turn
+            if terminated:
+                break
+
+
+# --- PROCESS-WIDE REGISTRY ---
+# Building the agents (and their OpenAI clients) on every request is wasted work, so the
+# orchestrator is created once per process and handed out to every caller.
+
+_orchestrator = None
+_orchestrator_lock = threading.Lock()
+
+def get_orchestrator() -> AgentOrchestrator:
+    """Returns the shared AgentOrchestrator, creating it on first use."""
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = AgentOrchestrator()
+    return _orchestrator
+
+def warm_agents():
+    """
+    Does the slow first-use work off the request path: imports the OpenAI SDK and builds the
+    shared orchestrator with its async clients. Called from the app lifespan.
+    """
+    orchestrator = get_orchestrator()
+    orchestrator._async_client("interviewer", orchestrator.llm_config_interviewer)
+    orchestrator._async_client("evaluator", orchestrator.llm_config_evaluator)
+    orchestrator._async_client("simulator", orchestrator.llm_config_simulator)
+
+def get_response_cache_stats() -> dict:
+    """Returns hit/miss counters of the evaluator/feedback response cache."""
+    return response_cache.stats()
+
+def get_pool_stats() -> list:
+    """Returns the keep-alive connection pool statistics for every API key in use."""
+    return client_pool.stats()
+
+def get_rate_limit_stats() -> dict:
+    """Returns the LLM rate limiter's queue depth, wait times and 429 counters per API key."""
+    return rate_limiter.stats()
+
+def get_hedge_stats() -> dict:
+    """Returns interviewer hedging counters and the current hedge threshold per model."""
+    return hedge_policy.stats()
@@ -0,0 +1,254 @@
+# agents/llm_clients.py
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+import httpx
+from core.config import settings
+from core.metrics import record_llm_request
+from agents.rate_limiter import RateLimitedTransport, AsyncRateLimitedTransport
+
+
+def sdk_max_retries() -> int:
+    """
+    Retries for the OpenAI SDK clients. The rate-limited transport already retries 429s with
+    backoff, and SDK retries would stack on top of them, so the SDK doesn't retry while the limiter
+    is on. Otherwise the SDK's default of 2 applies.
+    """
+    return 0 if settings.LLM_RATE_LIMIT_ENABLED else 2
+
+
+# --- AGENT TAGS ---
+# Pools are per API key and shared by several agents, so callers tag their calls with
+# `llm_agent(...)` for the per-agent metrics; untagged calls are reported under the pool's role.
+
+_current_agent = contextvars.ContextVar("llm_agent", default=None)
+
+@contextmanager
+def llm_agent(name: str):
+    """Tags the LLM calls made inside the block (same thread or task) with the calling agent's name."""
+    token = _current_agent.set(name)
+    try:
+        yield
+    finally:
+        _current_agent.reset(token)
+
+
+def _request_model(request: httpx.Request) -> str:
+    try:
+        return json.loads(request.content or b"{}").get("model") or "unknown"
+    except (ValueError, AttributeError):
+        return "unknown"
+
+
+def _record_response(response: httpx.Response, default_agent: str):
+    """
+    Records latency (including any rate-limiter wait) and token usage of one LLM request.
+    Streamed completions are recorded until their headers arrive; the caller accounts for the
+    rest of the stream and its tokens.
+    """
+    started = response.request.extensions.get("metrics_started")
+    if started is None:
+        return
+    agent = _current_agent.get() or default_agent
+    seconds = time.perf_counter() - started
+    model = _request_model(response.request)
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        record_llm_request(agent, model, seconds, streamed=True)
+        return
+    try:
+        usage = response.json().get("usage") or {}
+    except (ValueError, AttributeError):
+        usage = {}
+    record_llm_request(agent, model, seconds, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+
+
+class PooledHTTPClient(httpx.Client):
+    """
+    An httpx.Client that survives deep copies of a config holding it: without this
+    override each copy would open its own connection pool and the keep-alive sockets would never be shared.
+    """
+    def __deepcopy__(self, memo):
+        return self
+
+
+class PooledAsyncHTTPClient(httpx.AsyncClient):
+    """Async counterpart of PooledHTTPClient, used by the non-blocking agent replies."""
+    def __deepcopy__(self, memo):
+        return self
+
+
+class LLMClientPool:
+    """
+    Process-wide registry of keep-alive HTTP connection pools, one per API key.
+    Every agent that talks to Groq with the same key shares a single pool, so a
+    chat turn reuses an already-open TLS connection instead of handshaking again.
+    The async pool serves the agents' `a_*` methods; the sync pool serves blocking callers (benchmarks).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}        # api_key -> PooledHTTPClient
+        self._async_clients = {}  # api_key -> PooledAsyncHTTPClient
+        self._stats = {}          # api_key -> counters
+        self._roles = {}          # api_key -> set of agent roles using the key
+
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        # Never expose the key itself in stats, only a short fingerprint.
+        return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+    @staticmethod
+    def _limits() -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY,
+        )
+
+    @staticmethod
+    def _timeout() -> httpx.Timeout:
+        return httpx.Timeout(settings.LLM_REQUEST_TIMEOUT, connect=10.0)
+
+    def _register(self, api_key: str, role: str) -> dict:
+        # Must be called with the lock held.
+        self._roles.setdefault(api_key, set()).add(role)
+        return self._stats.setdefault(api_key, {"requests": 0, "connections_opened": 0})
+
+    def client_for(self, api_key: str, role: str) -> PooledHTTPClient:
+        """Returns the shared HTTP client for `api_key`, creating its pool on first use."""
+        with self._lock:
+            stats = self._register(api_key, role)
+            client = self._clients.get(api_key)
+            if client is None:
+                transport = httpx.HTTPTransport(limits=self._limits())
+                if settings.LLM_RATE_LIMIT_ENABLED:
+                    transport = RateLimitedTransport(transport, self._key_id(api_key))
+                client = PooledHTTPClient(
+                    transport=transport,
+                    timeout=self._timeout(),
+                    event_hooks=self._event_hooks(self._make_request_hook(stats), self._make_response_hook(role)),
+                )
+                self._clients[api_key] = client
+            return client
+
+    def async_client_for(self, api_key: str, role: str) -> PooledAsyncHTTPClient:
+        """Returns the shared async HTTP client for `api_key`, creating its pool on first use."""
+        with self._lock:
+            stats = self._register(api_key, role)
+            client = self._async_clients.get(api_key)
+            if client is None:
+                transport = httpx.AsyncHTTPTransport(limits=self._limits())
+                if settings.LLM_RATE_LIMIT_ENABLED:
+                    transport = AsyncRateLimitedTransport(transport, self._key_id(api_key))
+                client = PooledAsyncHTTPClient(
+                    transport=transport,
+                    timeout=self._timeout(),
+                    event_hooks=self._event_hooks(
+                        self._make_async_request_hook(stats), self._make_async_response_hook(role)
+                    ),
+                )
+                self._async_clients[api_key] = client
+            return client
+
+    def _make_request_hook(self, stats: dict):
+        def on_connection_event(event_name, info):
+            # httpcore reports a TCP connect only when the pool had no reusable connection.
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    stats["connections_opened"] += 1
+
+        def on_request(request: httpx.Request):
+            with self._lock:
+                stats["requests"] += 1
+            request.extensions["trace"] = on_connection_event
+            request.extensions["metrics_started"] = time.perf_counter()
+
+        return on_request
+
+    @staticmethod
+    def _make_response_hook(role: str):
+        def on_response(response: httpx.Response):
+            if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                response.read()
+            _record_response(response, role)
+
+        return on_response
+
+    def _make_async_request_hook(self, stats: dict):
+        async def on_connection_event(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    stats["connections_opened"] += 1
+
+        async def on_request(request: httpx.Request):
+            with self._lock:
+                stats["requests"] += 1
+            request.extensions["trace"] = on_connection_event
+            request.extensions["metrics_started"] = time.perf_counter()
+
+        return on_request
+
+    @staticmethod
+    def _make_async_response_hook(role: str):
+        async def on_response(response: httpx.Response):
+            if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                await response.aread()
+            _record_response(response, role)
+
+        return on_response
+
+    @staticmethod
+    def _event_hooks(on_request, on_response) -> dict:
+        hooks = {"request": [on_request]}
+        if settings.METRICS_ENABLED:
+            hooks["response"] = [on_response]
+        return hooks
+
+    @staticmethod
+    def _pool_occupancy(client):
+        # httpx does not expose its pool publicly; report None if the internals move.
+        if client is None:
+            return 0, 0
+        transport = getattr(client._transport, "wrapped", client._transport)  # unwrap the rate limiter
+        connections = getattr(getattr(transport, "_pool", None), "connections", None)
+        if connections is None:
+            return None, None
+        return len(connections), sum(1 for c in connections if c.is_idle())
+
+    def stats(self) -> list:
+        """Returns per-key pool statistics: request count, new connections and pool occupancy."""
+        with self._lock:
+            result = []
+            for api_key, stats in self._stats.items():
+                open_sync, idle_sync = self._pool_occupancy(self._clients.get(api_key))
+                open_async, idle_async = self._pool_occupancy(self._async_clients.get(api_key))
+                known = None not in (open_sync, open_async)
+                requests = stats["requests"]
+                opened = stats["connections_opened"]
+                result.append({
+                    "key_id": self._key_id(api_key),
+                    "roles": sorted(self._roles.get(api_key, ())),
+                    "requests": requests,
+                    "connections_opened": opened,
+                    "reused_requests": max(requests - opened, 0),
+                    "open_connections": open_sync + open_async if known else None,
+                    "idle_connections": idle_sync + idle_async if known else None,
+                })
+            return result
+
+    async def aclose(self):
+        """Closes every pool; called when the application shuts down."""
+        with self._lock:
+            clients = list(self._clients.values())
+            async_clients = list(self._async_clients.values())
+            self._clients.clear()
+            self._async_clients.clear()
+        for client in clients:
+            client.close()
+        for client in async_clients:
+            await client.aclose()
+
+
+client_pool = LLMClientPool()
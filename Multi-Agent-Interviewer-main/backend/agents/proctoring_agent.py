@@ -1,38 +1,296 @@
+import asyncio
+import multiprocessing
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import cv2
 import numpy as np
-import time
+from core.config import settings
+from core.latency import latency_tracker
+from core.metrics import metrics, timed
+from agents.detector_registry import detector_registry, warm_detectors, detector_stats
+from agents.face_detectors import get_backend
+from agents.frame_protocol import Frame, legacy_frame
+
+# --- FRAME ANALYSIS (CPU-bound, runs in the process pool) ---
+# Everything in this section is a pure function of its arguments so it can run in a worker
+# process; per-session state (counters, tracked face) stays with the ProctoringAgent.
+
+def _decode(frame_bytes, encoding, shape):
+    """Returns (gray, color) for a frame; color is None unless the client sent a color image."""
+    nparr = np.frombuffer(frame_bytes, np.uint8)
+    if encoding == "luma":
+        height, width = shape
+        return nparr.reshape(height, width), None
+    if encoding == "gray_jpeg":
+        # Compact-protocol frames are already grayscale: decode straight to one channel.
+        return cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE), None
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None:
+        return None, None
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), frame
+
+def analyze_frame(frame_bytes, tracked_face=None, frames_since_full_search=0, fast_mode=True, backend=None,
+                  encoding="color", shape=None):
+    """
+    Decodes a frame and runs face/eye detection on it with the given (default: configured) backend.
+    `encoding` is "color" (legacy encoded image), "gray_jpeg" or "luma" (raw plane of `shape` = (h, w)).
+    Returns None for corrupted or empty frames, otherwise a dict with the detected faces,
+    whether eyes were found in the single face (None unless exactly one face), the frame width
+    and the updated ROI-tracking state.
+    """
+    detector = get_backend(backend)
+
+    # Decode the image bytes from the frontend into an OpenCV image
+    gray, frame = _decode(frame_bytes, encoding, shape)
+    if gray is None or gray.size == 0:
+        return None
+
+    faces, eyes_found, tracked_face, frames_since_full_search = detector.detect(
+        gray, frame, tracked_face, frames_since_full_search, fast_mode
+    )
+
+    return {
+        "faces": faces,
+        "eyes_found": eyes_found,
+        "frame_width": gray.shape[1],
+        "tracked_face": tracked_face,
+        "frames_since_full_search": frames_since_full_search,
+    }
+
+
+# --- PROCESS POOL ---
+
+_frame_pool = None
+_frame_pool_workers = 0
+# Used when the process pool is disabled. A single thread, because the shared detection
+# models are not safe to call from several threads at once.
+_analysis_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="proctoring")
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _default_pool_workers() -> int:
+    # Every server worker process starts its own pool; together they should fill the cores, not
+    # each take all of them.
+    return max(1, _available_cores() // max(1, settings.WEB_CONCURRENCY))
+
+def get_frame_pool():
+    """
+    Returns this worker process's pool for frame analysis, by default sized to its share of the
+    available cores (cores // WEB_CONCURRENCY). PROCTORING_POOL_WORKERS overrides the size;
+    0 disables the pool (analysis then runs on a worker thread).
+    """
+    global _frame_pool, _frame_pool_workers
+    if _frame_pool is None and settings.PROCTORING_POOL_WORKERS != 0:
+        _frame_pool_workers = settings.PROCTORING_POOL_WORKERS or _default_pool_workers()
+        # "spawn" avoids forking a process that already runs the event loop and other threads.
+        # Each worker loads the detection models as it starts, before it takes any frame.
+        _frame_pool = ProcessPoolExecutor(
+            max_workers=_frame_pool_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_detectors,
+            initargs=(get_backend().models,),
+        )
+    return _frame_pool
+
+def warm_proctoring():
+    """
+    Called at application startup: starts every pool worker (each loads the models in its
+    initializer) or, without a pool, loads the models on the analysis thread.
+    Returns immediately; warming continues in the background.
+    """
+    pool = get_frame_pool()
+    if pool is not None:
+        return [pool.submit(detector_stats) for _ in range(_frame_pool_workers)]
+    return [_analysis_thread.submit(warm_detectors, get_backend().models)]
+
+def shutdown_frame_pool():
+    global _frame_pool
+    if _frame_pool is not None:
+        _frame_pool.shutdown(wait=False, cancel_futures=True)
+        _frame_pool = None
+
+
+class LatestFrameQueue:
+    """
+    Bounded frame buffer for one proctoring session where the newest frame wins.
+    When analysis falls behind, the oldest buffered frames are dropped instead of building a backlog.
+    """
+    def __init__(self, maxsize: int = 1):
+        self._frames = []
+        self._maxsize = max(1, maxsize)
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def put(self, frame_bytes) -> int:
+        """Buffers a frame and returns how many stale frames were dropped to make room."""
+        self._frames.append(frame_bytes)
+        dropped = max(0, len(self._frames) - self._maxsize)
+        if dropped:
+            del self._frames[:dropped]
+        self._ready.set()
+        return dropped
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
+
+    async def get(self):
+        """Waits for the next frame; returns None once the queue is closed and drained."""
+        while not self._frames:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.pop(0)
+
+
+# Anomaly messages sent to the candidate, and the event type each one is logged as.
+ANOMALY_TYPES = {
+    "Multiple faces detected in the frame.": "multiple_faces",
+    "Candidate not visible in the frame.": "no_face",
+    "Candidate may be looking away from the screen.": "looking_away",
+    "Sustained irregular head position detected.": "head_position",
+}
+
+# Active sessions by interview id, for the per-session stats endpoint.
+active_sessions = weakref.WeakValueDictionary()
+
+frames_total = metrics.counter("proctoring_frames_total", "Proctoring frames received, analyzed and dropped.", ["state"])
+metrics.register_collector(lambda: [
+    ("proctoring_sessions_active", "gauge", "Proctoring sessions alive in this worker.", {}, len(active_sessions)),
+])
+
 
 class ProctoringAgent:
+    """
+    Per-session proctoring state. Models live in the detector registry, so a session is just this
+    compact record of counters; __slots__ keeps it small during interview peaks.
+    """
+    __slots__ = (
+        "session_id", "no_face_counter", "no_eyes_counter", "head_edge_counter",
+        "fast_mode", "tracked_face", "frames_since_full_search",
+        "frames_received", "frames_analyzed", "frames_dropped",
+        "last_analysis_ms", "max_analysis_ms", "_total_analysis_ms", "setup_ms",
+        "last_face_count", "last_frame_width",
+        "frame_format", "bytes_received", "last_seq",
+        "__weakref__",
+    )
+
+    # --- STATE TRACKING FOR LENIENCY ---
+    # Instead of instant warnings, we use counters. A warning is only triggered
+    # if a counter exceeds its threshold. Each check happens every ~2 seconds.
+
+    # Thresholds (number of consecutive failed checks before a warning)
+    NO_FACE_THRESHOLD = 4  # Approx. 8 seconds without a face
+    NO_EYES_THRESHOLD = 3  # Approx. 6 seconds of looking away
+    HEAD_EDGE_THRESHOLD = 4 # Approx. 8 seconds of sustained awkward head position
+
     def __init__(self, session_id):
+        started = time.perf_counter()
         self.session_id = session_id
-        # Load pre-trained Haar Cascade models for face and eye detection
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
-        
-        # --- STATE TRACKING FOR LENIENCY ---
-        # Instead of instant warnings, we use counters. A warning is only triggered
-        # if a counter exceeds its threshold. Each check happens every ~2 seconds.
-        
-        # Thresholds (number of consecutive failed checks before a warning)
-        self.NO_FACE_THRESHOLD = 4  # Approx. 8 seconds without a face
-        self.NO_EYES_THRESHOLD = 3  # Approx. 6 seconds of looking away
-        self.HEAD_EDGE_THRESHOLD = 4 # Approx. 8 seconds of sustained awkward head position
 
         # Current counters
         self.no_face_counter = 0
         self.no_eyes_counter = 0
         self.head_edge_counter = 0
 
-    async def process_frame(self, frame_bytes):
-        # Decode the image bytes from the frontend into an OpenCV image
-        nparr = np.frombuffer(frame_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if frame is None:
+        # --- FAST DETECTION STATE ---
+        # In fast mode faces are detected on a downscaled frame, and between periodic full-frame
+        # searches only a padded window around the last face is searched.
+        self.fast_mode = settings.PROCTORING_FAST_MODE
+        self.tracked_face = None # (x, y, w, h) in full-resolution coordinates
+        self.frames_since_full_search = 0
+
+        # --- SESSION STATS ---
+        self.frames_received = 0
+        self.frames_analyzed = 0
+        self.frames_dropped = 0
+        self.last_analysis_ms = None
+        self.max_analysis_ms = 0.0
+        self._total_analysis_ms = 0.0
+        self.last_face_count = None
+        self.last_frame_width = None
+        self.frame_format = "legacy"
+        self.bytes_received = 0
+        self.last_seq = None
+        active_sessions[session_id] = self
+
+        setup = time.perf_counter() - started
+        self.setup_ms = round(setup * 1000, 3)
+        detector_registry.record_session_setup(setup)
+        latency_tracker.record("proctoring_session_setup", setup)
+
+    def record_received(self, dropped: int = 0, size: int = 0):
+        self.frames_received += 1
+        self.frames_dropped += dropped
+        self.bytes_received += size
+        frames_total.inc(("received",))
+        if dropped:
+            frames_total.inc(("dropped",), dropped)
+
+    def last_frame_stats(self) -> dict:
+        """Stats of the most recently analyzed frame, stored alongside each proctoring event."""
+        return {
+            "face_count": self.last_face_count,
+            "frame_width": self.last_frame_width,
+            "analysis_ms": self.last_analysis_ms,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "frames_received": self.frames_received,
+            "frames_analyzed": self.frames_analyzed,
+            "frames_dropped": self.frames_dropped,
+            "last_analysis_ms": self.last_analysis_ms,
+            "avg_analysis_ms": round(self._total_analysis_ms / self.frames_analyzed, 1) if self.frames_analyzed else None,
+            "max_analysis_ms": self.max_analysis_ms,
+            "setup_ms": self.setup_ms,
+            "frame_format": self.frame_format,
+            "bytes_received": self.bytes_received,
+            "last_seq": self.last_seq,
+        }
+
+    @timed()
+    async def process_frame(self, frame):
+        """
+        Analyzes a frame off the event loop (in the process pool) and applies the anomaly rules.
+        `frame` is a protocol Frame, or the raw bytes of a legacy color image.
+        """
+        if not isinstance(frame, Frame):
+            frame = legacy_frame(frame)
+        started = time.perf_counter()
+        args = (frame.data, self.tracked_face, self.frames_since_full_search, self.fast_mode,
+                None, frame.encoding, (frame.height, frame.width))
+        if frame.seq is not None:
+            self.last_seq = frame.seq
+        pool = get_frame_pool()
+        analysis = await asyncio.get_running_loop().run_in_executor(pool or _analysis_thread, analyze_frame, *args)
+
+        elapsed = time.perf_counter() - started
+        latency_tracker.record("proctoring_analysis", elapsed)
+        self.frames_analyzed += 1
+        frames_total.inc(("analyzed",))
+        self.last_analysis_ms = round(elapsed * 1000, 1)
+        self.max_analysis_ms = max(self.max_analysis_ms, self.last_analysis_ms)
+        self._total_analysis_ms += elapsed * 1000
+
+        if analysis is None:
             return "" # Ignore corrupted or empty frames
+        self.tracked_face = analysis["tracked_face"]
+        self.frames_since_full_search = analysis["frames_since_full_search"]
+        self.last_face_count = len(analysis["faces"])
+        self.last_frame_width = analysis["frame_width"]
+        return self._evaluate(analysis)
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-        
+    def _evaluate(self, analysis):
+        faces = analysis["faces"]
         anomaly_detected = ""
 
         # --- ANOMALY DETECTION LOGIC ---
@@ -47,23 +305,21 @@ class ProctoringAgent:
             # Reset other counters since we can't check them without a face
             self.no_eyes_counter = 0
             self.head_edge_counter = 0
-            
+
             # Only trigger a warning if the face has been missing for a sustained period
             if self.no_face_counter >= self.NO_FACE_THRESHOLD:
                 anomaly_detected = "Candidate not visible in the frame."
                 self.no_face_counter = 0 # Reset counter after triggering
-        
+
         # 3. If one face is detected (Normal case, check for subtle issues)
         else:
             # If a face is found, reset the no-face counter
             self.no_face_counter = 0
-            
+
             x, y, w, h = faces[0]
-            face_roi_gray = gray[y:y+h, x:x+w] # Region of Interest for the face
-            
+
             # 3a. Eye Detection (Gaze Aversion Check)
-            eyes = self.eye_cascade.detectMultiScale(face_roi_gray)
-            if len(eyes) == 0:
+            if not analysis["eyes_found"]:
                 self.no_eyes_counter += 1
                 # Only warn if eyes are not visible for a sustained period
                 if self.no_eyes_counter >= self.NO_EYES_THRESHOLD:
@@ -74,7 +330,7 @@ class ProctoringAgent:
                 self.no_eyes_counter = 0
 
             # 3b. Head Position Check
-            frame_width = frame.shape[1]
+            frame_width = analysis["frame_width"]
             face_center_x = x + w / 2
             # Check if the face is persistently at the very edge of the frame
             if face_center_x < frame_width * 0.20 or face_center_x > frame_width * 0.80:
@@ -85,5 +341,5 @@ class ProctoringAgent:
             else:
                 # If head is reasonably centered, reset the counter
                 self.head_edge_counter = 0
-                 
-        return anomaly_detected
\ No newline at end of file
+
+        return anomaly_detected
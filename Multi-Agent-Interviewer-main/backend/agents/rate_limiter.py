@@ -0,0 +1,377 @@
+# agents/rate_limiter.py
+import asyncio
+import bisect
+import contextvars
+import itertools
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+import httpx
+import redis
+from core.config import settings
+from core.caching import redis_client, async_redis_client
+from core.latency import latency_tracker
+from agents.context_compaction import estimate_tokens
+
+# --- PRIORITIES ---
+# Lower rank is served first when a key's buckets are empty. Callers tag their LLM calls with
+# `llm_priority(...)`; anything untagged is treated as a live interview turn.
+
+PRIORITIES = {"interview": 0, "report": 1, "simulation": 2}
+_current_priority = contextvars.ContextVar("llm_priority", default="interview")
+
+@contextmanager
+def llm_priority(name: str):
+    """
+    Tags the LLM calls made inside the block (same thread or task) with a queueing priority.
+    Nested blocks keep the less urgent priority, so e.g. reports generated for batch
+    simulations stay at simulation priority.
+    """
+    current = _current_priority.get()
+    if PRIORITIES.get(current, 0) > PRIORITIES.get(name, 0):
+        name = current
+    token = _current_priority.set(name)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+# --- TOKEN BUCKETS ---
+# Two buckets per API key: requests/minute and tokens/minute. With Redis they live in two hashes
+# updated atomically by a Lua script using the Redis clock, so every uvicorn worker draws from
+# the same budget; without Redis (or while it fails) each process keeps its own.
+
+_TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local function level(key, capacity, rate)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local value = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    return math.min(capacity, value + math.max(0, now - ts) * rate)
+end
+local req_capacity, req_rate = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tok_capacity, tok_rate = tonumber(ARGV[3]), tonumber(ARGV[4])
+local need, mode = tonumber(ARGV[5]), ARGV[6]
+local req = level(KEYS[1], req_capacity, req_rate)
+local tok = level(KEYS[2], tok_capacity, tok_rate)
+local wait = 0
+if mode == 'take' then
+    if req < 1 then wait = (1 - req) / req_rate end
+    if tok < need then wait = math.max(wait, (need - tok) / tok_rate) end
+    if wait == 0 then req = req - 1; tok = tok - need end
+elseif mode == 'adjust' then
+    tok = math.min(tok_capacity, tok + need)
+elseif mode == 'block' then
+    req = math.min(req, 1 - need * req_rate)
+end
+redis.call('HSET', KEYS[1], 'level', req, 'ts', now)
+redis.call('HSET', KEYS[2], 'level', tok, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 300)
+redis.call('EXPIRE', KEYS[2], 300)
+return tostring(wait)
+"""
+
+
+class TokenBuckets:
+    """
+    Request and token buckets per key. Every operation returns the seconds to wait (0 = granted):
+    - take(n): one request and n tokens, or nothing if either bucket is short;
+    - adjust(n): give back (or, if negative, charge) n tokens once actual usage is known;
+    - block(s): empty the request bucket for s seconds, e.g. after a 429 with Retry-After.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = {}  # key_id -> [requests, tokens, monotonic timestamp]
+        self._redis_error_logged = 0.0  # monotonic time of the last logged Redis failure
+        # Registering a script does no I/O; the scripts are used whenever Redis is reachable.
+        self._script = redis_client.register_script(_TAKE_SCRIPT)
+        self._async_script = async_redis_client.register_script(_TAKE_SCRIPT)
+
+    @property
+    def backend(self) -> str:
+        return "redis" if redis_client else "local"
+
+    @staticmethod
+    def _limits():
+        rpm, tpm = settings.LLM_RATE_LIMIT_RPM, settings.LLM_RATE_LIMIT_TPM
+        return rpm, rpm / 60, tpm, tpm / 60
+
+    def _args(self, tokens, mode):
+        return [*self._limits(), tokens, mode]
+
+    @staticmethod
+    def _keys(key_id):
+        return [f"ratelimit:{key_id}:requests", f"ratelimit:{key_id}:tokens"]
+
+    def _run_local(self, key_id, tokens, mode) -> float:
+        req_capacity, req_rate, tok_capacity, tok_rate = self._limits()
+        with self._lock:
+            now = time.monotonic()
+            req, tok, ts = self._local.get(key_id, (req_capacity, tok_capacity, now))
+            req = min(req_capacity, req + (now - ts) * req_rate)
+            tok = min(tok_capacity, tok + (now - ts) * tok_rate)
+            wait = 0.0
+            if mode == "take":
+                if req < 1:
+                    wait = (1 - req) / req_rate
+                if tok < tokens:
+                    wait = max(wait, (tokens - tok) / tok_rate)
+                if wait == 0:
+                    req, tok = req - 1, tok - tokens
+            elif mode == "adjust":
+                tok = min(tok_capacity, tok + tokens)
+            elif mode == "block":
+                req = min(req, 1 - tokens * req_rate)
+            self._local[key_id] = (req, tok, now)
+            return wait
+
+    def _redis_failed(self, error):
+        # Logged at most once a minute: during an outage every LLM call would log otherwise.
+        now = time.monotonic()
+        if now - self._redis_error_logged >= 60:
+            self._redis_error_logged = now
+            print(f"Rate limiter: Redis failed, using per-process buckets: {error}")
+
+    def run(self, key_id: str, tokens: float, mode: str) -> float:
+        if redis_client:
+            try:
+                return float(self._script(keys=self._keys(key_id), args=self._args(tokens, mode)))
+            except redis.exceptions.RedisError as e:
+                self._redis_failed(e)
+        return self._run_local(key_id, tokens, mode)
+
+    async def a_run(self, key_id: str, tokens: float, mode: str) -> float:
+        if async_redis_client:
+            try:
+                return float(await self._async_script(keys=self._keys(key_id), args=self._args(tokens, mode)))
+            except redis.exceptions.RedisError as e:
+                self._redis_failed(e)
+        return self._run_local(key_id, tokens, mode)
+
+
+# --- PRIORITY QUEUE ---
+
+class _Ticket:
+    """A queued request. Async tickets are woken through their event loop, sync ones directly."""
+    __slots__ = ("rank", "seq", "priority", "loop", "event")
+
+    def __init__(self, priority: str, seq: int, loop=None):
+        self.priority = priority
+        self.rank = PRIORITIES.get(priority, len(PRIORITIES))
+        self.seq = seq
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def __lt__(self, other):
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+    def wake(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+
+class RateLimiter:
+    """
+    Coordinates all agent LLM calls per API key.
+    Requests for a key wait in one priority queue (interview turns, then reports, then
+    simulations; FIFO within a priority). Only the head of the queue draws from the key's
+    buckets, so a burst of simulations can never take budget ahead of a waiting interview turn.
+    Queue order is per worker process; the buckets are shared through Redis.
+    """
+    def __init__(self):
+        self.buckets = TokenBuckets()
+        self._lock = threading.Lock()
+        self._queues = {}  # key_id -> sorted list of _Ticket
+        self._seq = itertools.count()
+        self._stats = {}  # key_id -> counters
+
+    def _counters(self, key_id):
+        return self._stats.setdefault(key_id, {"granted": 0, "waited": 0, "retried_429": 0, "failed_429": 0})
+
+    def count(self, key_id: str, name: str):
+        with self._lock:
+            self._counters(key_id)[name] += 1
+
+    def _enqueue(self, key_id, ticket):
+        with self._lock:
+            bisect.insort(self._queues.setdefault(key_id, []), ticket)
+
+    def _is_head(self, key_id, ticket) -> bool:
+        with self._lock:
+            return self._queues[key_id][0] is ticket
+
+    def _dequeue(self, key_id, ticket, waited: float, granted: bool):
+        with self._lock:
+            queue = self._queues[key_id]
+            queue.remove(ticket)
+            if granted:
+                counters = self._counters(key_id)
+                counters["granted"] += 1
+                if waited > 0.001:
+                    counters["waited"] += 1
+            head = queue[0] if queue else None
+        if granted:
+            latency_tracker.record(f"llm_queue_wait_{ticket.priority}", waited)
+        if head is not None:
+            head.wake()
+
+    def acquire(self, key_id: str, tokens: int):
+        """Blocks the calling thread until the request may be sent."""
+        ticket = _Ticket(_current_priority.get(), next(self._seq))
+        started = time.perf_counter()
+        self._enqueue(key_id, ticket)
+        granted = False
+        try:
+            while True:
+                ticket.event.clear()
+                if self._is_head(key_id, ticket):
+                    wait = self.buckets.run(key_id, tokens, "take")
+                    if wait <= 0:
+                        granted = True
+                        return
+                    ticket.event.wait(wait)
+                else:
+                    ticket.event.wait()
+        finally:
+            self._dequeue(key_id, ticket, time.perf_counter() - started, granted)
+
+    async def a_acquire(self, key_id: str, tokens: int):
+        """Waits (without blocking the event loop) until the request may be sent."""
+        ticket = _Ticket(_current_priority.get(), next(self._seq), asyncio.get_running_loop())
+        started = time.perf_counter()
+        self._enqueue(key_id, ticket)
+        granted = False
+        try:
+            while True:
+                ticket.event.clear()
+                if self._is_head(key_id, ticket):
+                    wait = await self.buckets.a_run(key_id, tokens, "take")
+                    if wait <= 0:
+                        granted = True
+                        return
+                    try:
+                        await asyncio.wait_for(ticket.event.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await ticket.event.wait()
+        finally:
+            self._dequeue(key_id, ticket, time.perf_counter() - started, granted)
+
+    def stats(self) -> dict:
+        """Per key: current queue depth by priority, grant/wait/429 counters and queue-wait percentiles."""
+        waits = latency_tracker.snapshot()
+        with self._lock:
+            result = []
+            for key_id, counters in self._stats.items():
+                depth = {name: 0 for name in PRIORITIES}
+                for ticket in self._queues.get(key_id, ()):
+                    depth[ticket.priority] = depth.get(ticket.priority, 0) + 1
+                result.append({"key_id": key_id, "queue_depth": depth, **counters})
+        return {
+            "backend": self.buckets.backend,
+            "limits": {"rpm": settings.LLM_RATE_LIMIT_RPM, "tpm": settings.LLM_RATE_LIMIT_TPM},
+            "keys": result,
+            "queue_wait": {name: waits.get(f"llm_queue_wait_{name}") for name in PRIORITIES},
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+# --- TRANSPORTS ---
+# The limiter sits in the HTTP transport of the pooled clients, so it covers every LLM call:
+# blocking calls on the sync clients as well as the AsyncOpenAI calls.
+
+def _request_info(request: httpx.Request):
+    """Returns (estimated tokens, streaming) for a chat completion request."""
+    try:
+        body = json.loads(request.content or b"{}")
+    except ValueError:
+        return 1, False
+    completion = min(body.get("max_tokens") or settings.LLM_RATE_LIMIT_COMPLETION_ESTIMATE,
+                     settings.LLM_RATE_LIMIT_COMPLETION_ESTIMATE)
+    tokens = estimate_tokens(body.get("messages") or []) + completion
+    # A request larger than the whole bucket could never be granted.
+    return min(tokens, settings.LLM_RATE_LIMIT_TPM), bool(body.get("stream"))
+
+def _actual_tokens(response: httpx.Response):
+    try:
+        return response.json()["usage"]["total_tokens"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+def _backoff(response: httpx.Response, attempt: int) -> float:
+    """Seconds to back off after a 429: Retry-After if given, else exponential; both jittered."""
+    try:
+        retry_after = float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        retry_after = 0.0
+    delay = max(retry_after, settings.LLM_RATE_LIMIT_RETRY_BASE_DELAY * (2 ** attempt))
+    return delay * random.uniform(1.0, 1.25)
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    def __init__(self, wrapped: httpx.BaseTransport, key_id: str):
+        self.wrapped = wrapped
+        self._key_id = key_id
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens, streaming = _request_info(request)
+        for attempt in range(settings.LLM_RATE_LIMIT_MAX_RETRIES + 1):
+            rate_limiter.acquire(self._key_id, tokens)
+            response = self.wrapped.handle_request(request)
+            if response.status_code != 429:
+                break
+            if attempt == settings.LLM_RATE_LIMIT_MAX_RETRIES:
+                rate_limiter.count(self._key_id, "failed_429")
+                return response
+            rate_limiter.count(self._key_id, "retried_429")
+            delay = _backoff(response, attempt)
+            response.close()
+            rate_limiter.buckets.run(self._key_id, delay, "block")
+        if response.status_code == 200 and not streaming:
+            response.read()
+            actual = _actual_tokens(response)
+            if actual is not None:
+                rate_limiter.buckets.run(self._key_id, tokens - actual, "adjust")
+        return response
+
+    def close(self):
+        self.wrapped.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, wrapped: httpx.AsyncBaseTransport, key_id: str):
+        self.wrapped = wrapped
+        self._key_id = key_id
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tokens, streaming = _request_info(request)
+        for attempt in range(settings.LLM_RATE_LIMIT_MAX_RETRIES + 1):
+            await rate_limiter.a_acquire(self._key_id, tokens)
+            response = await self.wrapped.handle_async_request(request)
+            if response.status_code != 429:
+                break
+            if attempt == settings.LLM_RATE_LIMIT_MAX_RETRIES:
+                rate_limiter.count(self._key_id, "failed_429")
+                return response
+            rate_limiter.count(self._key_id, "retried_429")
+            delay = _backoff(response, attempt)
+            await response.aclose()
+            await rate_limiter.buckets.a_run(self._key_id, delay, "block")
+        if response.status_code == 200 and not streaming:
+            await response.aread()
+            actual = _actual_tokens(response)
+            if actual is not None:
+                await rate_limiter.buckets.a_run(self._key_id, tokens - actual, "adjust")
+        return response
+
+    async def aclose(self):
+        await self.wrapped.aclose()
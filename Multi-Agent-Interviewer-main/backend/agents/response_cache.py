@@ -0,0 +1,116 @@
+# agents/response_cache.py
+import hashlib
+import json
+import threading
+import redis
+from core.config import settings
+from core.caching import LRUCache, redis_client, async_redis_client
+from core.metrics import metrics, cache_samples
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of LLM completions.
+    The key is a SHA-256 of the model, system prompt, sampling parameters and messages, so a
+    response is reused only for an identical request. Two tiers: an in-process LRU and Redis.
+    Agents sampling above LLM_CACHE_MAX_TEMPERATURE are never cached, since callers of those
+    expect a different answer each time (the interviewer and simulated candidate).
+    Redis errors count as misses (reads) or are skipped (writes): a cache outage must not fail a completion.
+    """
+    def __init__(self):
+        self._local = LRUCache(settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "bypassed": 0}
+
+    @staticmethod
+    def make_key(llm_config: dict, system_message: str, messages: list) -> str:
+        config = llm_config["config_list"][0]
+        payload = json.dumps({
+            "model": config["model"],
+            "system": system_message,
+            "params": {"temperature": llm_config.get("temperature"), "max_tokens": llm_config.get("max_tokens")},
+            "messages": messages,
+        }, sort_keys=True, ensure_ascii=False)
+        return "llm_cache:" + hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def is_cacheable(llm_config: dict) -> bool:
+        return settings.LLM_CACHE_ENABLED and (llm_config.get("temperature") or 0) <= settings.LLM_CACHE_MAX_TEMPERATURE
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def count_bypass(self):
+        self._count("bypassed")
+
+    def get(self, key: str):
+        value = self._local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+        if redis_client:
+            try:
+                value = redis_client.get(key)
+            except redis.exceptions.RedisError as e:
+                print(f"LLM response cache: Redis read failed, treating as a miss: {e}")
+                value = None
+            if value is not None:
+                self._local.set(key, value)
+                self._count("redis_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str):
+        self._local.set(key, value)
+        if redis_client:
+            try:
+                redis_client.set(key, value, ex=settings.LLM_CACHE_TTL)
+            except redis.exceptions.RedisError as e:
+                print(f"LLM response cache: Redis write failed: {e}")
+
+    async def a_get(self, key: str):
+        value = self._local.get(key)
+        if value is not None:
+            self._count("local_hits")
+            return value
+        if async_redis_client:
+            try:
+                value = await async_redis_client.get(key)
+            except redis.exceptions.RedisError as e:
+                print(f"LLM response cache: Redis read failed, treating as a miss: {e}")
+                value = None
+            if value is not None:
+                self._local.set(key, value)
+                self._count("redis_hits")
+                return value
+        self._count("misses")
+        return None
+
+    async def a_set(self, key: str, value: str):
+        self._local.set(key, value)
+        if async_redis_client:
+            try:
+                await async_redis_client.set(key, value, ex=settings.LLM_CACHE_TTL)
+            except redis.exceptions.RedisError as e:
+                print(f"LLM response cache: Redis write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["local_hits"] + stats["redis_hits"]) / lookups, 3) if lookups else None
+        stats["local_entries"] = len(self._local)
+        return stats
+
+
+response_cache = LLMResponseCache()
+
+
+def _response_cache_metrics() -> list:
+    stats = response_cache.stats()
+    return cache_samples("llm_response", stats["local_hits"] + stats["redis_hits"], stats["misses"])
+
+
+metrics.register_collector(_response_cache_metrics)
@@ -1,16 +1,30 @@
 import json
 import asyncio
-import random
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException
+import time
+from datetime import datetime
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from core.database import get_db
-from core.caching import redis_client
+from core.database import get_db, get_async_db, AsyncSessionLocal
+from core.config import settings
+from core.latency import latency_tracker
+from core.metrics import track_websocket
+from core.caching import transcript_cache, report_cache, summary_cache, read_cache_stats
 from services import interview_service
-from agents.proctoring_agent import ProctoringAgent
+from services.jobs import job_queue, enqueue_report
+from services.proctoring_events import proctoring_event_log
+from services import simulation_batch
+from services.export import TableExport
+# agents.proctoring_agent and agents.detector_registry pull in OpenCV; the proctoring handlers
+# import them on first use (the app lifespan warms them in the background).
+from agents import frame_protocol
 from models import schemas, tables
-from agents.interview_autogen import AgentOrchestrator
+from agents.interview_autogen import get_orchestrator, get_pool_stats, get_response_cache_stats, get_rate_limit_stats, get_hedge_stats
 
 # Initialize the FastAPI router
 router = APIRouter()
@@ -18,25 +32,70 @@ router = APIRouter()
 # --- HTTP Routes for Interview Flow, Data Retrieval, and Agent Management ---
 
 @router.post("/interview/start", response_model=schemas.InterviewStartResponse)
-def start_interview(request: schemas.InterviewStartRequest, db: Session = Depends(get_db)):
+async def start_interview(request: schemas.InterviewStartRequest, db: AsyncSession = Depends(get_async_db)):
     """Starts a new interview session and returns the first AI message."""
-    interview_id, first_message = interview_service.start_new_interview(
-        db=db, candidate_name=request.candidate_name
+    interview_id, first_message = await interview_service.a_start_new_interview(
+        db=db, candidate_name=request.candidate_name, topic=request.topic
     )
     return {"interviewId": interview_id, "message": first_message}
 
 
+async def _require_interview(db: AsyncSession, interview_id: int):
+    if await db.get(tables.Interview, interview_id) is None:
+        raise HTTPException(status_code=404, detail="Interview not found.")
+
+
 @router.post("/interview/{interview_id}/chat", response_model=schemas.ChatMessageResponse)
-def chat(interview_id: int, request: schemas.ChatMessageRequest, db: Session = Depends(get_db)):
+async def chat(interview_id: int, request: schemas.ChatMessageRequest, db: AsyncSession = Depends(get_async_db)):
     """Handles a single turn in the conversation and triggers report generation on completion."""
-    ai_response, is_terminated = interview_service.process_and_save_message(
+    await _require_interview(db, interview_id)
+    ai_response, is_terminated, context_stats = await interview_service.a_process_and_save_message(
         db=db, interview_id=interview_id, user_message=request.message
     )
+    report_job_id = None
     if is_terminated:
-        print(f"Interview {interview_id} concluded. Generating report in the background...")
-        # In a production app, this would be a background task (e.g., using Celery)
-        interview_service.create_and_save_report(db, interview_id)
-    return {"message": ai_response, "isTerminated": is_terminated}
+        # Report generation runs on the job queue so the candidate's last turn returns immediately.
+        print(f"Interview {interview_id} concluded. Queuing report generation...")
+        report_job_id = (await enqueue_report(interview_id)).id
+    return {
+        "message": ai_response,
+        "isTerminated": is_terminated,
+        "reportJobId": report_job_id,
+        "promptTokensSaved": context_stats["prompt_tokens_saved"],
+    }
+
+
+@router.post("/interview/{interview_id}/chat/stream")
+async def chat_stream(interview_id: int, request: schemas.ChatMessageRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Streaming version of /chat using Server-Sent Events.
+    Emits `token` events as the interviewer reply is generated, then a single `done` event
+    with the full message, `isTerminated` and the time-to-first-token in `ttftMs`.
+    The candidate's message is saved before generation starts; an unknown interview is a 404.
+    """
+    # Checked before the response starts: once streaming, the status code can't change.
+    await _require_interview(db, interview_id)
+    state = {"terminated": False}
+
+    async def event_stream():
+        # The session lives inside the generator because the response outlives the request handler.
+        async with AsyncSessionLocal() as db:
+            async for event in interview_service.a_stream_and_save_message(db, interview_id, request.message):
+                if event["type"] == "done":
+                    state["terminated"] = event["isTerminated"]
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    async def generate_report_if_terminated():
+        if state["terminated"]:
+            print(f"Interview {interview_id} concluded. Queuing report generation...")
+            await enqueue_report(interview_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(generate_report_if_terminated),
+    )
 
 
 @router.get("/interviews", response_model=List[schemas.Interview])
@@ -46,50 +105,247 @@ def get_all_interviews(db: Session = Depends(get_db)):
     return interviews
 
 
+@router.get("/interviews/summary", response_model=schemas.InterviewSummaryPage)
+async def get_interview_summaries(
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = Query(None, description="Keyset cursor: only interviews with a smaller id."),
+    status: Optional[str] = None,
+    name: Optional[str] = Query(None, description="Case-insensitive substring of the candidate name."),
+):
+    """
+    Lightweight, keyset-paginated interview list for the admin dashboard, newest first.
+    Returns one row per interview (no messages or report bodies) from a single query;
+    full transcripts stay behind /interview/{id}/transcript. Pages are served from the read cache
+    and cleared when interviews are created, finish or get a report.
+    """
+    key = json.dumps([limit, before_id, status, name])
+    return await summary_cache.get_or_load(key, lambda: _load_summary_page(limit, before_id, status, name))
+
+
+async def _load_summary_page(limit: int, before_id: Optional[int], status: Optional[str], name: Optional[str]):
+    # Correlated count over the indexed messages.interview_id, evaluated only for the rows on this page.
+    message_count = (
+        select(func.count(tables.Message.id))
+        .where(tables.Message.interview_id == tables.Interview.id)
+        .correlate(tables.Interview)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            tables.Interview.id,
+            tables.Interview.candidate_name,
+            tables.Interview.status,
+            tables.Interview.warnings,
+            tables.Report.score,
+            message_count.label("message_count"),
+        )
+        .outerjoin(tables.Report, tables.Report.interview_id == tables.Interview.id)
+        .order_by(tables.Interview.id.desc())
+        .limit(limit + 1)
+    )
+    if before_id is not None:
+        query = query.where(tables.Interview.id < before_id)
+    if status:
+        query = query.where(tables.Interview.status == status)
+    if name:
+        query = query.where(tables.Interview.candidate_name.ilike(f"%{name}%"))
+
+    # Read-cache loader: its own session, because concurrent requests for the page share this load.
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        schemas.InterviewSummary(
+            id=row.id,
+            candidate_name=row.candidate_name or "",
+            status=row.status or "started",
+            warnings=row.warnings or 0,
+            score=row.score,
+            message_count=row.message_count,
+        ).model_dump()
+        for row in rows
+    ]
+    return {"items": items, "next_before_id": rows[-1].id if has_more else None}
+
+
+# --- CONDITIONAL GETS ---
+# Transcript and report entries in the read cache carry an ETag derived from the rows themselves,
+# so every worker computes the same one. Messages and reports have no timestamps of their own, so
+# there is no Last-Modified (and If-Modified-Since is ignored): a load time would differ per worker
+# and, at one-second resolution, could answer 304 for a message written in the same second.
+
+def _validator_headers(etag: str) -> dict:
+    # Cacheable, but revalidated on every use: browsers send If-None-Match and get a 304 back.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison: a proxy that compressed the response may have weakened the tag.
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
 @router.get("/interview/{interview_id}/transcript", response_model=List[schemas.Message])
-def get_transcript(interview_id: int, db: Session = Depends(get_db)):
-    """Retrieves the full chat history for a single interview."""
-    messages = db.query(tables.Message).filter(tables.Message.interview_id == interview_id).order_by(tables.Message.id).all()
-    if not messages:
+async def get_transcript(
+    interview_id: int,
+    request: Request,
+    after_id: Optional[int] = Query(None, description="Delta fetch: only messages with a larger id."),
+):
+    """
+    Retrieves the chat history of an interview (read cache, invalidated on every turn).
+    - `after_id`: only the messages after the last one the client already has; [] if there are none.
+    - Responses carry an ETag built from the last message id and the message count. A matching
+      If-None-Match gets a 304, checked against the in-process cache entry or, without one, a
+      single aggregate query over the messages.interview_id index.
+    """
+    if request.headers.get("if-none-match"):
+        cached = transcript_cache.peek(interview_id)
+        etag = cached["etag"] if cached else await _transcript_etag(interview_id)
+        if etag and _etag_matches(request, etag):
+            return Response(status_code=304, headers=_validator_headers(etag))
+
+    entry = await transcript_cache.get_or_load(interview_id, lambda: _load_transcript(interview_id))
+    if not entry:
         raise HTTPException(status_code=404, detail="Interview not found or has no messages.")
-    return messages
+    headers = _validator_headers(entry["etag"])
+    if _etag_matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    messages = entry["messages"]
+    if after_id is not None:
+        messages = [message for message in messages if message["id"] > after_id]
+    # Cached entries are already validated dicts, so skip re-validating them against the response model.
+    return JSONResponse(content=messages, headers=headers)
+
+
+def _transcript_version_etag(max_id: int, count: int) -> str:
+    return f'"{max_id}-{count}"'
+
+
+async def _transcript_etag(interview_id: int):
+    async with AsyncSessionLocal() as db:
+        max_id, count = (await db.execute(
+            select(func.max(tables.Message.id), func.count(tables.Message.id))
+            .where(tables.Message.interview_id == interview_id)
+        )).one()
+    return _transcript_version_etag(max_id, count) if count else None
+
+
+async def _load_transcript(interview_id: int):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(tables.Message).filter(tables.Message.interview_id == interview_id).order_by(tables.Message.id)
+        )
+        messages = [schemas.Message.model_validate(message).model_dump() for message in result.scalars().all()]
+    if not messages:
+        return None
+    return {
+        "messages": messages,
+        "etag": _transcript_version_etag(messages[-1]["id"], len(messages)),
+    }
+
+
+@router.get("/interview/{interview_id}/proctoring-events", response_model=List[schemas.ProctoringEvent])
+async def get_proctoring_events(interview_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Returns the committed proctoring events (warnings) of an interview, oldest first."""
+    result = await db.execute(
+        select(tables.ProctoringEvent)
+        .filter(tables.ProctoringEvent.interview_id == interview_id)
+        .order_by(tables.ProctoringEvent.id)
+    )
+    return result.scalars().all()
 
 
 @router.get("/report/{interview_id}", response_model=schemas.Report)
-def get_report(interview_id: int, db: Session = Depends(get_db)):
+async def get_report(interview_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
-    Retrieves the generated report for an interview, using a cache-aside strategy.
-    If the report doesn't exist for a finished interview, it attempts to generate it on-demand.
+    Retrieves the generated report for an interview through the read cache, with an ETag
+    (reports are written once, so the report id identifies its version) and 304 handling.
+    If the report doesn't exist for a finished interview, it queues generation (deduplicated with
+    any job already running) and waits briefly for it; if it is still running a 202 with the job id is returned.
     """
-    if redis_client:
-        cached_report = redis_client.get(f"report:{interview_id}")
-        if cached_report:
-            return json.loads(cached_report)
-
-    report = db.query(tables.Report).filter(tables.Report.interview_id == interview_id).first()
-    if report:
-        if redis_client:
-            # Use Pydantic's .json() method for proper serialization
-            redis_client.set(f"report:{interview_id}", schemas.Report.from_orm(report).json(), ex=3600)
-        return report
+    entry = await report_cache.get_or_load(interview_id, lambda: _load_report(interview_id))
+    if entry:
+        return _report_response(request, entry)
 
     # If report is not found, check if we should generate it
-    interview = db.query(tables.Interview).filter(tables.Interview.id == interview_id).first()
+    interview = await db.get(tables.Interview, interview_id)
     if interview and interview.status in ["completed", "terminated"]:
         print(f"Report for interview {interview_id} not found. Generating on-demand...")
-        new_report = interview_service.create_and_save_report(db, interview_id)
-        if new_report:
-            if redis_client:
-                redis_client.set(f"report:{interview_id}", schemas.Report.from_orm(new_report).json(), ex=3600)
-            return new_report
+        job = await enqueue_report(interview_id)
+        status = await job_queue.wait(job, timeout=settings.REPORT_WAIT_TIMEOUT)
+        if status is None:
+            return JSONResponse(status_code=202, content={"status": "pending", "jobId": job.id})
+        new_entry = await report_cache.get_or_load(interview_id, lambda: _load_report(interview_id))
+        if new_entry:
+            return _report_response(request, new_entry)
 
     raise HTTPException(status_code=404, detail="Report not found or interview is not yet complete.")
 
 
+def _report_response(request: Request, entry: dict):
+    headers = _validator_headers(entry["etag"])
+    if _etag_matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=entry["report"], headers=headers)
+
+
+async def _load_report(interview_id: int):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(tables.Report).filter(tables.Report.interview_id == interview_id))
+        report = result.scalars().first()
+        if not report:
+            return None
+        return {
+            "report": schemas.Report.model_validate(report).model_dump(),
+            "etag": f'"report-{report.id}"',
+        }
+
+
+@router.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: str = Query("ndjson", description="ndjson, or parquet if pyarrow is installed."),
+    compression: str = Query("gzip", description="gzip or none."),
+    after_id: int = Query(0, ge=0, description="Incremental export: only rows with a larger id (the previous watermark)."),
+    since: Optional[datetime] = Query(None, description="Only rows created at or after this time (feedback, agent_suggestions)."),
+):
+    """
+    Streams one table (interviews, messages, reports, feedback, agent_suggestions) as a file, batch by
+    batch with flat memory (see services/export.py). X-Export-Watermark is the highest id included;
+    pass it as `after_id` next time to get only newer rows.
+    """
+    export = TableExport(table, format, compression, after_id, since)
+    try:
+        await export.prepare()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        export.chunks(),
+        media_type=export.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{export.filename}"',
+            "X-Export-Watermark": str(export.watermark),
+        },
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.JobStatus)
+async def get_job_status(job_id: int):
+    """Returns the status of a background job (e.g. report generation)."""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
 @router.post("/feedback", response_model=schemas.FeedbackResponse)
-def submit_feedback(request: schemas.FeedbackCreate, db: Session = Depends(get_db)):
+async def submit_feedback(request: schemas.FeedbackCreate, db: AsyncSession = Depends(get_async_db)):
     """Receives and processes admin feedback to improve the agent."""
-    result = interview_service.save_and_process_feedback(
+    result = await interview_service.a_save_and_process_feedback(
         db=db, interview_id=request.interview_id, feedback_text=request.feedback_text
     )
     return result
@@ -101,81 +357,241 @@ def run_simulation_placeholder():
     return {"message": "Please connect to the WebSocket endpoint /ws/simulation for real-time results."}
 
 
+@router.post("/simulations/batches", response_model=schemas.SimulationBatchStatus, status_code=202)
+async def create_simulation_batch(request: schemas.SimulationBatchRequest):
+    """Creates a persona x round-count batch of simulations and starts running it in the background."""
+    try:
+        personas = simulation_batch.resolve_personas(request.personas, request.custom_personas)
+        batch_id = await simulation_batch.create_batch(
+            personas, request.round_counts, request.repeats, request.concurrency, request.name
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    simulation_batch.start_batch(batch_id)
+    return await simulation_batch.batch_status(batch_id)
+
+
+@router.get("/simulations/batches/{batch_id}", response_model=schemas.SimulationBatchStatus)
+async def get_simulation_batch(batch_id: int):
+    """Reports batch progress, throughput (simulations/min) and average scores per persona and round count."""
+    status = await simulation_batch.batch_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Simulation batch not found.")
+    return status
+
+
+@router.post("/simulations/batches/{batch_id}/resume", response_model=schemas.SimulationBatchStatus, status_code=202)
+async def resume_simulation_batch(batch_id: int):
+    """Re-runs the unfinished simulations and evaluations of an interrupted or partially failed batch."""
+    status = await simulation_batch.batch_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Simulation batch not found.")
+    simulation_batch.start_batch(batch_id)
+    return status
+
+
+@router.get("/system/llm-pools")
+def get_llm_pool_stats():
+    """Reports keep-alive connection pool usage per API key, to confirm connections are reused under load."""
+    return {"pools": get_pool_stats()}
+
+
+@router.get("/system/llm-rate-limits")
+def get_llm_rate_limit_stats():
+    """Reports the LLM rate limiter per API key: queue depth by priority, queue wait percentiles and 429 retries."""
+    return get_rate_limit_stats()
+
+
+@router.get("/system/llm-hedging")
+def get_llm_hedging_stats():
+    """Reports interviewer hedged requests: how often the fallback model was used and won, and the current thresholds."""
+    return get_hedge_stats()
+
+
+@router.get("/system/latency")
+def get_latency_stats():
+    """Reports recent latency percentiles, including chat time-to-first-token (`chat_ttft`)."""
+    return {"latency": latency_tracker.snapshot()}
+
+
+@router.get("/system/read-cache")
+def get_read_cache_stats():
+    """Reports the API read cache per kind: tier-1 and Redis hits, loads, coalesced misses and invalidations."""
+    return {"caches": read_cache_stats()}
+
+
+@router.get("/system/feedback-index")
+def get_feedback_index_stats():
+    """Reports the size of the feedback retrieval index used at interview start."""
+    from services.feedback_index import feedback_index
+    return feedback_index.stats()
+
+
+@router.get("/system/llm-cache")
+def get_llm_cache_stats():
+    """Reports hit/miss counters of the evaluator/feedback LLM response cache."""
+    return {"cache": get_response_cache_stats()}
+
+
+@router.get("/system/proctoring")
+def get_proctoring_stats():
+    """Reports per-session proctoring counters: frames received, analyzed and dropped, and analysis latency."""
+    from agents.detector_registry import detector_registry
+    from agents.proctoring_agent import active_sessions
+    return {
+        "detectors": detector_registry.stats(),
+        "sessions": [session.stats() for session in list(active_sessions.values())],
+        "event_log": proctoring_event_log.stats(),
+    }
+
+
+@router.get("/system/context")
+def get_context_stats():
+    """Reports interviewer context compaction totals: turns compacted and prompt tokens saved."""
+    return {"context": get_orchestrator().context_compactor.stats()}
+
+
 # --- WebSockets for Real-time Communication ---
 
 @router.websocket("/ws/proctoring/{interview_id}")
-async def websocket_proctoring(websocket: WebSocket, interview_id: int, db: Session = Depends(get_db)):
-    """Handles the real-time proctoring connection with the more lenient agent."""
+@track_websocket("proctoring")
+async def websocket_proctoring(websocket: WebSocket, interview_id: int):
+    """
+    Handles the real-time proctoring connection with the more lenient agent.
+    Anomalies are appended to the write-behind event log; no DB session is held while the socket is open.
+    Frames arrive as legacy color images, or in the compact format (see agents/frame_protocol.py)
+    once the client has negotiated it with a hello message.
+    """
+    from agents.proctoring_agent import ProctoringAgent, LatestFrameQueue, ANOMALY_TYPES
     await websocket.accept()
     proctor = ProctoringAgent(session_id=interview_id)
     
-    interview = db.query(tables.Interview).filter(tables.Interview.id == interview_id).first()
-    if not interview:
+    warnings = await proctoring_event_log.warning_count(interview_id)
+    if warnings is None:
         await websocket.close(code=1011, reason="Interview session not found.")
         return
     
-    warnings = interview.warnings
+    # Frames are received independently of analysis; if analysis falls behind, only the newest
+    # frames are kept so warnings reflect what the camera shows now, not a backlog.
+    frames = LatestFrameQueue(settings.PROCTORING_FRAME_BUFFER)
+
+    async def receive_frames():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                if message.get("text") is not None:
+                    # Compact frame protocol negotiation; clients that never send a hello stay on legacy.
+                    try:
+                        hello = json.loads(message["text"])
+                        is_hello = hello.get("type") == "hello"
+                    except (ValueError, AttributeError):
+                        await websocket.send_json({"type": "error", "message": "Text messages must be a JSON hello object."})
+                        continue
+                    if is_hello:
+                        reply = frame_protocol.negotiate(hello)
+                        proctor.frame_format = reply["format"]
+                        await websocket.send_json(reply)
+                    continue
+                payload = message.get("bytes") or b""
+                if proctor.frame_format == "legacy":
+                    proctor.record_received(dropped=frames.put(payload), size=len(payload))
+                    continue
+                try:
+                    received = frame_protocol.parse_message(payload)
+                except frame_protocol.FrameProtocolError as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+                    continue
+                for frame in received:
+                    proctor.record_received(dropped=frames.put(frame), size=len(frame.data))
+        except WebSocketDisconnect:
+            print(f"Proctoring WebSocket disconnected for interview {interview_id}")
+        finally:
+            frames.close()
+
+    receiver = asyncio.create_task(receive_frames())
     try:
         while True:
-            frame_bytes = await websocket.receive_bytes()
-            anomaly = await proctor.process_frame(frame_bytes)
+            frame = await frames.get()
+            if frame is None:
+                break
+            anomaly = await proctor.process_frame(frame)
             
             if anomaly:
                 warnings += 1
-                interview.warnings = warnings
-                db.commit()
+                proctoring_event_log.record(
+                    interview_id, ANOMALY_TYPES.get(anomaly, "other"), anomaly, proctor.last_frame_stats()
+                )
                 
-                await websocket.send_json({"type": "warning", "message": anomaly, "count": warnings})
+                warning = {"type": "warning", "message": anomaly, "count": warnings}
+                if isinstance(frame, frame_protocol.Frame) and frame.seq is not None:
+                    warning["seq"] = frame.seq  # lets compact-protocol clients match the warning to a frame
+                await websocket.send_json(warning)
                 
                 if warnings >= 3:
                     await websocket.send_json({"type": "terminate", "message": "Interview terminated due to multiple warnings."})
-                    interview.status = "terminated"
-                    db.commit()
+                    await proctoring_event_log.set_status(interview_id, "terminated")
                     break
     except WebSocketDisconnect:
         print(f"Proctoring WebSocket disconnected for interview {interview_id}")
     except Exception as e:
         print(f"An error occurred in the proctoring websocket: {e}")
     finally:
+        receiver.cancel()
+        # Awaited so a receive error is reported here instead of as a never-retrieved task exception.
+        (error,) = await asyncio.gather(receiver, return_exceptions=True)
+        if isinstance(error, Exception):
+            print(f"Proctoring frame receiver for interview {interview_id} failed: {error}")
+        print(f"Proctoring session {interview_id} stats: {proctor.stats()}")
         await websocket.close()
 
 
 @router.websocket("/ws/simulation")
+@track_websocket("simulation")
 async def websocket_simulation(websocket: WebSocket):
     """
-    Handles a real-time simulation by running the full simulation first,
-    then streaming the results back to the client turn-by-turn with realistic delays.
-    This approach is more robust and prevents common asyncio errors.
+    Handles a real-time simulation, sending each agent turn to the client as soon as it is generated.
+    If the client disconnects, the remaining rounds are cancelled.
     """
     await websocket.accept()
-    orchestrator = AgentOrchestrator()
-    
-    try:
-        # Step 1: Run the full simulation on the backend to get the complete transcript.
-        # This is very fast with Groq and avoids complex state management.
-        full_transcript = orchestrator.run_simulation()
-
-        # Step 2: Stream the results back to the frontend with realistic, randomized delays.
-        for message in full_transcript:
-            is_candidate = "Candidate" in message["sender"]
-            # Simulate candidate "thinking time" (longer delay) vs. AI's quick response.
-            delay = random.uniform(2.5, 4.5) if is_candidate else random.uniform(1.5, 2.5)
-            await asyncio.sleep(delay)
-            
-            # Send the message for the current turn to the frontend.
+    orchestrator = get_orchestrator()
+    started = time.perf_counter()
+
+    async def stream_turns():
+        first_turn = True
+        async for message in orchestrator.a_run_simulation():
             await websocket.send_json({
                 "type": "turn",
                 "data": {"sender": message["sender"].replace('_Agent', ''), "text": message["text"]}
             })
-
-        # Step 3: Send a final completion message.
-        await asyncio.sleep(1)
+            # The opening line is fixed, so time-to-first-turn is measured on the first generated reply.
+            if first_turn and message["sender"] != "Interviewer_Agent":
+                latency_tracker.record("simulation_first_turn", time.perf_counter() - started)
+                first_turn = False
         await websocket.send_json({"type": "complete", "message": "Simulation finished."})
 
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    streamer = asyncio.create_task(stream_turns())
+    watcher = asyncio.create_task(wait_for_disconnect())
+    try:
+        done, _ = await asyncio.wait({streamer, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if streamer in done:
+            streamer.result()
+        else:
+            print("Simulation client disconnected; cancelling the remaining rounds.")
     except Exception as e:
         print(f"An error occurred during simulation: {e}")
         # Send a clear error message to the client if something goes wrong.
         await websocket.send_json({"type": "error", "message": "An unexpected error occurred during the simulation."})
     finally:
+        client_gone = watcher.done()
+        streamer.cancel()
+        watcher.cancel()
+        latency_tracker.record("simulation_total", time.perf_counter() - started)
         # Ensure the connection is always closed gracefully.
-        await websocket.close()
\ No newline at end of file
+        if not client_gone:
+            await websocket.close()
@@ -0,0 +1,153 @@
+# benchmarks/chat_concurrency.py
+"""
+Compares the old sync chat path (a blocking turn, kept in this file, on Starlette's
+40-thread worker pool) with the async path (AsyncSession + AsyncOpenAI on the event loop)
+for N candidates sending a chat turn at the same time.
+
+Run from the backend directory:
+    python -m benchmarks.chat_concurrency --concurrency 40 100 300 --latency 0.5
+
+The LLM is replaced by benchmarks.fake_llm_server and the database by a temporary
+SQLite file, so the numbers only reflect how many turns one worker can keep in flight.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+FAKE_LLM_PORT = 8901
+
+
+def _configure_environment(latency: float):
+    # Settings are read at import time, so the environment must be prepared first.
+    db_path = os.path.join(tempfile.mkdtemp(prefix="chat_bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{FAKE_LLM_PORT}/v1"
+    for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+        os.environ.setdefault(key, "bench-key")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "6379")
+
+    from benchmarks import fake_llm_server
+    fake_llm_server.start_in_thread(FAKE_LLM_PORT, latency)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _report(label, concurrency, wall, latencies):
+    print(
+        f"{label:<6} n={concurrency:<5} wall={wall:7.2f}s  turns/s={concurrency / wall:7.1f}  "
+        f"p50={statistics.median(latencies) * 1000:7.0f}ms  p95={_percentile(latencies, 95) * 1000:7.0f}ms  "
+        f"max={max(latencies) * 1000:7.0f}ms"
+    )
+
+
+def _create_interviews(count):
+    from core.database import SessionLocal
+    from models import tables
+    with SessionLocal() as db:
+        interviews = [tables.Interview(candidate_name=f"Bench Candidate {i}") for i in range(count)]
+        db.add_all(interviews)
+        db.commit()
+        return [interview.id for interview in interviews]
+
+
+_sync_client = None
+
+
+def _sync_reply(chat_history):
+    # A blocking chat completion on the pooled sync HTTP client, as the removed sync agent methods made it.
+    global _sync_client
+    from agents.interview_autogen import get_orchestrator, INTERVIEWER_SYSTEM_MESSAGE
+    from agents.llm_clients import client_pool
+    orchestrator = get_orchestrator()
+    config = orchestrator.llm_config_interviewer
+    entry = config["config_list"][0]
+    if _sync_client is None:
+        from openai import OpenAI
+        _sync_client = OpenAI(
+            api_key=entry["api_key"],
+            base_url=entry["base_url"],
+            http_client=client_pool.client_for(entry["api_key"], "interviewer"),
+            max_retries=entry["max_retries"],
+        )
+    response = _sync_client.chat.completions.create(
+        model=entry["model"],
+        messages=[{"role": "system", "content": INTERVIEWER_SYSTEM_MESSAGE}] + orchestrator._with_past_feedback(chat_history, ""),
+        temperature=config["temperature"],
+        max_tokens=config["max_tokens"],
+    )
+    return response.choices[0].message.content or ""
+
+
+def _sync_turn(interview_id, user_message):
+    # The old chat path (since removed from the service layer): a blocking SQLAlchemy session
+    # and a blocking LLM call, run on a worker thread.
+    from core.database import SessionLocal
+    from models import tables
+    with SessionLocal() as db:
+        db.add(tables.Message(interview_id=interview_id, sender='user', text=user_message))
+        db.commit()
+        db_messages = db.query(tables.Message).filter(tables.Message.interview_id == interview_id).order_by(tables.Message.id).all()
+        chat_history = [
+            {"role": "assistant" if msg.sender == 'ai' else "user", "content": msg.text} for msg in db_messages
+        ]
+        ai_response_text = _sync_reply(chat_history)
+        db.add(tables.Message(interview_id=interview_id, sender='ai', text=ai_response_text))
+        db.commit()
+
+
+async def _run_sync_path(interview_ids):
+    import anyio
+
+    def turn(interview_id):
+        _sync_turn(interview_id, "I would use a PivotTable.")
+
+    async def timed(interview_id):
+        start = time.perf_counter()
+        # anyio's default limiter is the same 40-token pool Starlette runs `def` endpoints on.
+        await anyio.to_thread.run_sync(turn, interview_id)
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(timed(i) for i in interview_ids))
+
+
+async def _run_async_path(interview_ids):
+    from core.database import AsyncSessionLocal
+    from services import interview_service
+
+    async def timed(interview_id):
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await interview_service.a_process_and_save_message(db, interview_id, "I would use a PivotTable.")
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(timed(i) for i in interview_ids))
+
+
+async def main(concurrency_levels, latency):
+    _configure_environment(latency)
+    from core.database import create_db_and_tables
+    create_db_and_tables()
+
+    print(f"Fake LLM latency: {latency * 1000:.0f}ms per completion")
+    for concurrency in concurrency_levels:
+        for label, runner in (("sync", _run_sync_path), ("async", _run_async_path)):
+            interview_ids = _create_interviews(concurrency)
+            start = time.perf_counter()
+            latencies = await runner(interview_ids)
+            _report(label, concurrency, time.perf_counter() - start, latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent chat turn benchmark: sync threadpool vs async path.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[40, 100, 300])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency in seconds.")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.latency))
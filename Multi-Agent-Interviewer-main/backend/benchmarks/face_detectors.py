@@ -0,0 +1,173 @@
+# benchmarks/face_detectors.py
+"""
+Replays a directory of labeled JPEG frames through each face-detector backend and reports
+CPU throughput (frames/sec per core), latency (p50/p99, decode + detection) and the
+precision/recall of the per-frame anomaly signal the proctoring rules are built on.
+
+Frames are labeled by the subdirectory they are in:
+    frames/face/*.jpg            one candidate looking at the screen
+    frames/no_face/*.jpg         nobody in the frame
+    frames/looking_away/*.jpg    one candidate looking away
+    frames/multiple_faces/*.jpg  more than one person
+
+Run from the backend directory:
+    python -m benchmarks.face_detectors frames/ --backends haar dnn landmark_gaze --workers 1 4
+
+Each worker process is limited to one OpenCV thread, so frames/sec per core is the
+single-worker rate and higher --workers values show how throughput scales across cores.
+Backends whose model files are missing are skipped with the reason.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+LABELS = ("face", "no_face", "looking_away", "multiple_faces")
+ANOMALY_LABELS = ("no_face", "looking_away", "multiple_faces")
+
+
+def _configure_environment():
+    # Settings are read at import time; the detectors don't need the LLM keys, DB or Redis.
+    for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+        os.environ.setdefault(key, "bench-key")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "6379")
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./interview_app.db")
+
+
+def _load_frames(directory):
+    frames = []
+    for label in LABELS:
+        label_dir = os.path.join(directory, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if name.lower().endswith((".jpg", ".jpeg")):
+                with open(os.path.join(label_dir, name), "rb") as f:
+                    frames.append((label, f.read()))
+    return frames
+
+
+def _classify(analysis):
+    """Per-frame label the proctoring rules would act on (before their consecutive-frame thresholds)."""
+    if analysis is None:
+        return "unreadable"
+    if len(analysis["faces"]) == 0:
+        return "no_face"
+    if len(analysis["faces"]) > 1:
+        return "multiple_faces"
+    if analysis["eyes_found"] is False:
+        return "looking_away"
+    return "face"
+
+
+def _replay(backend, frames, fast_mode, sequential):
+    """Runs in a worker process: returns [(label, predicted, seconds)] for its share of frames."""
+    _configure_environment()
+    import cv2
+    cv2.setNumThreads(1)
+    from agents.detector_registry import warm_detectors
+    from agents.face_detectors import get_backend
+    from agents.proctoring_agent import analyze_frame
+    warm_detectors(get_backend(backend).models)
+
+    results = []
+    tracked_face, frames_since_full_search = None, 0
+    for label, frame_bytes in frames:
+        if not sequential:
+            tracked_face, frames_since_full_search = None, 0
+        start = time.perf_counter()
+        analysis = analyze_frame(frame_bytes, tracked_face, frames_since_full_search, fast_mode, backend)
+        elapsed = time.perf_counter() - start
+        if analysis is not None:
+            tracked_face, frames_since_full_search = analysis["tracked_face"], analysis["frames_since_full_search"]
+        results.append((label, _classify(analysis), elapsed))
+    return results
+
+
+def _check_backend(backend):
+    _configure_environment()
+    from agents.detector_registry import warm_detectors
+    from agents.face_detectors import get_backend
+    warm_detectors(get_backend(backend).models)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _precision_recall(results, positive):
+    """`positive` is a set of labels counted as the positive class."""
+    true_positive = sum(1 for label, predicted, _ in results if predicted in positive and label in positive)
+    predicted_positive = sum(1 for _, predicted, _ in results if predicted in positive)
+    actual_positive = sum(1 for label, _, _ in results if label in positive)
+    precision = true_positive / predicted_positive if predicted_positive else None
+    recall = true_positive / actual_positive if actual_positive else None
+    return precision, recall
+
+
+def _fmt(value):
+    return "   -" if value is None else f"{value:4.2f}"
+
+
+def _report(backend, workers, wall, results):
+    latencies = [elapsed for _, _, elapsed in results]
+    per_core = len(latencies) / sum(latencies)
+    print(
+        f"{backend:<14} workers={workers:<3} frames/s={len(results) / wall:8.1f}  frames/s/core={per_core:7.1f}  "
+        f"p50={statistics.median(latencies) * 1000:6.1f}ms  p99={_percentile(latencies, 99) * 1000:6.1f}ms"
+    )
+    if workers != 1:
+        return
+    classes = [(name, {name}) for name in ANOMALY_LABELS] + [("any_anomaly", set(ANOMALY_LABELS))]
+    for name, positive in classes:
+        if not any(label in positive for label, _, _ in results):
+            continue
+        precision, recall = _precision_recall(results, positive)
+        print(f"{'':<14}   {name:<15} precision={_fmt(precision)}  recall={_fmt(recall)}")
+
+
+def main(directory, backends, worker_counts, fast_mode, sequential):
+    frames = _load_frames(directory)
+    if not frames:
+        raise SystemExit(f"No labeled frames found under {directory} (expected subdirectories {', '.join(LABELS)}).")
+    counts = {label: sum(1 for frame_label, _ in frames if frame_label == label) for label in LABELS}
+    print(f"Frames: {len(frames)} " + " ".join(f"{label}={count}" for label, count in counts.items() if count))
+
+    context = multiprocessing.get_context("spawn")
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                pool.submit(_check_backend, backend).result()
+            except Exception as e:
+                print(f"{backend:<14} skipped: {e}")
+                continue
+        for workers in worker_counts:
+            # Sequential replay keeps each worker's share contiguous so ROI tracking sees consecutive frames.
+            size = -(-len(frames) // workers)
+            shards = [frames[i:i + size] for i in range(0, len(frames), size)]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                # Start the workers and load the models before timing.
+                for future in [pool.submit(_check_backend, backend) for _ in range(workers)]:
+                    future.result()
+                start = time.perf_counter()
+                futures = [pool.submit(_replay, backend, shard, fast_mode, sequential) for shard in shards]
+                results = [row for future in futures for row in future.result()]
+                wall = time.perf_counter() - start
+            _report(backend, workers, wall, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Face-detector backend throughput and accuracy benchmark.")
+    parser.add_argument("frames", help="Directory with face/, no_face/, looking_away/ and multiple_faces/ JPEGs.")
+    parser.add_argument("--backends", nargs="+", default=["haar", "dnn", "landmark_gaze"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Worker process counts to measure.")
+    parser.add_argument("--full-frame", action="store_true", help="Disable downscaled detection / ROI tracking.")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Treat each label directory as a video and keep ROI tracking state between frames.")
+    args = parser.parse_args()
+    main(args.frames, args.backends, args.workers, not args.full_frame, args.sequential)
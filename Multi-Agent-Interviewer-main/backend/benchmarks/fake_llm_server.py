@@ -0,0 +1,150 @@
+# benchmarks/fake_llm_server.py
+"""
+A local OpenAI-compatible chat completions server for benchmarks and load tests.
+It answers every request after a fixed latency, so benchmarks measure our own
+pipeline instead of Groq's queueing, and cost no API quota. A fraction of requests
+can be made slow (`slow_fraction`, `slow_latency`) to simulate an upstream latency tail.
+
+- `latency` is the time to the first token; with `tokens_per_second` the completion is then
+  generated at that rate (non-streamed replies wait for all of it, streamed ones are paced).
+- Streaming requests (`"stream": true`) get server-sent events, plus a final usage chunk when
+  the request asks for it with `stream_options.include_usage`.
+- With `terminate_after` N, a conversation that already has N assistant turns gets a closing
+  reply ending in TERMINATE, so scripted interviews finish like real ones.
+- Requests whose system prompt asks for the report JSON get a valid report.
+
+Run standalone:  python -m benchmarks.fake_llm_server --port 8900 --latency 0.5 --tokens-per-second 300
+Then point the backend at it with LLM_BASE_URL=http://127.0.0.1:8900/v1
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+DEFAULT_REPLY = "Thank you. Next question: how would you combine INDEX and MATCH to look up a value to the left of the key column?"
+CLOSING_REPLY = "Thank you for your answers, that concludes our interview. We will be in touch soon. TERMINATE"
+REPORT_REPLY = json.dumps({
+    "score": 72,
+    "summary": "The candidate showed solid working knowledge of lookups and PivotTables.",
+    "strengths": "- Clear explanations\n- Good use of lookup functions",
+    "weaknesses": "- Limited experience with dynamic arrays",
+})
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _pick_reply(body: dict, reply: str, terminate_after: int) -> str:
+    messages = body.get("messages", [])
+    system = " ".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    if '"score"' in system:
+        return REPORT_REPLY
+    assistant_turns = sum(1 for m in messages if m.get("role") == "assistant")
+    if terminate_after and assistant_turns >= terminate_after:
+        return CLOSING_REPLY
+    return reply
+
+
+async def _stream_events(completion_id: str, model: str, reply: str, tokens_per_second: float,
+                         prompt_tokens: int, include_usage: bool):
+    created = int(time.time())
+    words = reply.split(" ")
+    for index, word in enumerate(words):
+        text = word if index == len(words) - 1 else word + " "
+        if tokens_per_second and index:
+            await asyncio.sleep(_tokens(text) / tokens_per_second)
+        chunk = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    done = {
+        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(done)}\n\n"
+    if include_usage:
+        usage = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": _tokens(reply),
+                      "total_tokens": prompt_tokens + _tokens(reply)},
+        }
+        yield f"data: {json.dumps(usage)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def create_app(latency: float = 0.5, reply: str = DEFAULT_REPLY,
+               slow_fraction: float = 0.0, slow_latency: float = 5.0,
+               tokens_per_second: float = 0.0, terminate_after: int = 0) -> FastAPI:
+    app = FastAPI(title="Fake LLM Server")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(slow_latency if random.random() < slow_fraction else latency)
+        text = _pick_reply(body, reply, terminate_after)
+        model = body.get("model", "fake-model")
+        prompt_tokens = sum(_tokens(str(m.get("content", ""))) for m in body.get("messages", []))
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            events = _stream_events(f"chatcmpl-{uuid.uuid4().hex}", model, text, tokens_per_second,
+                                    prompt_tokens, include_usage)
+            return StreamingResponse(events, media_type="text/event-stream")
+        if tokens_per_second:
+            await asyncio.sleep(_tokens(text) / tokens_per_second)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": _tokens(text),
+                "total_tokens": prompt_tokens + _tokens(text),
+            },
+        }
+
+    return app
+
+
+def start_in_thread(port: int, latency: float = 0.5, reply: str = DEFAULT_REPLY,
+                    slow_fraction: float = 0.0, slow_latency: float = 5.0,
+                    tokens_per_second: float = 0.0, terminate_after: int = 0) -> uvicorn.Server:
+    """Starts the server on a daemon thread and returns once it accepts connections."""
+    app = create_app(latency, reply, slow_fraction, slow_latency, tokens_per_second, terminate_after)
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub for benchmarks.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Completion generation rate after the first token (0 = instant).")
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="Fraction of requests answered after --slow-latency.")
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--terminate-after", type=int, default=0,
+                        help="End conversations with TERMINATE once they have this many assistant turns (0 = never).")
+    args = parser.parse_args()
+    app = create_app(args.latency, slow_fraction=args.slow_fraction, slow_latency=args.slow_latency,
+                     tokens_per_second=args.tokens_per_second, terminate_after=args.terminate_after)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
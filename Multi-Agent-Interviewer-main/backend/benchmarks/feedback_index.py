@@ -0,0 +1,92 @@
+# benchmarks/feedback_index.py
+"""
+Measures the feedback retrieval index: embedding/append throughput, how long a fresh
+worker takes to open an existing index (no re-embedding), and top-k search latency.
+
+Run from the backend directory:
+    python -m benchmarks.feedback_index --rows 100000 --queries 500
+
+The index is built in a temporary directory from synthetic feedback sentences; no database
+or LLM is involved.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+SUBJECTS = ["The interviewer", "The agent", "Alex", "The Interviewer Agent"]
+ACTIONS = [
+    "should ask for a concrete example of", "moved on too quickly from", "did not probe",
+    "spent too long on", "should ask a follow-up question about", "explained well",
+]
+TOPICS = [
+    "VLOOKUP", "INDEX and MATCH", "XLOOKUP", "PivotTables", "dynamic arrays", "nested IF formulas",
+    "Power Query", "conditional formatting", "data validation", "LET and LAMBDA", "macros and VBA",
+    "chart selection", "absolute references", "SUMIFS", "error handling with IFERROR", "data cleaning",
+]
+QUERIES = [
+    "financial modelling with lookups", "data cleaning and Power Query", "PivotTables reporting",
+    "advanced formulas like LAMBDA", "beginner candidate basic formulas",
+]
+
+
+def _configure_environment(directory):
+    # Settings are read at import time, so the environment must be prepared first.
+    os.environ["FEEDBACK_INDEX_DIR"] = directory
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_feedback_index.db")
+    for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+        os.environ.setdefault(key, "bench-key")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "6379")
+
+
+def _sentence(rng):
+    return f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)} {rng.choice(TOPICS)} and {rng.choice(TOPICS)}."
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main(rows, queries, k, batch):
+    _configure_environment(tempfile.mkdtemp(prefix="feedback_index_"))
+    from core.config import settings
+    from services.feedback_index import FeedbackIndex
+
+    rng = random.Random(0)
+    index = FeedbackIndex(settings.FEEDBACK_INDEX_DIR, settings.FEEDBACK_INDEX_DIM)
+    started = time.perf_counter()
+    for start in range(0, rows, batch):
+        index.add("feedback", [(i + 1, _sentence(rng)) for i in range(start, min(rows, start + batch))])
+    build = time.perf_counter() - started
+    print(f"Indexed {rows} rows (dim {settings.FEEDBACK_INDEX_DIM}) in {build:.1f}s ({rows / build:,.0f} rows/s)")
+
+    # A new worker maps the existing files instead of re-embedding.
+    started = time.perf_counter()
+    reopened = FeedbackIndex(settings.FEEDBACK_INDEX_DIR, settings.FEEDBACK_INDEX_DIM)
+    entries = reopened.stats()["entries"]
+    print(f"Reopened index with {entries} entries in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        reopened.search(QUERIES[i % len(QUERIES)], k)
+        latencies.append(time.perf_counter() - started)
+    print(f"top-{k} search over {entries} rows: p50={statistics.median(latencies) * 1000:.2f}ms  "
+          f"p99={_percentile(latencies, 99) * 1000:.2f}ms")
+    for kind, source_id, score in reopened.search(QUERIES[0], 3):
+        print(f"  {score:.3f}  {kind} #{source_id}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feedback retrieval index build and search benchmark.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=1000, help="Rows appended per add() call.")
+    args = parser.parse_args()
+    main(args.rows, args.queries, args.k, args.batch)
@@ -0,0 +1,102 @@
+# benchmarks/hedging.py
+"""
+Measures interviewer turn latency with and without hedged requests.
+
+Two fake OpenAI-compatible servers stand in for the models: the primary answers quickly but
+sends a fraction of requests into a long tail, the fallback is slower on average but steady.
+Each run sends the same interviewer turns (streamed and non-streamed) through the
+AgentOrchestrator and reports p50/p95/p99 plus the hedging counters.
+
+Run from the backend directory:
+    python -m benchmarks.hedging --turns 300 --latency 0.2 --slow-fraction 0.03 --slow-latency 3 --fallback-latency 0.4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+PRIMARY_PORT = 8902
+FALLBACK_PORT = 8903
+
+
+def _configure_environment(args):
+    # Settings are read at import time, so the environment must be prepared first.
+    os.environ["LLM_BASE_URL"] = f"http://127.0.0.1:{PRIMARY_PORT}/v1"
+    os.environ["LLM_FALLBACK_BASE_URL"] = f"http://127.0.0.1:{FALLBACK_PORT}/v1"
+    os.environ["LLM_FALLBACK_MODEL"] = "fallback-model"
+    os.environ["LLM_RATE_LIMIT_ENABLED"] = "false"
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_hedging.db")
+    for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+        os.environ.setdefault(key, "bench-key")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "6379")
+
+    from benchmarks import fake_llm_server
+    fake_llm_server.start_in_thread(PRIMARY_PORT, args.latency,
+                                    slow_fraction=args.slow_fraction, slow_latency=args.slow_latency)
+    fake_llm_server.start_in_thread(FALLBACK_PORT, args.fallback_latency)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _report(label, latencies):
+    print(
+        f"{label:<22} n={len(latencies):<5} p50={statistics.median(latencies) * 1000:7.0f}ms  "
+        f"p95={_percentile(latencies, 95) * 1000:7.0f}ms  p99={_percentile(latencies, 99) * 1000:7.0f}ms  "
+        f"max={max(latencies) * 1000:7.0f}ms"
+    )
+
+
+async def _run_turns(orchestrator, turns, concurrency, streaming):
+    history = [{"role": "user", "content": "I would use a PivotTable grouped by region."}]
+    limit = asyncio.Semaphore(concurrency)
+
+    async def turn():
+        async with limit:
+            started = time.perf_counter()
+            if streaming:
+                async for _ in orchestrator.a_stream_ai_reply(history):
+                    pass
+            else:
+                await orchestrator.a_get_ai_reply(history)
+            return time.perf_counter() - started
+
+    return await asyncio.gather(*(turn() for _ in range(turns)))
+
+
+async def main(args):
+    _configure_environment(args)
+    from agents.interview_autogen import get_orchestrator, get_hedge_stats
+
+    orchestrator = get_orchestrator()
+    fallback = orchestrator.llm_config_interviewer_fallback
+    print(f"Primary: {args.latency * 1000:.0f}ms, {args.slow_fraction:.0%} of requests {args.slow_latency * 1000:.0f}ms. "
+          f"Fallback: {args.fallback_latency * 1000:.0f}ms")
+    for streaming in (False, True):
+        kind = "stream" if streaming else "complete"
+        # Without a fallback config the orchestrator never hedges; this run also warms up the
+        # primary's latency histogram that the hedged run takes its threshold from.
+        orchestrator.llm_config_interviewer_fallback = None
+        _report(f"{kind} (no hedging)", await _run_turns(orchestrator, args.turns, args.concurrency, streaming))
+        orchestrator.llm_config_interviewer_fallback = fallback
+        _report(f"{kind} (hedged)", await _run_turns(orchestrator, args.turns, args.concurrency, streaming))
+
+    stats = get_hedge_stats()
+    print(f"Hedging counters: {stats['counts']}")
+    print(f"Thresholds (ms): {stats['threshold_ms']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interviewer tail latency with and without hedged requests.")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="Primary model latency in seconds.")
+    parser.add_argument("--slow-fraction", type=float, default=0.03, help="Fraction of primary requests in the tail.")
+    parser.add_argument("--slow-latency", type=float, default=3.0, help="Primary tail latency in seconds.")
+    parser.add_argument("--fallback-latency", type=float, default=0.4, help="Fallback model latency in seconds.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,362 @@
+# benchmarks/load_test.py
+"""
+End-to-end load test of one backend worker, without Groq quota or cameras.
+
+- A fake OpenAI-compatible server (benchmarks.fake_llm_server) stands in for Groq, with a
+  configurable time-to-first-token and token rate. It ends every interview with TERMINATE
+  after --turns interviewer replies.
+- The backend runs as a real uvicorn process on a temporary SQLite database, with
+  LLM_BASE_URL pointing at the fake server. The LLM rate limiter is off unless --rate-limit
+  is given.
+- Scripted candidates: each one calls POST /api/interview/start, then answers with
+  POST /api/interview/{id}/chat (or /chat/stream with --stream) until the reply is
+  terminated, and then starts the next interview.
+- Synthetic webcams: alongside every interview, a client connects to
+  /api/ws/proctoring/{id}, negotiates the compact frame protocol and sends grayscale
+  JPEG frames at --fps. When the server ends a session after its warnings, the client
+  reconnects.
+
+The number of concurrent interviews is stepped through --concurrency; each step runs for
+--duration seconds. Per step it reports throughput and p50/p95/p99 per endpoint. At the end
+it reports the concurrency at which chat latency degrades: p95 more than --degradation
+times the lowest step's, or more than 1% errors.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --concurrency 1 5 10 25 50 --duration 30 --latency 0.3 --tokens-per-second 300
+    python -m benchmarks.load_test --target http://127.0.0.1:8000 --concurrency 10   # an already running backend
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWERS = [
+    "I would use XLOOKUP with an exact match, and IFERROR around it for missing keys.",
+    "A PivotTable with the region in rows, months in columns and the sum of sales as values.",
+    "I'd clean it in Power Query: trim whitespace, fix the data types and remove duplicates.",
+    "INDEX and MATCH, because MATCH can look up a column to the left of the return column.",
+    "Conditional formatting with a formula rule, so the highlight updates when the data changes.",
+    "I would use SUMIFS with the date range as two criteria on the same column.",
+]
+CHAT = "POST /interview/{id}/chat"
+CHAT_STREAM_FIRST_TOKEN = "POST /interview/{id}/chat/stream (first token)"
+CHAT_STREAM = "POST /interview/{id}/chat/stream"
+START = "POST /interview/start"
+WS_CONNECT = "WS /ws/proctoring/{id} (connect)"
+# The compact frame protocol (agents/frame_protocol.py), packed here so the harness doesn't load
+# the backend's settings: a message header, then per frame a header and a grayscale JPEG.
+MESSAGE_HEADER = struct.Struct("<2sBB")
+FRAME_HEADER = struct.Struct("<IQBxHHI")
+ENCODING_GRAY_JPEG = 0
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url, process, timeout=60.0):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return  # answering, even if not on this path
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def _start_servers(args):
+    """Starts the fake LLM server and a backend worker pointed at it; returns (base_url, processes)."""
+    llm_port, backend_port = _free_port(), _free_port()
+    work_dir = tempfile.mkdtemp(prefix="load_test_")
+    llm = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_llm_server", "--port", str(llm_port),
+         "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+         "--terminate-after", str(args.turns)],
+        cwd=BACKEND_DIR,
+    )
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(work_dir, 'load_test.db')}",
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "FEEDBACK_INDEX_DIR": os.path.join(work_dir, "feedback_index"),
+        "LLM_RATE_LIMIT_ENABLED": "true" if args.rate_limit else "false",
+    })
+    for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+        env.setdefault(key, "load-test-key")
+    env.setdefault("REDIS_HOST", "127.0.0.1")
+    env.setdefault("REDIS_PORT", "6379")
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(backend_port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_up(f"http://127.0.0.1:{llm_port}/", llm)
+        _wait_until_up(f"http://127.0.0.1:{backend_port}/", backend)
+    except RuntimeError:
+        _stop([llm, backend])
+        raise
+    return f"http://127.0.0.1:{backend_port}", [llm, backend]
+
+
+def _stop(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _synthetic_frame(image_path=None):
+    """A grayscale JPEG: the given image, or a noisy gradient the size of a downscaled webcam frame."""
+    import cv2
+    import numpy as np
+    if image_path:
+        gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise SystemExit(f"Could not read --frame-image {image_path}")
+    else:
+        rng = np.random.default_rng(0)
+        gradient = np.linspace(40, 200, 640, dtype=np.float32)[None, :].repeat(480, axis=0)
+        gray = np.clip(gradient + rng.normal(0, 12, gradient.shape), 0, 255).astype(np.uint8)
+    ok, encoded = cv2.imencode(".jpg", gray, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return encoded.tobytes(), gray.shape[1], gray.shape[0]
+
+
+class StepStats:
+    def __init__(self):
+        self.latencies = {}  # endpoint -> list of seconds
+        self.errors = {}     # endpoint -> count
+        self.interviews_completed = 0
+        self.frames_sent = 0
+        self.warnings = 0
+        self.sessions_terminated = 0
+
+    def record(self, endpoint, seconds):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+
+    def error(self, endpoint):
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def error_rate(self, endpoint):
+        done = len(self.latencies.get(endpoint, ())) + self.errors.get(endpoint, 0)
+        return self.errors.get(endpoint, 0) / done if done else 0.0
+
+
+async def _chat_turn(client, interview_id, message, stream, stats):
+    started = time.perf_counter()
+    if not stream:
+        response = await client.post(f"/api/interview/{interview_id}/chat", json={"message": message})
+        response.raise_for_status()
+        stats.record(CHAT, time.perf_counter() - started)
+        return response.json()["isTerminated"]
+    terminated = None
+    async with client.stream("POST", f"/api/interview/{interview_id}/chat/stream", json={"message": message}) as response:
+        response.raise_for_status()
+        first_token = True
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            if event["type"] == "token" and first_token:
+                stats.record(CHAT_STREAM_FIRST_TOKEN, time.perf_counter() - started)
+                first_token = False
+            elif event["type"] == "done":
+                terminated = event["isTerminated"]
+    if terminated is None:
+        raise RuntimeError("stream ended without a done event")
+    stats.record(CHAT_STREAM, time.perf_counter() - started)
+    return terminated
+
+
+async def _webcam(ws_url, interview_id, frame, fps, stats):
+    """Sends frames until cancelled; reconnects when the server ends the session."""
+    import websockets
+    data, width, height = frame
+    seq = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(f"{ws_url}/api/ws/proctoring/{interview_id}", max_size=None) as ws:
+                await ws.send(json.dumps({"type": "hello", "format": "gray_jpeg"}))
+                await ws.recv()  # format reply
+                stats.record(WS_CONNECT, time.perf_counter() - started)
+
+                async def read_replies():
+                    async for message in ws:
+                        reply = json.loads(message)
+                        if reply.get("type") == "warning":
+                            stats.warnings += 1
+                        elif reply.get("type") == "terminate":
+                            stats.sessions_terminated += 1
+
+                reader = asyncio.create_task(read_replies())
+                try:
+                    while not reader.done():
+                        seq += 1
+                        await ws.send(MESSAGE_HEADER.pack(b"PF", 1, 1) + FRAME_HEADER.pack(
+                            seq, int(time.time() * 1000), ENCODING_GRAY_JPEG, width, height, len(data)
+                        ) + data)
+                        stats.frames_sent += 1
+                        await asyncio.sleep(1 / fps)
+                finally:
+                    reader.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            stats.error(WS_CONNECT)
+            await asyncio.sleep(1)
+
+
+async def _candidate(client, ws_url, deadline, args, frame, stats):
+    """Runs interviews back to back until the deadline; the one in progress is abandoned."""
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.post("/api/interview/start", json={"candidate_name": f"Load Test {rng.randrange(10**6)}"})
+            response.raise_for_status()
+            interview_id = response.json()["interviewId"]
+            stats.record(START, time.perf_counter() - started)
+        except Exception:
+            stats.error(START)
+            await asyncio.sleep(1)
+            continue
+
+        webcam = asyncio.create_task(_webcam(ws_url, interview_id, frame, args.fps, stats)) if args.fps else None
+        try:
+            for turn in range(args.max_turns):
+                if time.perf_counter() >= deadline:
+                    break
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_time)
+                try:
+                    terminated = await _chat_turn(client, interview_id, rng.choice(ANSWERS), args.stream, stats)
+                except Exception:
+                    stats.error(CHAT_STREAM if args.stream else CHAT)
+                    continue
+                if terminated:
+                    stats.interviews_completed += 1
+                    break
+        finally:
+            if webcam is not None:
+                webcam.cancel()
+
+
+async def _run_step(base_url, concurrency, args, frame):
+    import httpx
+    stats = StepStats()
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            _candidate(client, base_url.replace("http", "ws", 1), deadline, args, frame, stats)
+            for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return stats, elapsed
+
+
+def _print_step(concurrency, stats, elapsed):
+    print(f"\n== {concurrency} concurrent interviews, {elapsed:.1f}s ==")
+    print(f"  interviews completed: {stats.interviews_completed} ({stats.interviews_completed / elapsed * 60:.1f}/min)   "
+          f"frames sent: {stats.frames_sent} ({stats.frames_sent / elapsed:.1f}/s)   "
+          f"warnings: {stats.warnings}   sessions ended by the server: {stats.sessions_terminated}")
+    print(f"  {'endpoint':<48} {'count':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for endpoint in sorted(set(stats.latencies) | set(stats.errors)):
+        values = stats.latencies.get(endpoint, [])
+        if values:
+            p50, p95, p99 = (_percentile(values, pct) * 1000 for pct in (50, 95, 99))
+            print(f"  {endpoint:<48} {len(values):>6} {len(values) / elapsed:>7.2f} {p50:>8.0f} {p95:>8.0f} {p99:>8.0f} "
+                  f"{stats.errors.get(endpoint, 0):>7}")
+        else:
+            print(f"  {endpoint:<48} {0:>6} {'':>7} {'':>8} {'':>8} {'':>8} {stats.errors.get(endpoint, 0):>7}")
+
+
+def _degradation(results, endpoint, factor):
+    """Returns (concurrency, reason) of the first step whose chat latency or errors degraded, or None."""
+    baseline = None
+    for concurrency, stats, _ in results:
+        values = stats.latencies.get(endpoint)
+        error_rate = stats.error_rate(endpoint)
+        if error_rate > 0.01:
+            return concurrency, f"{error_rate:.1%} of {endpoint} requests failed"
+        if not values:
+            continue
+        p95 = _percentile(values, 95)
+        if baseline is None:
+            baseline = p95
+        elif p95 > factor * baseline:
+            return concurrency, f"{endpoint} p95 {p95 * 1000:.0f}ms is {p95 / baseline:.1f}x the {baseline * 1000:.0f}ms baseline"
+    return None
+
+
+async def main(args):
+    processes = []
+    if args.target:
+        base_url = args.target.rstrip("/")
+    else:
+        base_url, processes = _start_servers(args)
+    try:
+        frame = _synthetic_frame(args.frame_image) if args.fps else None
+        print(f"Backend {base_url}; fake LLM: {args.latency * 1000:.0f}ms to first token, "
+              f"{args.tokens_per_second or 'unlimited'} tokens/s, TERMINATE after {args.turns} turns; "
+              f"think time {args.think_time}s; webcam {args.fps} fps")
+        results = []
+        for concurrency in args.concurrency:
+            stats, elapsed = await _run_step(base_url, concurrency, args, frame)
+            _print_step(concurrency, stats, elapsed)
+            results.append((concurrency, stats, elapsed))
+
+        endpoint = CHAT_STREAM_FIRST_TOKEN if args.stream else CHAT
+        degraded = _degradation(results, endpoint, args.degradation)
+        if degraded:
+            print(f"\nLatency degrades at {degraded[0]} concurrent interviews: {degraded[1]}.")
+        else:
+            print(f"\nNo degradation up to {args.concurrency[-1]} concurrent interviews "
+                  f"({endpoint} p95 within {args.degradation}x of the lowest step).")
+    finally:
+        _stop(processes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end load test with scripted candidates and synthetic webcams.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency step.")
+    parser.add_argument("--target", help="Base URL of a running backend (skips starting the fake LLM and backend).")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake LLM time to first token, in seconds.")
+    parser.add_argument("--tokens-per-second", type=float, default=300.0, help="Fake LLM generation rate.")
+    parser.add_argument("--turns", type=int, default=6, help="Interviewer replies before the fake LLM says TERMINATE.")
+    parser.add_argument("--max-turns", type=int, default=20, help="Give up on an interview after this many turns.")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds a candidate takes to answer.")
+    parser.add_argument("--stream", action="store_true", help="Use /chat/stream and measure time to the first token.")
+    parser.add_argument("--fps", type=float, default=0.5, help="Webcam frames per second per interview (0 = no proctoring).")
+    parser.add_argument("--frame-image", help="Image sent as the webcam frame (default: a synthetic gradient).")
+    parser.add_argument("--degradation", type=float, default=2.0, help="p95 increase over the lowest step that counts as degraded.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="HTTP request timeout in seconds.")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the backend's LLM rate limiter on.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,117 @@
+# benchmarks/metrics_overhead.py
+"""
+Measures what the instrumentation costs per call: a histogram observation, a `timed` sync
+function, a `timed` coroutine and a `timed` async generator, each against its uninstrumented
+version. It also times a /metrics scrape with a realistic number of series.
+
+Run from the backend directory:
+    python -m benchmarks.metrics_overhead --calls 200000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+def _configure_environment():
+    # Settings are read at import time, so the environment must be prepared first.
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_metrics.db")
+    for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+        os.environ.setdefault(key, "bench-key")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "6379")
+    os.environ["METRICS_ENABLED"] = "true"
+
+
+def _per_call_ns(run, calls):
+    started = time.perf_counter()
+    run(calls)
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def main(calls):
+    _configure_environment()
+    from core.metrics import metrics, timed, add_stage_time, span
+
+    histogram = metrics.histogram("bench_observe_seconds", "benchmark", ["label"])
+
+    def plain(x):
+        return x
+
+    instrumented = timed("bench.sync")(plain)
+
+    async def a_plain(x):
+        return x
+
+    a_instrumented = timed("bench.async")(a_plain)
+
+    async def gen_plain(n):
+        for i in range(n):
+            yield i
+
+    gen_instrumented = timed("bench.agen")(gen_plain)
+
+    def observe(n):
+        for i in range(n):
+            histogram.observe(("a",), 0.003)
+
+    def call(func):
+        def run(n):
+            for i in range(n):
+                func(i)
+        return run
+
+    def stage(n):
+        with span("bench.stage"):
+            for i in range(n):
+                add_stage_time("db", 0.001)
+
+    def a_call(func):
+        def run(n):
+            async def loop():
+                for i in range(n):
+                    await func(i)
+            asyncio.run(loop())
+        return run
+
+    def a_iterate(func, items=10):
+        def run(n):
+            async def loop():
+                for _ in range(n // items):
+                    async for _ in func(items):
+                        pass
+            asyncio.run(loop())
+        return run
+
+    rows = [
+        ("histogram.observe", _per_call_ns(observe, calls), None),
+        ("add_stage_time (inside a span)", _per_call_ns(stage, calls), None),
+        ("sync function", _per_call_ns(call(instrumented), calls), _per_call_ns(call(plain), calls)),
+        ("coroutine", _per_call_ns(a_call(a_instrumented), calls), _per_call_ns(a_call(a_plain), calls)),
+        ("async generator, 10 items (per item)", _per_call_ns(a_iterate(gen_instrumented), calls),
+         _per_call_ns(a_iterate(gen_plain), calls)),
+    ]
+    print(f"{'':40} {'instrumented':>14} {'plain':>10} {'overhead':>10}")
+    for name, with_metrics, without in rows:
+        if without is None:
+            print(f"{name:40} {with_metrics:11.0f} ns")
+        else:
+            print(f"{name:40} {with_metrics:11.0f} ns {without:7.0f} ns {with_metrics - without:7.0f} ns")
+
+    # A busy worker: a few dozen spans with a stage breakdown, per-command Redis and per-agent LLM series.
+    for i in range(40):
+        histogram.observe((f"series{i}",), 0.01)
+        with span(f"bench.span{i}"):
+            add_stage_time("db", 0.001)
+            add_stage_time("redis", 0.001)
+            add_stage_time("llm", 0.5)
+    started = time.perf_counter()
+    text = metrics.render()
+    print(f"\n/metrics render: {(time.perf_counter() - started) * 1000:.2f}ms for {text.count(chr(10))} lines")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Instrumentation overhead benchmark.")
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.calls)
@@ -0,0 +1,141 @@
+# benchmarks/startup.py
+"""
+Measures how quickly a worker starts: the import time of `main` broken down per module
+(from `python -X importtime`), and the time from launching uvicorn until it answers `/`.
+
+Run from the backend directory:
+    python -m benchmarks.startup --top 15 --runs 3
+    python -m benchmarks.startup --unreachable-redis  # Redis host that never answers
+
+Each measurement runs in a fresh interpreter, so nothing is already imported. Modules
+that should only load in the background after startup are flagged if they show up.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Loaded by the background warm-up (or the first request needing them), never by `import main`.
+DEFERRED_MODULES = ("openai", "cv2", "numpy")
+UNREACHABLE_REDIS_HOST = "10.255.255.1"  # non-routable: connection attempts hang until the timeout
+
+
+def _environment(unreachable_redis):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./bench_startup.db")
+    for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+        env.setdefault(key, "bench-key")
+    env.setdefault("REDIS_HOST", "127.0.0.1")
+    env.setdefault("REDIS_PORT", "6379")
+    if unreachable_redis:
+        env["REDIS_HOST"] = UNREACHABLE_REDIS_HOST
+    return env
+
+
+def _import_times(env):
+    """
+    Returns ({module: (self_us, cumulative_us)}, [main's direct imports]) for one `import main`
+    in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules, block, direct = {}, [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative_us))
+        # A module is reported after everything it imported, so main's direct imports are the
+        # depth-1 entries since the previous top-level one.
+        if depth == 1:
+            block.append(name)
+        elif depth == 0:
+            if name == "main":
+                direct = block
+            block = []
+    return modules, direct
+
+
+def report_imports(env, top, runs):
+    samples = [_import_times(env) for _ in range(runs)]
+    modules, direct = samples[-1]
+    total = statistics.median(sample["main"][1] for sample, _ in samples)
+    print(f"`import main`: {total / 1000:.0f}ms (median of {runs}), {len(modules)} modules")
+
+    # Direct imports of main (depth 1) show which of the app's own imports cost what.
+    print("\nImported by main (cumulative):")
+    for name in sorted(direct, key=lambda name: -modules[name][1])[:top]:
+        cumulative_us = modules[name][1]
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    print("\nSlowest modules (self time):")
+    for name, (self_us, _) in sorted(modules.items(), key=lambda item: -item[1][0])[:top]:
+        print(f"  {self_us / 1000:8.1f}ms  {name}")
+
+    loaded = [name for name in DEFERRED_MODULES if name in modules]
+    if loaded:
+        print(f"\nWARNING: imported at startup although they should load in the background: {', '.join(loaded)}")
+    else:
+        print(f"\nNot imported at startup (loaded in the background): {', '.join(DEFERRED_MODULES)}")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_to_first_response(env, timeout):
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"no response within {timeout}s")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def report_first_response(env, runs, timeout):
+    timings = [_time_to_first_response(env, timeout) for _ in range(runs)]
+    print(f"\nuvicorn launch -> first response from `/` (Redis host {env['REDIS_HOST']}): "
+          f"median {statistics.median(timings) * 1000:.0f}ms, max {max(timings) * 1000:.0f}ms over {runs} runs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker startup time benchmark.")
+    parser.add_argument("--top", type=int, default=15, help="Modules listed per table.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the server to answer.")
+    parser.add_argument("--unreachable-redis", action="store_true",
+                        help="Point REDIS_HOST at an address that never answers.")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure import time.")
+    args = parser.parse_args()
+    environment = _environment(args.unreachable_redis)
+    report_imports(environment, args.top, args.runs)
+    if not args.skip_server:
+        report_first_response(environment, args.runs, args.timeout)
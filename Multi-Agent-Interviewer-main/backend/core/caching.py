@@ -1,28 +1,376 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
 import redis
+import redis.asyncio as aioredis
 from core.config import settings
+from core.metrics import metrics, record_redis_command, cache_samples
 
-redis_client = None
-
-try:
-    # A connection pool is more efficient for web applications than creating a new connection for every request.
-    # decode_responses=True is very helpful as it decodes all responses from bytes to utf-8 strings.
-    pool = redis.ConnectionPool(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        db=0,
-        decode_responses=True
-    )
-    redis_client = redis.Redis(connection_pool=pool)
-    
-    # Check if the connection is successful by sending a PING command.
-    redis_client.ping()
-    print("✅ Successfully connected to Redis.")
-
-except redis.exceptions.ConnectionError as e:
-    print(f"⚠️ Could not connect to Redis: {e}")
-    print("Caching will be disabled. The application will run, but performance may be affected.")
-    redis_client = None
-
-except Exception as e:
-    print(f"An unexpected error occurred with Redis: {e}")
-    redis_client = None
\ No newline at end of file
+class RedisHandle:
+    """
+    A Redis client whose server may not be reachable (yet). It is falsy until `connect_redis`
+    has reached the server, so `if redis_client:` keeps meaning "Redis is usable", and it
+    forwards everything else to the wrapped client.
+    """
+    def __init__(self, client):
+        self._client = client
+        self.available = False
+
+    def __bool__(self):
+        return self.available
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# --- COMMAND TIMING ---
+# Every command (and every pipeline, as one round-trip) is timed for the metrics and the Redis
+# stage of the running span. Pub/sub listening goes through its own connection and is not timed.
+
+class _TimedPipeline(redis.client.Pipeline):
+    def execute(self, raise_on_error=True):
+        started = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            record_redis_command("PIPELINE", time.perf_counter() - started)
+
+
+class _TimedRedis(redis.Redis):
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            record_redis_command(args[0], time.perf_counter() - started)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return _TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class _AsyncTimedPipeline(aioredis.client.Pipeline):
+    async def execute(self, raise_on_error=True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            record_redis_command("PIPELINE", time.perf_counter() - started)
+
+
+class _AsyncTimedRedis(aioredis.Redis):
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            record_redis_command(args[0], time.perf_counter() - started)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return _AsyncTimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+_Redis, _AsyncRedis = (_TimedRedis, _AsyncTimedRedis) if settings.METRICS_ENABLED else (redis.Redis, aioredis.Redis)
+
+
+# Creating the clients does no network I/O, so importing this module never blocks on Redis;
+# they are enabled once connect_redis() (run from the app lifespan) gets an answer.
+# A connection pool is more efficient for web applications than creating a new connection for every request.
+# decode_responses=True is very helpful as it decodes all responses from bytes to utf-8 strings.
+pool = redis.ConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+    decode_responses=True,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+)
+redis_client = RedisHandle(_Redis(connection_pool=pool))
+
+# Async client for request handlers running on the event loop. It shares nothing with the
+# sync pool above (redis-py pools are not loop-aware).
+async_redis_client = RedisHandle(_AsyncRedis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+    decode_responses=True,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+))
+
+
+async def connect_redis(retry_interval: float = None) -> bool:
+    """
+    Pings Redis without blocking the event loop and enables both clients once it answers.
+    With `retry_interval` it keeps retrying in the background until Redis is reachable (the app
+    lifespan runs it as a task); otherwise it makes one attempt. Returns whether Redis is usable.
+    """
+    warned = False
+    while True:
+        try:
+            await asyncio.wait_for(async_redis_client.ping(), settings.REDIS_CONNECT_TIMEOUT)
+            redis_client.available = async_redis_client.available = True
+            print("✅ Successfully connected to Redis.")
+            return True
+        except (redis.exceptions.RedisError, OSError, asyncio.TimeoutError) as e:
+            if not warned:
+                print(f"⚠️ Could not connect to Redis: {e!r}")
+                print("Caching will be disabled. The application will run, but performance may be affected.")
+                warned = True
+            if retry_interval is None:
+                return False
+            await asyncio.sleep(retry_interval)
+
+
+async def close_redis():
+    redis_client.available = async_redis_client.available = False
+    await async_redis_client.aclose()
+    redis_client.close()
+
+
+class LRUCache:
+    """
+    A small thread-safe in-process cache with least-recently-used eviction and a per-entry TTL.
+    Used as the first tier in front of Redis; values are stored as-is (no serialization).
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds: float = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl_seconds or self._ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# --- TWO-TIER READ CACHE ---
+
+_INVALIDATION_CHANNEL = "read_cache:invalidate"
+_read_caches = {}  # namespace -> ReadCache, to apply invalidations published by other workers
+_listener_task = None
+_ORIGIN = uuid.uuid4().hex  # tags this process's invalidation messages so it skips its own
+
+
+class ReadCache:
+    """
+    Read-through cache for API reads (transcripts, reports, interview summaries, feedback lookups).
+    - Tier 1: an in-process LRUCache; tier 2: Redis (values stored as JSON), shared by all workers.
+    - Single-flight: concurrent misses for the same key in this process share one load.
+    - Writers call `invalidate` (or `clear`) after committing. Both tiers are cleared and the other
+      workers are told over Redis pub/sub to drop their tier-1 copy.
+    Values must be JSON-serializable and treated as read-only. Without Redis it is LRU plus
+    single-flight only, and Redis errors count as misses instead of failing the read.
+    """
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: int, local_ttl_seconds: int = None,
+                 clearable: bool = False):
+        self.namespace = namespace
+        self._ttl = ttl_seconds
+        self._local = LRUCache(max_entries, min(ttl_seconds, local_ttl_seconds or ttl_seconds))
+        # Only caches that need `clear` keep an index of their Redis keys.
+        self._clearable = clearable
+        self._flights = {}  # key -> asyncio.Task loading it
+        self._generation = 0  # bumped by every invalidation; loads that straddle one are not stored
+        self._counts = {"local_hits": 0, "redis_hits": 0, "loads": 0, "coalesced": 0, "invalidations": 0}
+        _read_caches[namespace] = self
+
+    def _redis_key(self, key: str) -> str:
+        return f"read:{self.namespace}:{key}"
+
+    def _index_key(self) -> str:
+        return f"read:{self.namespace}:_keys"
+
+    async def get_or_load(self, key, loader):
+        """
+        Returns the cached value of `key`, or awaits `loader()` (an async callable) once for all
+        concurrent callers. A None result is returned but not cached. The load runs as its own
+        task, so it must not depend on the caller's DB session, and a caller that goes away
+        doesn't cancel it for the others.
+        """
+        key = str(key)
+        value = self._local.get(key)
+        if value is not None:
+            self._counts["local_hits"] += 1
+            return value
+
+        _ensure_listener()
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._fill(key, loader))
+            self._flights[key] = flight
+
+            def landed(task):
+                if self._flights.get(key) is task:
+                    del self._flights[key]
+            flight.add_done_callback(landed)
+        else:
+            self._counts["coalesced"] += 1
+        return await asyncio.shield(flight)
+
+    def peek(self, key):
+        """Returns the tier-1 value of `key`, or None; never loads or touches Redis."""
+        return self._local.get(str(key))
+
+    async def _fill(self, key: str, loader):
+        generation = self._generation
+        if async_redis_client:
+            try:
+                cached = await async_redis_client.get(self._redis_key(key))
+            except redis.exceptions.RedisError as e:
+                print(f"Read cache '{self.namespace}': Redis read failed, loading from the source: {e}")
+                cached = None
+            if cached is not None:
+                self._counts["redis_hits"] += 1
+                value = json.loads(cached)
+                if generation == self._generation:
+                    self._local.set(key, value)
+                return value
+
+        self._counts["loads"] += 1
+        value = await loader()
+        if value is None or generation != self._generation:
+            return value
+        self._local.set(key, value)
+        if async_redis_client:
+            try:
+                pipe = async_redis_client.pipeline(transaction=False)
+                pipe.set(self._redis_key(key), json.dumps(value), ex=self._ttl)
+                if self._clearable:
+                    pipe.sadd(self._index_key(), key)
+                    pipe.expire(self._index_key(), self._ttl)
+                await pipe.execute()
+            except redis.exceptions.RedisError as e:
+                print(f"Read cache '{self.namespace}': Redis write failed: {e}")
+        return value
+
+    def _drop_local(self, keys):
+        """Drops `keys` (every key if None) from tier 1 and detaches their in-flight loads."""
+        self._generation += 1
+        self._counts["invalidations"] += 1
+        if keys is None:
+            self._local.clear()
+            self._flights.clear()
+            return
+        for key in keys:
+            self._local.delete(key)
+            self._flights.pop(key, None)
+
+    async def invalidate(self, *keys):
+        """Removes `keys` from both tiers in every worker. Call after the write has been committed."""
+        keys = [str(key) for key in keys]
+        self._drop_local(keys)
+        if async_redis_client:
+            try:
+                pipe = async_redis_client.pipeline(transaction=False)
+                pipe.delete(*[self._redis_key(key) for key in keys])
+                pipe.publish(_INVALIDATION_CHANNEL, json.dumps({"origin": _ORIGIN, "namespace": self.namespace, "keys": keys}))
+                await pipe.execute()
+            except redis.exceptions.RedisError as e:
+                print(f"Read cache '{self.namespace}': Redis invalidation failed: {e}")
+
+    async def clear(self):
+        """Removes every entry of a `clearable` cache from both tiers in every worker."""
+        self._drop_local(None)
+        if async_redis_client:
+            try:
+                keys = await async_redis_client.smembers(self._index_key())
+                pipe = async_redis_client.pipeline(transaction=False)
+                pipe.delete(self._index_key(), *[self._redis_key(key) for key in keys])
+                pipe.publish(_INVALIDATION_CHANNEL, json.dumps({"origin": _ORIGIN, "namespace": self.namespace, "keys": None}))
+                await pipe.execute()
+            except redis.exceptions.RedisError as e:
+                print(f"Read cache '{self.namespace}': Redis clear failed: {e}")
+
+    def stats(self) -> dict:
+        counts = dict(self._counts)
+        reads = counts["local_hits"] + counts["redis_hits"] + counts["loads"] + counts["coalesced"]
+        hits = counts["local_hits"] + counts["redis_hits"] + counts["coalesced"]
+        return {
+            "namespace": self.namespace,
+            "local_entries": len(self._local),
+            "in_flight": len(self._flights),
+            **counts,
+            "hit_ratio": round(hits / reads, 3) if reads else None,
+        }
+
+
+def _ensure_listener():
+    """Starts the pub/sub listener on the running loop, once, if Redis is available."""
+    global _listener_task
+    if not async_redis_client or (_listener_task is not None and not _listener_task.done()):
+        return
+    _listener_task = asyncio.get_running_loop().create_task(_listen_for_invalidations())
+
+
+async def _listen_for_invalidations():
+    pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(_INVALIDATION_CHANNEL)
+        async for message in pubsub.listen():
+            data = json.loads(message["data"])
+            if data.get("origin") == _ORIGIN:
+                continue
+            cache = _read_caches.get(data.get("namespace"))
+            if cache is not None:
+                cache._drop_local(data.get("keys"))
+    except redis.exceptions.RedisError as e:
+        print(f"Read cache invalidation listener stopped: {e}")
+    finally:
+        await pubsub.aclose()
+
+
+def read_cache_stats() -> list:
+    """Returns hit/load/invalidation counters of every read cache."""
+    return [cache.stats() for cache in _read_caches.values()]
+
+
+def _read_cache_metrics() -> list:
+    samples = []
+    for cache in list(_read_caches.values()):
+        counts = cache._counts
+        hits = counts["local_hits"] + counts["redis_hits"] + counts["coalesced"]
+        samples += cache_samples(f"read:{cache.namespace}", hits, counts["loads"])
+    return samples
+
+
+metrics.register_collector(_read_cache_metrics)
+
+
+# Transcript and report entries carry their HTTP validator (the ETag) next to the data.
+transcript_cache = ReadCache("transcript", settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_TTL,
+                             settings.READ_CACHE_LOCAL_TTL)
+report_cache = ReadCache("report", settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_TTL,
+                         settings.READ_CACHE_LOCAL_TTL)
+# Summary pages depend on many rows, so writes clear the whole cache and entries expire quickly;
+# message counts and warnings on a page can lag by up to READ_CACHE_SUMMARY_TTL.
+summary_cache = ReadCache("interview_summaries", settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_SUMMARY_TTL,
+                          clearable=True)
+# Feedback retrieval results are keyed by query; new feedback can change any of them.
+feedback_cache = ReadCache("feedback", settings.READ_CACHE_MAX_ENTRIES, settings.READ_CACHE_TTL,
+                           settings.READ_CACHE_LOCAL_TTL, clearable=True)
@@ -1,4 +1,5 @@
 # core/config.py
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -9,6 +10,118 @@ class Settings(BaseSettings):
     REDIS_PORT: int
     DATABASE_URL: str
 
+    LLM_BASE_URL: str = "https://api.groq.com/openai/v1"
+
+    # --- Redis connection (made in the background at startup) ---
+    REDIS_CONNECT_TIMEOUT: float = 2.0  # seconds per connection attempt
+    REDIS_RETRY_INTERVAL: float = 30.0  # seconds between attempts while Redis is unreachable
+
+    # --- LLM HTTP connection pools (shared per API key) ---
+    LLM_POOL_MAX_CONNECTIONS: int = 20
+    LLM_POOL_MAX_KEEPALIVE: int = 10
+    LLM_POOL_KEEPALIVE_EXPIRY: float = 120.0
+    LLM_REQUEST_TIMEOUT: float = 60.0
+
+    # --- Background jobs ---
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY: float = 2.0
+    JOB_STALE_SECONDS: int = 600
+    REPORT_WAIT_TIMEOUT: float = 30.0
+    JOB_POLL_INTERVAL: float = 0.5  # seconds between status checks of a job run by another process
+    JOB_SWEEP_INTERVAL: float = 60.0  # seconds between checks for interrupted or abandoned jobs
+    JOB_SHUTDOWN_TIMEOUT: float = 10.0  # seconds running jobs get to finish on shutdown
+
+    # --- Conversation cache ---
+    CONVERSATION_CACHE_SIZE: int = 1000  # interviews kept in process memory
+    CONVERSATION_CACHE_TTL: int = 6 * 3600  # seconds a history stays in Redis
+    CONVERSATION_CACHE_LOCAL_TTL: int = 60  # seconds in process; bounds staleness across workers while Redis is down
+
+    # --- API read cache (in-process LRU in front of Redis) ---
+    READ_CACHE_MAX_ENTRIES: int = 2048  # tier-1 entries per cached kind
+    READ_CACHE_TTL: int = 3600  # seconds in Redis
+    READ_CACHE_LOCAL_TTL: int = 60  # seconds in process; bounds staleness if an invalidation message is missed
+    READ_CACHE_SUMMARY_TTL: int = 10  # interview summary pages
+
+    # --- Feedback retrieval index (hashing vectorizer, memory-mapped) ---
+    FEEDBACK_INDEX_DIR: str = "feedback_index"
+    FEEDBACK_INDEX_DIM: int = 512
+    FEEDBACK_RETRIEVAL_K: int = 5  # feedback/suggestions given to the interviewer per prompt
+    # Feedback is retrieved once, when an interview starts, and stored with it: the interviewer's system
+    # prompt stays the same for the whole interview and a turn costs no extra DB query or index search.
+    # Per-turn retrieval re-ranks the feedback against the candidate's latest answers instead, at the
+    # cost of that query and search on every turn and a system prompt that changes mid-interview.
+    FEEDBACK_PER_TURN_RETRIEVAL: bool = False
+    FEEDBACK_QUERY_TURNS: int = 2  # latest candidate answers a per-turn retrieval query is built from
+
+    # --- Interviewer context compaction ---
+    CONTEXT_TOKEN_BUDGET: int = 6000  # estimated prompt tokens before older turns are summarised
+    CONTEXT_KEEP_MESSAGES: int = 8  # most recent messages always sent verbatim
+    CONTEXT_SUMMARY_BATCH: int = 6  # aged-out messages collected before the summary is updated
+    CONTEXT_SUMMARY_MAX_TOKENS: int = 400
+
+    # --- LLM response cache (evaluator / feedback agents) ---
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.5  # agents sampling hotter than this are never cached
+
+    # --- Proctoring face detection ---
+    PROCTORING_FAST_MODE: bool = True  # downscaled detection with ROI tracking
+    PROCTORING_DETECT_WIDTH: int = 320  # frames are downscaled to this width for face detection
+    PROCTORING_FULL_SEARCH_INTERVAL: int = 5  # frames between forced full-frame searches
+    PROCTORING_ROI_PADDING: float = 0.5  # tracked window padding, as a fraction of the face size
+
+    # --- Proctoring detector backend ---
+    PROCTORING_DETECTOR_BACKEND: str = "haar"  # haar | dnn | landmark_gaze
+    PROCTORING_DNN_PROTOTXT: str = "face_models/deploy.prototxt"
+    PROCTORING_DNN_WEIGHTS: str = "face_models/res10_300x300_ssd_iter_140000.caffemodel"
+    PROCTORING_YUNET_MODEL: str = "face_models/face_detection_yunet_2023mar.onnx"
+    PROCTORING_DNN_CONFIDENCE: float = 0.6  # minimum face score for the dnn and landmark_gaze backends
+    PROCTORING_GAZE_MAX_YAW: float = 0.3  # landmark_gaze: nose offset / eye distance still counted as facing the screen
+
+    # --- Proctoring frame analysis ---
+    # None = the available cores shared among the server's worker processes, 0 = no process pool
+    PROCTORING_POOL_WORKERS: Optional[int] = None
+    WEB_CONCURRENCY: int = 1  # uvicorn/gunicorn worker processes (the variable uvicorn reads for --workers)
+    PROCTORING_FRAME_BUFFER: int = 1  # frames buffered per session before the oldest are dropped
+    PROCTORING_MAX_FRAMES_PER_MESSAGE: int = 8  # compact frame protocol
+    PROCTORING_MAX_FRAME_PIXELS: int = 1920 * 1080  # largest raw luma plane accepted
+
+    # --- Proctoring event log (write-behind) ---
+    PROCTORING_EVENT_BATCH_SIZE: int = 50
+    PROCTORING_EVENT_FLUSH_INTERVAL: float = 1.0  # seconds
+    PROCTORING_EVENT_WRITE_RETRIES: int = 3  # a failed batch is retried this many times, then logged and dropped
+    PROCTORING_EVENT_RETRY_INTERVAL: float = 1.0  # seconds before the first retry, doubling after each
+
+    # --- LLM rate limiting (per API key, shared across workers through Redis) ---
+    LLM_RATE_LIMIT_ENABLED: bool = False  # opt in, with RPM/TPM set to the key's tier
+    LLM_RATE_LIMIT_RPM: int = 30  # requests per minute per key
+    LLM_RATE_LIMIT_TPM: int = 8000  # tokens per minute per key
+    LLM_RATE_LIMIT_COMPLETION_ESTIMATE: int = 512  # completion tokens reserved per request until usage is known
+    LLM_RATE_LIMIT_MAX_RETRIES: int = 4  # retries after a 429
+    LLM_RATE_LIMIT_RETRY_BASE_DELAY: float = 1.0  # seconds, doubled per retry
+
+    # --- Interviewer hedged requests / model fallback ---
+    LLM_FALLBACK_MODEL: Optional[str] = None  # hedging is off unless a fallback model is set
+    LLM_FALLBACK_BASE_URL: Optional[str] = None  # defaults to LLM_BASE_URL
+    LLM_FALLBACK_API_KEY: Optional[str] = None  # defaults to GROQ_API_KEY_INTERVIEWER
+    LLM_HEDGE_PERCENTILE: float = 95  # hedge once a turn is slower than this percentile of the model's latency
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # latency samples needed before the percentile is trusted
+    LLM_HEDGE_INITIAL_DELAY: float = 10.0  # seconds, hedge delay until then
+    LLM_HEDGE_MIN_DELAY: float = 0.5  # seconds, never hedge sooner than this
+
+    # --- Metrics (Prometheus text format on /metrics) ---
+    METRICS_ENABLED: bool = True  # spans, DB/Redis/LLM timings and token counts
+
+    # --- Bulk export ---
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched (and encoded) per batch
+
+    # --- Batch simulations ---
+    SIMULATION_CONCURRENCY: int = 4  # simulations in flight per batch
+    SIMULATION_MAX_ATTEMPTS: int = 3
+    SIMULATION_RETRY_BASE_DELAY: float = 2.0  # seconds, doubled per attempt
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,54 @@
+# core/latency.py
+import threading
+from collections import deque
+
+
+class LatencyTracker:
+    """
+    Keeps a bounded window of recent latency samples (in seconds) per metric name
+    and answers percentile queries over it. Cheap enough to call on every request.
+    """
+    def __init__(self, window: int = 1000):
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples = {}  # name -> deque of recent samples
+        self._counts = {}   # name -> total samples ever recorded
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._window)
+            samples.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def count(self, name: str) -> int:
+        """Returns how many samples are currently in the window for `name`."""
+        with self._lock:
+            return len(self._samples.get(name, ()))
+
+    def percentile(self, name: str, pct: float):
+        """Returns the `pct` percentile of the recent samples, or None if there are none yet."""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        """Returns count and p50/p95/p99 (in milliseconds) for every tracked metric."""
+        with self._lock:
+            names = list(self._samples)
+        result = {}
+        for name in names:
+            result[name] = {
+                "count": self._counts.get(name, 0),
+                "p50_ms": round(self.percentile(name, 50) * 1000, 1),
+                "p95_ms": round(self.percentile(name, 95) * 1000, 1),
+                "p99_ms": round(self.percentile(name, 99) * 1000, 1),
+            }
+        return result
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,350 @@
+# core/metrics.py
+"""
+In-process metrics for the hot paths, exposed in Prometheus text format on `/metrics`.
+
+- Counters, gauges and histograms with fixed label names. Recording a value takes one lock and a
+  bisect, a few microseconds, so instrumentation stays on in production.
+- `timed` / `span` measure service functions, orchestrator methods and frame analysis.
+- The DB, Redis and LLM hooks also report their time to the outermost running span
+  (`add_stage_time`). Per operation you get a histogram of the time spent in each stage, so a slow
+  chat turn can be attributed to SQL, Redis or the model call.
+- Components that already keep counters (caches, proctoring sessions) register collectors, which
+  are read only at scrape time.
+
+Every worker process keeps its own metrics; with several uvicorn workers, scrape each of them
+(or put them behind a per-worker port).
+"""
+import asyncio
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from core.config import settings
+
+# Seconds; covers sub-millisecond Redis calls up to slow LLM turns.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}  # tuple of label values -> value (or histogram state)
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, labels=(), value: float = 0):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, labels=(), amount: float = 1):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels=(), value: float = 0):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (not cumulative) counts, plus the sum; cumulated when rendered.
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self._header()
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels=()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels=()) -> Gauge:
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def register_collector(self, collect):
+        """
+        Adds a scrape-time callback that returns a list of
+        (name, kind, help, {label: value}, value) samples.
+        """
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        families = {}
+        for collect in list(self._collectors):
+            try:
+                samples = collect()
+            except Exception as e:
+                print(f"Metrics collector {getattr(collect, '__qualname__', collect)} failed: {e}")
+                continue
+            for name, kind, help_text, labels, value in samples:
+                if value is None:
+                    continue
+                family = families.setdefault(name, [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+                family.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        for family in families.values():
+            lines.extend(family)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+span_duration = metrics.histogram(
+    "app_span_duration_seconds", "Duration of instrumented service functions, agent methods and frame analysis.", ["span"]
+)
+span_errors = metrics.counter("app_span_errors_total", "Instrumented calls that raised.", ["span"])
+stage_duration = metrics.histogram(
+    "app_span_stage_duration_seconds",
+    "Time an outermost span spent in each stage (db, redis, llm), per call.", ["span", "stage"],
+)
+db_query_duration = metrics.histogram("db_query_duration_seconds", "SQL statement execution time.", ["operation"])
+redis_command_duration = metrics.histogram("redis_command_duration_seconds", "Redis command round-trip time.", ["command"])
+llm_request_duration = metrics.histogram(
+    "llm_request_duration_seconds",
+    "LLM HTTP request time (until the response headers for streamed completions).", ["agent", "model"],
+)
+llm_tokens = metrics.counter("llm_tokens_total", "LLM tokens per agent and model.", ["agent", "model", "type"])
+websocket_connections = metrics.gauge("websocket_connections_active", "Open WebSocket connections.", ["endpoint"])
+
+
+# --- SPANS ---
+
+class _Span:
+    """A running span; used as a context manager, or driven by the async generator wrapper in `timed`."""
+    __slots__ = ("name", "root", "stages", "started", "_token")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def start(self):
+        parent = _current_span.get()
+        self.root = self if parent is None else parent.root
+        self.stages = {} if parent is None else None
+        self.started = time.perf_counter()
+
+    def finish(self, exc_type=None):
+        span_duration.observe((self.name,), time.perf_counter() - self.started)
+        # A cancelled call (client gone, hedged-out request) or a closed generator is not a failure.
+        if exc_type is not None and not issubclass(exc_type, (GeneratorExit, asyncio.CancelledError)):
+            span_errors.inc((self.name,))
+        if self.root is self:
+            for stage, seconds in self.stages.items():
+                stage_duration.observe((self.name, stage), seconds)
+
+    def __enter__(self):
+        self.start()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.finish(exc_type)
+        return False
+
+
+_current_span = contextvars.ContextVar("metrics_span", default=None)
+
+
+def add_stage_time(stage: str, seconds: float):
+    """Adds `seconds` of `stage` work to the outermost span running in this task or thread, if any."""
+    current = _current_span.get()
+    if current is not None:
+        stages = current.root.stages
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def span(name: str) -> _Span:
+    """Times a `with` block as `name`; DB, Redis and LLM time inside it goes to the outermost span."""
+    return _Span(name)
+
+
+def _span_name(func) -> str:
+    if "." in func.__qualname__:
+        return func.__qualname__
+    return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+
+def timed(name: str = None):
+    """
+    Decorator version of `span` for sync functions, coroutine functions and async generators.
+    The span name defaults to `Class.method` or `module.function`. A no-op if METRICS_ENABLED is off.
+    """
+    def decorate(func):
+        if not settings.METRICS_ENABLED:
+            return func
+        span_name = name or _span_name(func)
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def agen_wrapper(*args, **kwargs):
+                # The span is current only while the generator body runs, never in the consumer
+                # between items, so it can't leak into (or be reset from) another context.
+                current = _Span(span_name)
+                current.start()
+                generator = func(*args, **kwargs)
+                exc_type = None
+                try:
+                    while True:
+                        token = _current_span.set(current)
+                        try:
+                            item = await generator.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            _current_span.reset(token)
+                        yield item
+                except BaseException as e:
+                    exc_type = type(e)
+                    raise
+                finally:
+                    await generator.aclose()
+                    current.finish(exc_type)
+            return agen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _Span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def track_websocket(endpoint: str):
+    """Decorator for WebSocket handlers: counts the connection as active while the handler runs."""
+    def decorate(handler):
+        websocket_connections.inc((endpoint,), 0)  # exported as 0 before the first connection
+
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            websocket_connections.inc((endpoint,))
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                websocket_connections.dec((endpoint,))
+        return wrapper
+
+    return decorate
+
+
+# --- STAGE HOOKS ---
+
+def record_db_query(statement: str, seconds: float):
+    operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
+    db_query_duration.observe((operation,), seconds)
+    add_stage_time("db", seconds)
+
+
+def record_redis_command(command, seconds: float):
+    redis_command_duration.observe((str(command).upper(),), seconds)
+    add_stage_time("redis", seconds)
+
+
+def record_llm_request(agent: str, model: str, seconds: float, prompt_tokens=None, completion_tokens=None,
+                       streamed: bool = False):
+    """For streamed completions the caller adds the stage time and tokens once the stream ends."""
+    llm_request_duration.observe((agent, model), seconds)
+    if not streamed:
+        add_stage_time("llm", seconds)
+        record_llm_tokens(agent, model, prompt_tokens, completion_tokens)
+
+
+def record_llm_tokens(agent: str, model: str, prompt_tokens=None, completion_tokens=None):
+    if prompt_tokens:
+        llm_tokens.inc((agent, model, "prompt"), prompt_tokens)
+    if completion_tokens:
+        llm_tokens.inc((agent, model, "completion"), completion_tokens)
+
+
+def cache_samples(cache: str, hits: int, misses: int) -> list:
+    """Collector samples for a cache's hit/miss counters and hit ratio."""
+    lookups = hits + misses
+    return [
+        ("cache_lookups_total", "counter", "Cache lookups by result.", {"cache": cache, "result": "hit"}, hits),
+        ("cache_lookups_total", "counter", "Cache lookups by result.", {"cache": cache, "result": "miss"}, misses),
+        ("cache_hit_ratio", "gauge", "Share of cache lookups served from the cache since startup.",
+         {"cache": cache}, round(hits / lookups, 4) if lookups else None),
+    ]
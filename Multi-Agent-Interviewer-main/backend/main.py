@@ -1,13 +1,64 @@
 # main.py
+import asyncio
+import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from api.endpoints import router as api_router
+from core.caching import connect_redis, close_redis
+from core.config import settings
 from core.database import create_db_and_tables
+from core.metrics import metrics
+from services.jobs import job_queue
+from services.proctoring_events import proctoring_event_log
 
-# Create database tables on startup
-create_db_and_tables()
 
-app = FastAPI(title="AI Interviewer Backend")
+def warm_heavy_modules():
+    """
+    Loads the OpenAI SDK and OpenCV, builds the agents' LLM clients and starts the frame-analysis
+    workers. Runs on a worker thread after startup; requests that arrive first load what they need.
+    """
+    try:
+        from agents.proctoring_agent import warm_proctoring
+        from agents.interview_autogen import warm_agents
+        warm_proctoring()
+        warm_agents()
+    except Exception as e:
+        print(f"Background warm-up failed; modules will load on first use instead: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing this module has no side effects; startup work happens here.
+    # Tables are needed by the first request, so they are created before serving. Redis is
+    # connected, and the heavy modules warmed, in the background: the worker starts serving
+    # right away and never hangs on an unreachable Redis (it runs without caching until then).
+    await asyncio.to_thread(create_db_and_tables)
+    # Job workers, plus the sweeper that resumes jobs interrupted by the previous shutdown.
+    job_queue.start()
+    redis_task = asyncio.create_task(connect_redis(retry_interval=settings.REDIS_RETRY_INTERVAL))
+    warm_task = asyncio.create_task(asyncio.to_thread(warm_heavy_modules))
+    yield
+    redis_task.cancel()
+    # Lets running jobs (e.g. report generation) finish briefly; the rest resume at the next startup.
+    await job_queue.shutdown()
+    # Write out any buffered proctoring events before the process exits.
+    await proctoring_event_log.shutdown()
+    # getattr: the warm-up may still be importing the module, in which case no pool was started.
+    shutdown_frame_pool = getattr(sys.modules.get("agents.proctoring_agent"), "shutdown_frame_pool", None)
+    if shutdown_frame_pool is not None:
+        shutdown_frame_pool()
+    if not warm_task.done():
+        print("Shutting down before the background warm-up finished.")
+    # Closes the keep-alive LLM connections, if anything opened them (jobs have stopped by now).
+    client_pool = getattr(sys.modules.get("agents.llm_clients"), "client_pool", None)
+    if client_pool is not None:
+        await client_pool.aclose()
+    await close_redis()
+
+
+app = FastAPI(title="AI Interviewer Backend", lifespan=lifespan)
 
 # CORS middleware to allow requests from the React frontend
 app.add_middleware(
@@ -25,4 +76,9 @@ app.include_router(api_router, prefix="/api")
 
 @app.get("/")
 def read_root():
-    return {"message": "Welcome to the AI Interviewer API"}
\ No newline at end of file
+    return {"message": "Welcome to the AI Interviewer API"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint: span, DB, Redis and LLM latencies, token counts, cache hit ratios and open WebSockets."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Dict
+from datetime import datetime
 
 # --- Base Schemas for ORM models ---
 # These define the basic fields for creating or reading data.
@@ -28,6 +29,19 @@ class Report(ReportBase):
     class Config:
         from_attributes = True
 
+class ProctoringEvent(BaseModel):
+    id: int
+    interview_id: int
+    created_at: datetime
+    anomaly_type: str
+    message: Optional[str] = None
+    face_count: Optional[int] = None
+    frame_width: Optional[int] = None
+    analysis_ms: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
 class InterviewBase(BaseModel):
     candidate_name: str
 
@@ -42,12 +56,26 @@ class Interview(InterviewBase):
         from_attributes = True
 
 
+class InterviewSummary(BaseModel):
+    id: int
+    candidate_name: str
+    status: str
+    warnings: int
+    score: Optional[int] = None
+    message_count: int
+
+class InterviewSummaryPage(BaseModel):
+    items: List[InterviewSummary]
+    next_before_id: Optional[int] = None # Pass as `before_id` to fetch the next (older) page
+
+
 # --- API Endpoint Specific Schemas ---
 # These define the exact shape of request bodies and responses for our endpoints.
 
 # For POST /interview/start
 class InterviewStartRequest(BaseModel):
     candidate_name: str
+    topic: Optional[str] = None  # e.g. "financial modelling"; steers which past feedback is retrieved
 
 class InterviewStartResponse(BaseModel):
     interviewId: int
@@ -60,6 +88,8 @@ class ChatMessageRequest(BaseModel):
 class ChatMessageResponse(BaseModel):
     message: str
     isTerminated: bool
+    reportJobId: Optional[int] = None
+    promptTokensSaved: Optional[int] = None
 
 # For POST /feedback
 class FeedbackCreate(BaseModel):
@@ -70,10 +100,47 @@ class FeedbackResponse(BaseModel):
     status: str
     message: str
 
+# For GET /jobs/{job_id}
+class JobStatus(BaseModel):
+    id: int
+    kind: str
+    dedupe_key: str
+    status: str
+    attempts: int
+    last_error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 # For POST /simulation/run
 class SimulationMessage(BaseModel):
     sender: str
     text: str
 
 class SimulationResponse(BaseModel):
-    transcript: List[SimulationMessage]
\ No newline at end of file
+    transcript: List[SimulationMessage]
+
+# For POST /simulations/batches
+class SimulationBatchRequest(BaseModel):
+    name: Optional[str] = None
+    personas: List[str] = ["intermediate"]  # built-in persona names, or keys of custom_personas
+    custom_personas: Dict[str, str] = {}  # persona name -> candidate system message
+    round_counts: List[int] = [8]
+    repeats: int = 1
+    concurrency: Optional[int] = None
+
+class SimulationCellResult(BaseModel):
+    persona: str
+    rounds: int
+    runs: int
+    evaluated: int
+    avg_score: Optional[float] = None
+
+class SimulationBatchStatus(BaseModel):
+    id: int
+    name: Optional[str] = None
+    status: str
+    total_runs: int
+    counts: Dict[str, int]
+    simulations_per_minute: Optional[float] = None
+    results: List[SimulationCellResult]
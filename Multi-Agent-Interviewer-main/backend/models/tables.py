@@ -1,5 +1,5 @@
 # models/tables.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -13,6 +13,8 @@ class Interview(Base):
     candidate_name = Column(String, index=True)
     status = Column(String, default="started")
     warnings = Column(Integer, default=0)
+    # Feedback retrieved for the interviewer's prompt when the interview started, reused on every turn.
+    past_feedback = Column(Text, nullable=True)
     messages = relationship("Message", back_populates="interview")
     report = relationship("Report", uselist=False, back_populates="interview")
     feedback = relationship("AgentFeedback", back_populates="interview")
@@ -22,7 +24,7 @@ class Message(Base):
     # ... (no changes to this model)
     __tablename__ = "messages"
     id = Column(Integer, primary_key=True, index=True)
-    interview_id = Column(Integer, ForeignKey("interviews.id"))
+    interview_id = Column(Integer, ForeignKey("interviews.id"), index=True)
     sender = Column(String)
     text = Column(Text)
     interview = relationship("Interview", back_populates="messages")
@@ -48,4 +50,78 @@ class AgentFeedback(Base):
     feedback_text = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    interview = relationship("Interview", back_populates="feedback")
\ No newline at end of file
+    interview = relationship("Interview", back_populates="feedback")
+
+
+class AgentSuggestion(Base):
+    """An improvement suggestion the Feedback_Agent derived from one piece of admin feedback."""
+    __tablename__ = "agent_suggestions"
+    id = Column(Integer, primary_key=True, index=True)
+    interview_id = Column(Integer, ForeignKey("interviews.id"), index=True)
+    feedback_id = Column(Integer, ForeignKey("agent_feedback.id"), index=True)
+    suggestion_text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Job(Base):
+    """A background job (e.g. report generation). `dedupe_key` makes each job idempotent per target."""
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    dedupe_key = Column(String, unique=True, nullable=False)
+    status = Column(String, default="queued", index=True)  # queued | running | succeeded | failed | interrupted
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ProctoringEvent(Base):
+    """One proctoring anomaly (i.e. one warning) with the stats of the frame that triggered it."""
+    __tablename__ = "proctoring_events"
+    id = Column(Integer, primary_key=True, index=True)
+    interview_id = Column(Integer, ForeignKey("interviews.id"), index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    anomaly_type = Column(String, nullable=False)  # multiple_faces | no_face | looking_away | head_position
+    message = Column(Text)
+    face_count = Column(Integer)
+    frame_width = Column(Integer)
+    analysis_ms = Column(Float)
+
+
+class SimulationBatch(Base):
+    """A batch of simulated interviews over a persona x round-count matrix."""
+    __tablename__ = "simulation_batches"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String)
+    status = Column(String, default="queued")  # queued | running | completed | failed
+    personas = Column(Text, nullable=False)  # JSON object: persona name -> candidate system message
+    concurrency = Column(Integer)
+    total_runs = Column(Integer, default=0)
+    simulations_per_minute = Column(Float)  # throughput of the most recent execution
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    runs = relationship("SimulationRun", back_populates="batch")
+
+
+class SimulationRun(Base):
+    """
+    One simulation in a batch. The transcript is checkpointed as soon as the simulation finishes,
+    so an interrupted batch resumes with only the unfinished simulations and evaluations.
+    """
+    __tablename__ = "simulation_runs"
+    __table_args__ = (UniqueConstraint("batch_id", "persona", "rounds", "repeat_index"),)
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(Integer, ForeignKey("simulation_batches.id"), index=True)
+    persona = Column(String, nullable=False)
+    rounds = Column(Integer, nullable=False)
+    repeat_index = Column(Integer, default=0)
+    status = Column(String, default="pending", index=True)  # pending | simulated | evaluated | failed
+    attempts = Column(Integer, default=0)
+    transcript = Column(Text)  # JSON list of {"sender", "text"}
+    report = Column(Text)  # Evaluation_Agent JSON
+    score = Column(Integer)
+    duration_seconds = Column(Float)
+    last_error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    batch = relationship("SimulationBatch", back_populates="runs")
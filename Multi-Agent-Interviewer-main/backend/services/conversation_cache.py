@@ -0,0 +1,165 @@
+# services/conversation_cache.py
+import json
+import time
+import redis
+from collections import OrderedDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from core.caching import async_redis_client
+from core.metrics import metrics, cache_samples
+from models import tables
+
+
+def _to_chat_message(sender: str, text: str) -> dict:
+    return {"role": "assistant" if sender == 'ai' else "user", "content": text}
+
+
+class ConversationCache:
+    """
+    Write-through cache of each interview's chat history in OpenAI message format.
+    - Tier 1: an in-process LRU of interview_id -> list of messages, kept for `local_ttl_seconds`.
+    - Tier 2: a Redis list per interview, shared by all workers.
+    Turns are appended to both tiers after they are committed, so a turn costs O(1)
+    cache work; the messages table is only read when neither tier has the interview.
+    Redis errors never fail a turn: a failed read falls back to the DB and a failed write is skipped.
+    """
+    def __init__(self, max_interviews: int, ttl_seconds: int, local_ttl_seconds: float):
+        self._local = OrderedDict()  # interview_id -> (expires_at, list of chat messages)
+        self._max_interviews = max_interviews
+        self._ttl = ttl_seconds
+        # Without Redis, a worker can't see turns appended by other workers; expiring the
+        # local copy bounds how long it serves such a stale history.
+        self._local_ttl = local_ttl_seconds
+        self._counts = {"local_hits": 0, "redis_hits": 0, "db_loads": 0}
+
+    @staticmethod
+    def _redis_key(interview_id: int) -> str:
+        return f"conversation:{interview_id}"
+
+    def _remember(self, interview_id: int, history: list):
+        self._local[interview_id] = (time.monotonic() + self._local_ttl, history)
+        self._local.move_to_end(interview_id)
+        while len(self._local) > self._max_interviews:
+            self._local.popitem(last=False)
+
+    def _local_history(self, interview_id: int):
+        item = self._local.get(interview_id)
+        if item is None:
+            return None
+        expires_at, history = item
+        if expires_at < time.monotonic():
+            del self._local[interview_id]
+            return None
+        self._local.move_to_end(interview_id)
+        return history
+
+    async def _catch_up(self, interview_id: int, history: list) -> bool:
+        """Appends turns another worker added to Redis. Returns False if Redis couldn't be read."""
+        key = self._redis_key(interview_id)
+        try:
+            length = await async_redis_client.llen(key)
+            if length > len(history):
+                tail = await async_redis_client.lrange(key, len(history), -1)
+                history.extend(json.loads(item) for item in tail)
+        except redis.exceptions.RedisError as e:
+            print(f"Conversation cache: Redis read failed for interview {interview_id}, loading from the DB: {e}")
+            return False
+        return True
+
+    async def get(self, db: AsyncSession, interview_id: int) -> list:
+        """Returns a copy of the interview's chat history, hydrating from Redis or the DB on a miss."""
+        history = self._local_history(interview_id)
+        if history is not None:
+            # Another worker may have appended turns; catch up on just the missing tail. If Redis
+            # can't tell, the local copy may be behind, so it is reloaded from the DB instead.
+            if not async_redis_client or await self._catch_up(interview_id, history):
+                self._counts["local_hits"] += 1
+                return list(history)
+            self._local.pop(interview_id, None)
+
+        elif async_redis_client:
+            try:
+                cached = await async_redis_client.lrange(self._redis_key(interview_id), 0, -1)
+            except redis.exceptions.RedisError as e:
+                print(f"Conversation cache: Redis read failed for interview {interview_id}, loading from the DB: {e}")
+                cached = None
+            if cached:
+                self._counts["redis_hits"] += 1
+                history = [json.loads(item) for item in cached]
+                self._remember(interview_id, history)
+                return list(history)
+
+        self._counts["db_loads"] += 1
+        result = await db.execute(
+            select(tables.Message.sender, tables.Message.text)
+            .filter(tables.Message.interview_id == interview_id)
+            .order_by(tables.Message.id)
+        )
+        history = [_to_chat_message(sender, text) for sender, text in result.all()]
+        await self._store(interview_id, history)
+        return list(history)
+
+    async def _store(self, interview_id: int, history: list):
+        self._remember(interview_id, history)
+        if async_redis_client and history:
+            key = self._redis_key(interview_id)
+            try:
+                pipe = async_redis_client.pipeline(transaction=True)
+                pipe.delete(key)
+                pipe.rpush(key, *[json.dumps(message) for message in history])
+                pipe.expire(key, self._ttl)
+                await pipe.execute()
+            except redis.exceptions.RedisError as e:
+                print(f"Conversation cache: Redis write failed for interview {interview_id}: {e}")
+
+    async def append(self, interview_id: int, *messages: dict):
+        """Appends committed turns to both tiers. Tiers that don't hold the interview are left to hydrate later."""
+        history = self._local_history(interview_id)
+        if history is not None:
+            history.extend(messages)
+        if async_redis_client:
+            key = self._redis_key(interview_id)
+            try:
+                pipe = async_redis_client.pipeline(transaction=True)
+                # RPUSHX only appends to an existing list, so a partial history is never created.
+                pipe.rpushx(key, *[json.dumps(message) for message in messages])
+                pipe.expire(key, self._ttl)
+                await pipe.execute()
+            except redis.exceptions.RedisError as e:
+                print(f"Conversation cache: Redis write failed for interview {interview_id}, dropping its cached history: {e}")
+                # The Redis list may now be missing this turn; drop it so every worker reloads from the DB.
+                await self._delete_shared(interview_id)
+
+    async def start(self, interview_id: int, messages: list):
+        """Seeds the cache for a brand-new interview."""
+        await self._store(interview_id, list(messages))
+
+    async def invalidate(self, interview_id: int):
+        self._local.pop(interview_id, None)
+        if async_redis_client:
+            await self._delete_shared(interview_id)
+
+    async def _delete_shared(self, interview_id: int):
+        try:
+            await async_redis_client.delete(self._redis_key(interview_id))
+        except redis.exceptions.RedisError as e:
+            print(f"Conversation cache: Redis delete failed for interview {interview_id}: {e}")
+
+    def stats(self) -> dict:
+        return {"local_interviews": len(self._local), **self._counts}
+
+
+conversation_cache = ConversationCache(
+    max_interviews=settings.CONVERSATION_CACHE_SIZE,
+    ttl_seconds=settings.CONVERSATION_CACHE_TTL,
+    local_ttl_seconds=settings.CONVERSATION_CACHE_LOCAL_TTL,
+)
+
+
+def _conversation_cache_metrics() -> list:
+    counts = conversation_cache.stats()
+    return cache_samples("conversation", counts["local_hits"] + counts["redis_hits"], counts["db_loads"])
+
+
+metrics.register_collector(_conversation_cache_metrics)
@@ -0,0 +1,247 @@
+# services/export.py
+"""
+Streaming bulk export of interviews, messages, reports, feedback and agent suggestions for the
+analytics warehouse, one table per file.
+
+- Rows are read through a streaming result with `yield_per` (a server-side cursor on PostgreSQL),
+  one batch of EXPORT_BATCH_SIZE rows at a time, and encoded as they arrive, so memory stays flat
+  whatever the table size.
+- Formats: NDJSON (one JSON object per row), optionally gzip-compressed; or Parquet, one row group
+  per batch, when pyarrow is installed (compression is then Parquet's own codec, so the file stays
+  readable by any Parquet reader).
+- Incremental exports: rows with an id above `after_id` (the watermark of the previous export) and,
+  for tables with a `created_at`, at or after `since`. Each export is bounded by the highest id at
+  its start, which becomes the next watermark.
+  Interview rows change after they are created (status, warnings); an id watermark only picks up
+  new interviews, so re-export that table in full when the changes matter.
+
+API: GET /export/{table}?format=ndjson&compression=gzip&after_id=N (watermark in X-Export-Watermark).
+CLI, from the backend directory:
+    python -m services.export --out exports --state exports/watermarks.json
+    python -m services.export --tables messages reports --format parquet --after-id 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import zlib
+from datetime import datetime
+from sqlalchemy import select, func
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models import tables
+
+EXPORT_TABLES = {
+    "interviews": tables.Interview,
+    "messages": tables.Message,
+    "reports": tables.Report,
+    "feedback": tables.AgentFeedback,
+    "agent_suggestions": tables.AgentSuggestion,
+}
+FORMATS = ("ndjson", "parquet")
+COMPRESSIONS = ("gzip", "none")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__} values.")
+
+
+class _NdjsonEncoder:
+    def __init__(self, compression: str):
+        # wbits=31: a gzip container, so the output is a regular .gz file.
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compression == "gzip" else None
+
+    def encode(self, rows) -> bytes:
+        data = "".join(json.dumps(dict(row), default=_json_default) + "\n" for row in rows).encode()
+        return self._compressor.compress(data) if self._compressor else data
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+
+class _ChunkSink:
+    """A write-only file object that hands what the Parquet writer wrote so far to the stream."""
+    def __init__(self):
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class _ParquetEncoder:
+    def __init__(self, model, compression: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(), str: pa.string(), datetime: pa.timestamp("us")}
+        self._pa = pa
+        self._schema = pa.schema([(column.name, types[column.type.python_type]) for column in model.__table__.columns])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression=compression)
+
+    def encode(self, rows) -> bytes:
+        self._writer.write_table(self._pa.Table.from_pylist([dict(row) for row in rows], schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()  # writes the footer
+        return self._sink.drain()
+
+
+class TableExport:
+    """
+    One table's export. Call `prepare` (validates the options, fixes the upper id bound), then
+    iterate `chunks` for the encoded bytes; `rows` and `watermark` are set as it goes.
+    """
+    def __init__(self, table: str, format: str = "ndjson", compression: str = "gzip",
+                 after_id: int = 0, since: datetime = None):
+        self.table = table
+        self.format = format
+        self.compression = compression
+        self.after_id = after_id or 0
+        self.since = since
+        self.watermark = self.after_id
+        self.rows = 0
+
+    @property
+    def filename(self) -> str:
+        if self.format == "parquet":
+            return f"{self.table}-{self.after_id}-{self.watermark}.parquet"
+        suffix = ".gz" if self.compression == "gzip" else ""
+        return f"{self.table}-{self.after_id}-{self.watermark}.ndjson{suffix}"
+
+    @property
+    def media_type(self) -> str:
+        if self.format == "ndjson" and self.compression == "gzip":
+            return "application/gzip"
+        return MEDIA_TYPES[self.format]
+
+    def _model(self):
+        return EXPORT_TABLES[self.table]
+
+    async def prepare(self):
+        """Raises ValueError for invalid options; otherwise records the id the export stops at."""
+        if self.table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table '{self.table}'. Exportable tables: {', '.join(EXPORT_TABLES)}.")
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown format '{self.format}'. Formats: {', '.join(FORMATS)}.")
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{self.compression}'. Compressions: {', '.join(COMPRESSIONS)}.")
+        if self.since is not None and "created_at" not in self._model().__table__.columns:
+            raise ValueError(f"Table '{self.table}' has no created_at column; use an id watermark (after_id).")
+        if self.format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ValueError("Parquet export needs pyarrow (pip install pyarrow); use format=ndjson instead.")
+
+        model = self._model()
+        async with AsyncSessionLocal() as db:
+            max_id = await db.scalar(select(func.max(model.id)))
+        # Rows added while the export streams are left for the next one.
+        self.watermark = max(self.after_id, max_id or 0)
+
+    def _query(self):
+        model = self._model()
+        # Plain columns rather than ORM entities, so rows don't pile up in a session identity map.
+        query = (
+            select(*model.__table__.columns)
+            .where(model.id > self.after_id, model.id <= self.watermark)
+            .order_by(model.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        if self.since is not None:
+            query = query.where(model.created_at >= self.since)
+        return query
+
+    async def chunks(self):
+        """Yields the encoded export. Opens its own session, since it outlives the request handler."""
+        if self.format == "parquet":
+            encoder = _ParquetEncoder(self._model(), "gzip" if self.compression == "gzip" else "none")
+        else:
+            encoder = _NdjsonEncoder(self.compression)
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(self._query())
+            async for batch in result.mappings().partitions():
+                self.rows += len(batch)
+                data = encoder.encode(batch)
+                if data:
+                    yield data
+        data = encoder.finish()
+        if data:
+            yield data
+
+
+# --- CLI ---
+
+def _load_state(path: str) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_state(path: str, state: dict):
+    # Written after every table, through a temporary file, so an interrupted run keeps the finished tables.
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+async def _main(args):
+    os.makedirs(args.out, exist_ok=True)
+    state = _load_state(args.state)
+    since = datetime.fromisoformat(args.since) if args.since else None
+    for table in args.tables:
+        after_id = args.after_id if args.after_id is not None else state.get(table, 0)
+        export = TableExport(table, args.format, args.compression, after_id, since)
+        try:
+            await export.prepare()
+        except ValueError as e:
+            raise SystemExit(str(e))
+        if export.watermark == export.after_id:
+            print(f"{table}: nothing new after id {after_id}")
+            continue
+
+        started = time.perf_counter()
+        path = os.path.join(args.out, export.filename)
+        size = 0
+        with open(path + ".part", "wb") as f:
+            async for chunk in export.chunks():
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(path + ".part", path)
+        print(f"{table}: {export.rows} rows (ids {after_id + 1}..{export.watermark}), "
+              f"{size / 1024:.0f} KB in {time.perf_counter() - started:.1f}s -> {path}")
+        if args.state:
+            state[table] = export.watermark
+            _save_state(args.state, state)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export tables as NDJSON or Parquet files for the analytics warehouse.")
+    parser.add_argument("--tables", nargs="+", default=list(EXPORT_TABLES), choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", default="ndjson", choices=FORMATS)
+    parser.add_argument("--compression", default="gzip", choices=COMPRESSIONS)
+    parser.add_argument("--out", default="exports", help="Directory the files are written to.")
+    parser.add_argument("--state", default=None,
+                        help="JSON file with each table's watermark; read to export only new rows, updated afterwards.")
+    parser.add_argument("--after-id", type=int, default=None, help="Only rows with a larger id (overrides --state).")
+    parser.add_argument("--since", default=None, help="Only rows created at or after this ISO timestamp (feedback, agent_suggestions).")
+    asyncio.run(_main(parser.parse_args()))
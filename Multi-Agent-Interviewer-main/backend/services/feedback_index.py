@@ -0,0 +1,225 @@
+# services/feedback_index.py
+"""
+Local vector index over admin feedback and Feedback_Agent suggestions, used to give a new
+interview the past feedback most relevant to it instead of simply the latest rows.
+
+- Texts are embedded with a signed hashing vectorizer (word unigrams and bigrams, sublinear term
+  frequency, L2-normalised): no model to load, and every worker embeds a text identically.
+- Vectors live in a memory-mapped .npy file laid out dim-major (one contiguous row per hash
+  bucket). A query only has a few dozen non-zero buckets, so scoring reads just those rows;
+  top-k over 100k entries takes a few milliseconds.
+- Entries are appended when feedback is saved. On first use a worker only embeds the DB rows
+  that are missing from the index, so restarts don't re-embed. Appends from several workers are
+  serialised with a file lock, and readers re-map the files when the metadata changes.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+import numpy as np
+from numpy.lib.format import open_memmap
+from sqlalchemy import select
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models import tables
+
+try:
+    import fcntl
+except ImportError:  # Windows: fine for a single-worker development server
+    fcntl = None
+
+KINDS = {"feedback": 0, "suggestion": 1}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+# kind -> (id column, text column) of the table it is indexed from
+_SOURCES = {
+    "feedback": (tables.AgentFeedback.id, tables.AgentFeedback.feedback_text),
+    "suggestion": (tables.AgentSuggestion.id, tables.AgentSuggestion.suggestion_text),
+}
+_CATCH_UP_CHUNK = 1000
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can for from had has have he her his i in is it its me my of on or "
+    "our she so that the their them they this to was we were will with you your".split()
+)
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Hashes the text's unigrams and bigrams into a normalised float32 vector of length `dim`."""
+    tokens = [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((zlib.crc32(feature.encode()) for feature in features), dtype=np.int64, count=len(features))
+    # The top hash bit picks the sign, so colliding features tend to cancel instead of adding up.
+    np.add.at(vector, hashes % dim, np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32))
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class FeedbackIndex:
+    def __init__(self, directory: str, dim: int):
+        self._dir = directory
+        self._dim = dim
+        self._lock = threading.Lock()
+        self._vectors = None  # memmap (dim, capacity) float32
+        self._rows = None     # memmap (capacity, 2) int64: kind, source row id
+        self._meta = None
+        self._meta_mtime = None
+        self._caught_up = False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._dir, name)
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self._dir, exist_ok=True)
+        with open(self._path("index.lock"), "a") as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Re-reads the metadata, and re-maps the files, if another worker (or a restart) changed them."""
+        try:
+            mtime = os.stat(self._path("meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._meta is not None and mtime == self._meta_mtime:
+            return
+        meta = {"dim": self._dim, "count": 0, "capacity": 0}
+        if mtime is not None:
+            with open(self._path("meta.json")) as f:
+                meta = json.load(f)
+        if meta["dim"] != self._dim:
+            print(f"Feedback index dimension changed ({meta['dim']} -> {self._dim}); it will be rebuilt.")
+            meta = {"dim": self._dim, "count": 0, "capacity": 0}
+        if meta["capacity"] and (self._meta is None or meta["capacity"] != self._meta["capacity"] or self._vectors is None):
+            self._vectors = open_memmap(self._path("vectors.npy"), mode="r+")
+            self._rows = open_memmap(self._path("rows.npy"), mode="r+")
+        self._meta, self._meta_mtime = meta, mtime
+
+    def _write_meta(self):
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self._path("meta.json"))
+        self._meta_mtime = os.stat(self._path("meta.json")).st_mtime_ns
+
+    def _ensure_capacity(self, needed: int):
+        capacity, count = self._meta["capacity"], self._meta["count"]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        # Sparse files: the zero-filled tail costs no disk until it is written.
+        vectors = open_memmap(self._path("vectors.npy.tmp"), mode="w+", dtype=np.float32, shape=(self._dim, new_capacity))
+        rows = open_memmap(self._path("rows.npy.tmp"), mode="w+", dtype=np.int64, shape=(new_capacity, 2))
+        if count:
+            vectors[:, :count] = self._vectors[:, :count]
+            rows[:count] = self._rows[:count]
+        vectors.flush()
+        rows.flush()
+        del vectors, rows
+        self._vectors = self._rows = None
+        os.replace(self._path("vectors.npy.tmp"), self._path("vectors.npy"))
+        os.replace(self._path("rows.npy.tmp"), self._path("rows.npy"))
+        self._vectors = open_memmap(self._path("vectors.npy"), mode="r+")
+        self._rows = open_memmap(self._path("rows.npy"), mode="r+")
+        self._meta["capacity"] = new_capacity
+
+    def _indexed_ids(self, kind: str) -> np.ndarray:
+        count = self._meta["count"]
+        if not count:
+            return np.empty(0, dtype=np.int64)
+        rows = self._rows[:count]
+        return rows[rows[:, 0] == KINDS[kind], 1]
+
+    def add(self, kind: str, items) -> int:
+        """
+        Embeds and appends (source_id, text) pairs of `kind` ("feedback" or "suggestion").
+        Ids that are already indexed are skipped; returns how many entries were added.
+        """
+        with self._lock, self._file_lock():
+            self._refresh()
+            indexed = set(self._indexed_ids(kind).tolist())
+            items = [(source_id, text) for source_id, text in items if text and source_id not in indexed]
+            if not items:
+                return 0
+            count, added = self._meta["count"], len(items)
+            self._ensure_capacity(count + added)
+            self._vectors[:, count:count + added] = np.stack([embed(text, self._dim) for _, text in items]).T
+            self._rows[count:count + added, 0] = KINDS[kind]
+            self._rows[count:count + added, 1] = [source_id for source_id, _ in items]
+            self._vectors.flush()
+            self._rows.flush()
+            # The count is published last, so a crash mid-append leaves the index consistent.
+            self._meta["count"] = count + added
+            self._write_meta()
+            return added
+
+    def search(self, query: str, k: int) -> list:
+        """
+        Returns up to `k` (kind, source_id, score) tuples, most similar to `query` first.
+        Ties, including entries with nothing in common with the query, go to the most recent.
+        """
+        with self._lock:
+            self._refresh()
+            count = self._meta["count"]
+            if not count:
+                return []
+            query_vector = embed(query, self._dim)
+            buckets = np.flatnonzero(query_vector)
+            if buckets.size:
+                scores = query_vector[buckets] @ self._vectors[buckets, :count]
+            else:
+                scores = np.zeros(count, dtype=np.float32)
+            scores += np.arange(count, dtype=np.float32) * np.float32(1e-6 / count)
+            k = min(k, count)
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            rows = self._rows[top]
+            return [(KIND_NAMES[int(kind)], int(source_id), float(scores[i])) for (kind, source_id), i in zip(rows, top)]
+
+    def missing_ids(self, kind: str, ids) -> list:
+        with self._lock:
+            self._refresh()
+            return np.setdiff1d(np.asarray(ids, dtype=np.int64), self._indexed_ids(kind)).tolist()
+
+    async def a_catch_up(self, db=None):
+        """
+        Indexes the feedback and suggestion rows the index doesn't have yet; runs once per process.
+        Callers that already hold a connection pass their session: a burst of them each waiting
+        for a second connection could otherwise exhaust the pool.
+        """
+        if self._caught_up:
+            return
+        if db is None:
+            async with AsyncSessionLocal() as db:
+                return await self.a_catch_up(db)
+        for kind, (id_column, text_column) in _SOURCES.items():
+            missing = self.missing_ids(kind, (await db.execute(select(id_column))).scalars().all())
+            for start in range(0, len(missing), _CATCH_UP_CHUNK):
+                chunk = missing[start:start + _CATCH_UP_CHUNK]
+                result = await db.execute(
+                    select(id_column, text_column).where(id_column.in_(chunk)).order_by(id_column)
+                )
+                await asyncio.to_thread(self.add, kind, result.all())
+        self._caught_up = True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {"entries": self._meta["count"], "capacity": self._meta["capacity"], "dim": self._dim}
+
+
+feedback_index = FeedbackIndex(settings.FEEDBACK_INDEX_DIR, settings.FEEDBACK_INDEX_DIM)
@@ -1,89 +1,289 @@
+import asyncio
+import hashlib
 import json
-from sqlalchemy.orm import Session
+import time
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import tables
-from agents.interview_autogen import AgentOrchestrator
+from agents.interview_autogen import get_orchestrator, FALLBACK_REPORT_JSON
+from core.caching import transcript_cache, report_cache, summary_cache, feedback_cache
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.latency import latency_tracker
+from core.metrics import timed
+from services.conversation_cache import conversation_cache
 
-def start_new_interview(db: Session, candidate_name: str):
+TERMINATE_MARKER = "TERMINATE"
+
+def _feedback_index():
+    # The index is numpy-backed; it is imported on first use so importing the service layer stays cheap.
+    from services.feedback_index import feedback_index
+    return feedback_index
+
+def _retrieval_query(topic: str = None) -> str:
+    """
+    What past feedback is matched against when an interview starts: its topic. Without one there is
+    no context yet, and the empty query ranks by recency (the most recent feedback).
+    """
+    return topic or ""
+
+def _turn_query(chat_history: list) -> str:
+    """What past feedback is matched against on each turn (FEEDBACK_PER_TURN_RETRIEVAL): the candidate's latest answers."""
+    answers = [message["content"] for message in chat_history if message["role"] == "user"]
+    return "\n".join(answers[-settings.FEEDBACK_QUERY_TURNS:])
+
+def _texts_in_order(hits: list, texts_by_kind: dict) -> list:
+    """Texts of the search hits in relevance order, without repeats (the agent often repeats a suggestion)."""
+    texts = []
+    for kind, source_id, _ in hits:
+        text = texts_by_kind[kind].get(source_id)
+        if text and text not in texts:
+            texts.append(text)
+    return texts
+
+
+# --- ASYNC SERVICE FUNCTIONS ---
+# Every DB round-trip and LLM call is awaited, so the HTTP handlers run on the event loop
+# instead of Starlette's worker threadpool.
+
+@timed()
+async def a_start_new_interview(db: AsyncSession, candidate_name: str, topic: str = None):
     """
     Initializes a new interview.
-    - Implements RAG by fetching recent feedback to provide context to the agent.
-    - Creates the interview record in the database.
+    - Implements RAG by retrieving the stored feedback and suggestions most relevant to this interview
+      (served from the read cache).
+    - Creates the interview record in the database, together with that feedback, so every turn reuses it.
     - Generates and saves the initial AI welcome message.
     """
-    # RAG: Get recent feedback to improve the agent's performance for this new interview.
-    feedback_records = db.query(tables.AgentFeedback).order_by(tables.AgentFeedback.created_at.desc()).limit(5).all()
-    past_feedback = "\n- ".join([f.feedback_text for f in feedback_records])
+    query = _retrieval_query(topic)
+    key = f"relevant:{settings.FEEDBACK_RETRIEVAL_K}:{hashlib.sha1(query.encode()).hexdigest()}"
+    past_feedback = "\n- ".join(await feedback_cache.get_or_load(key, lambda: _a_relevant_feedback(query)))
 
-    # Create the interview record in the database
-    new_interview = tables.Interview(candidate_name=candidate_name)
+    new_interview = tables.Interview(candidate_name=candidate_name, past_feedback=past_feedback)
     db.add(new_interview)
-    db.commit()
-    db.refresh(new_interview)
-    
-    # Initialize the orchestrator with the historical context
-    orchestrator = AgentOrchestrator(past_feedback=past_feedback)
-    
-    # Get only the first message to start the conversation
-    first_message_text = orchestrator.get_initial_message(candidate_name)
-    
-    # Save the AI's first message to the database
+    await db.commit()
+    await summary_cache.clear()
+
+    first_message_text = await get_orchestrator().a_get_initial_message(candidate_name, past_feedback=past_feedback)
+
     db.add(tables.Message(interview_id=new_interview.id, sender='ai', text=first_message_text))
-    db.commit()
-    
+    await db.commit()
+    await conversation_cache.start(new_interview.id, [{"role": "assistant", "content": first_message_text}])
+
     return new_interview.id, first_message_text
 
-def process_and_save_message(db: Session, interview_id: int, user_message: str):
+async def _a_relevant_feedback(query: str, db: AsyncSession = None) -> list:
+    """
+    Top-k stored feedback and Feedback_Agent suggestions most similar to `query`, as texts.
+    A chat turn passes its own session, which already holds a connection; the read-cache loader
+    passes none and gets a session of its own, because concurrent callers share the load.
+    """
+    if db is None:
+        async with AsyncSessionLocal() as db:
+            return await _a_relevant_feedback(query, db)
+    index = _feedback_index()
+    await index.a_catch_up(db)
+    hits = await asyncio.to_thread(index.search, query, settings.FEEDBACK_RETRIEVAL_K)
+    feedback_ids = [source_id for kind, source_id, _ in hits if kind == "feedback"]
+    suggestion_ids = [source_id for kind, source_id, _ in hits if kind == "suggestion"]
+    feedback = await db.execute(
+        select(tables.AgentFeedback.id, tables.AgentFeedback.feedback_text).where(tables.AgentFeedback.id.in_(feedback_ids))
+    )
+    suggestions = await db.execute(
+        select(tables.AgentSuggestion.id, tables.AgentSuggestion.suggestion_text).where(tables.AgentSuggestion.id.in_(suggestion_ids))
+    )
+    return _texts_in_order(hits, {"feedback": dict(feedback.all()), "suggestion": dict(suggestions.all())})
+
+async def _a_load_messages(db: AsyncSession, interview_id: int):
+    result = await db.execute(
+        select(tables.Message).filter(tables.Message.interview_id == interview_id).order_by(tables.Message.id)
+    )
+    return result.scalars().all()
+
+@timed()
+async def a_process_and_save_message(db: AsyncSession, interview_id: int, user_message: str):
     """
     Processes one turn of the conversation.
-    - Saves the user's message.
-    - Retrieves the full conversation history to maintain state.
-    - Generates the next AI reply based on that history.
-    - Saves the AI's response.
-    - Handles interview termination.
+    - The history comes from the conversation cache instead of re-reading every message.
+    - The feedback retrieved when the interview started goes into the prompt (see FEEDBACK_PER_TURN_RETRIEVAL).
+    - The user and AI messages are written together in one transaction once the reply is ready,
+      and the interview is marked completed on TERMINATE.
+    Long histories are compacted before the LLM call; returns (reply, is_terminated, context_stats).
+    """
+    chat_history = await _a_history_with_user_message(db, interview_id, user_message)
+    (prompt_messages, context_stats), past_feedback = await _a_prepare_turn(db, interview_id, chat_history)
+    ai_response_text = await get_orchestrator().a_get_ai_reply(prompt_messages, past_feedback=past_feedback)
+
+    is_terminated = await _a_save_turn(db, interview_id, user_message, ai_response_text)
+    return ai_response_text, is_terminated, context_stats
+
+async def _a_history_with_user_message(db: AsyncSession, interview_id: int, user_message: str):
+    """Returns the cached history with the candidate's new message appended (not yet saved)."""
+    chat_history = await conversation_cache.get(db, interview_id)
+    chat_history.append({"role": "user", "content": user_message})
+    return chat_history
+
+async def _a_prepare_turn(db: AsyncSession, interview_id: int, chat_history: list):
+    """
+    Compacts the history and looks up the turn's past feedback, concurrently (compaction doesn't use
+    the session). Returns ((prompt_messages, context_stats), past_feedback).
+    """
+    return await asyncio.gather(
+        get_orchestrator().a_compact_history(interview_id, chat_history),
+        _a_turn_feedback(db, interview_id, chat_history),
+    )
+
+async def _a_turn_feedback(db: AsyncSession, interview_id: int, chat_history: list) -> str:
+    """
+    The feedback stored when the interview started. The chat handlers have already loaded the
+    interview into this session, so this is normally an identity-map hit rather than a query.
+    """
+    if settings.FEEDBACK_PER_TURN_RETRIEVAL:
+        # Not read-cached: the query changes with every answer.
+        return "\n- ".join(await _a_relevant_feedback(_turn_query(chat_history), db))
+    interview = await db.get(tables.Interview, interview_id)
+    if interview.past_feedback is None:
+        # Started before feedback was stored with interviews: retrieve it once, as at the start.
+        interview.past_feedback = "\n- ".join(await _a_relevant_feedback(_retrieval_query(), db))
+        await db.commit()
+    return interview.past_feedback
+
+async def _a_save_user_message(db: AsyncSession, interview_id: int, user_message: str):
+    """
+    Saves the candidate's message on its own, ahead of a streamed reply, so it is kept even if the
+    stream is cut off; appends it to the conversation cache and invalidates the cached transcript.
     """
-    # 1. Save the user's message to the database
     db.add(tables.Message(interview_id=interview_id, sender='user', text=user_message))
-    db.commit()
-    
-    # 2. Retrieve the full conversation history from the database (our source of truth)
-    db_messages = db.query(tables.Message).filter(tables.Message.interview_id == interview_id).order_by(tables.Message.id).all()
-    
-    # 3. Format the history into the OpenAI message format that the agent expects
-    chat_history = []
-    for msg in db_messages:
-        role = "assistant" if msg.sender == 'ai' else "user"
-        chat_history.append({"role": role, "content": msg.text})
-
-    # 4. Generate the next AI reply using the full context
-    orchestrator = AgentOrchestrator()
-    ai_response_text = orchestrator.get_ai_reply(chat_history)
-
-    # 5. Save the new AI response to the database
-    db.add(tables.Message(interview_id=interview_id, sender='ai', text=ai_response_text))
-    db.commit()
-
-    # 6. Check for the termination keyword
-    is_terminated = "TERMINATE" in ai_response_text.upper()
+    await db.commit()
+    await conversation_cache.append(interview_id, {"role": "user", "content": user_message})
+    await transcript_cache.invalidate(interview_id)
+
+async def _a_save_turn(db: AsyncSession, interview_id: int, user_message, ai_response_text: str):
+    """
+    Saves the user message (None if it was saved already) and the AI's reply in a single commit,
+    marks the interview completed on TERMINATE, then appends the turn to the conversation cache and
+    invalidates the cached transcript (and summary pages, on termination). Returns whether it terminated.
+    """
+    turn = [{"role": "assistant", "content": ai_response_text}]
+    if user_message is not None:
+        turn.insert(0, {"role": "user", "content": user_message})
+    db.add_all(
+        tables.Message(interview_id=interview_id, sender='ai' if message["role"] == "assistant" else 'user',
+                       text=message["content"])
+        for message in turn
+    )
+    is_terminated = TERMINATE_MARKER in ai_response_text.upper()
+    if is_terminated:
+        await db.execute(
+            update(tables.Interview).where(tables.Interview.id == interview_id).values(status="completed")
+        )
+    await db.commit()
+
+    await conversation_cache.append(interview_id, *turn)
+    await transcript_cache.invalidate(interview_id)
     if is_terminated:
-        interview = db.query(tables.Interview).filter(tables.Interview.id == interview_id).first()
-        if interview:
-            interview.status = "completed"
-            db.commit()
-
-    return ai_response_text, is_terminated
-
-def create_and_save_report(db: Session, interview_id: int):
-    """Generates and saves the final performance report using the Evaluation Agent."""
-    interview = db.query(tables.Interview).filter(tables.Interview.id == interview_id).first()
-    if not interview or interview.report:
-        return None 
-        
-    messages = db.query(tables.Message).filter(tables.Message.interview_id == interview_id).all()
+        await summary_cache.clear()
+    return is_terminated
+
+class TerminateMarkerFilter:
+    """
+    Strips the TERMINATE control word out of a token stream.
+    The marker can be split across chunks, so any tail that could still be the start
+    of the marker is held back until the next chunk shows whether it completes it.
+    """
+    def __init__(self, marker: str = TERMINATE_MARKER):
+        self.marker = marker
+        self.found = False
+        self._pending = ""
+
+    def feed(self, text: str) -> str:
+        """Adds a chunk and returns the part of the stream that is safe to forward."""
+        if self.found:
+            return ""
+        self._pending += text
+        upper = self._pending.upper()
+        index = upper.find(self.marker)
+        if index != -1:
+            self.found = True
+            safe, self._pending = self._pending[:index], ""
+            return safe
+        hold = 0
+        for n in range(min(len(self.marker) - 1, len(upper)), 0, -1):
+            if self.marker.startswith(upper[-n:]):
+                hold = n
+                break
+        cut = len(self._pending) - hold
+        safe, self._pending = self._pending[:cut], self._pending[cut:]
+        return safe
+
+    def flush(self) -> str:
+        """Returns whatever is still held back once the stream has ended."""
+        remaining, self._pending = self._pending, ""
+        return remaining
+
+@timed()
+async def a_stream_and_save_message(db: AsyncSession, interview_id: int, user_message: str):
+    """
+    Streaming version of `a_process_and_save_message`.
+    - Saves the candidate's message before generation starts, so a dropped stream doesn't lose it.
+    - Yields {"type": "token"} events as the interviewer's reply is generated (TERMINATE is not forwarded).
+    - Saves the complete reply to the database once the stream has finished.
+    - Ends with a {"type": "done"} event carrying the full message, termination flag, time-to-first-token
+      and the prompt tokens saved by context compaction.
+    """
+    await _a_save_user_message(db, interview_id, user_message)
+    chat_history = await conversation_cache.get(db, interview_id)
+    (prompt_messages, context_stats), past_feedback = await _a_prepare_turn(db, interview_id, chat_history)
+
+    started = time.perf_counter()
+    ttft = None
+    chunks = []
+    marker_filter = TerminateMarkerFilter()
+    async for chunk in get_orchestrator().a_stream_ai_reply(prompt_messages, past_feedback=past_feedback):
+        if ttft is None:
+            ttft = time.perf_counter() - started
+            latency_tracker.record("chat_ttft", ttft)
+        chunks.append(chunk)
+        visible = marker_filter.feed(chunk)
+        if visible:
+            yield {"type": "token", "text": visible}
+    tail = marker_filter.flush()
+    if tail:
+        yield {"type": "token", "text": tail}
+    latency_tracker.record("chat_stream_total", time.perf_counter() - started)
+
+    ai_response_text = "".join(chunks)
+    is_terminated = await _a_save_turn(db, interview_id, None, ai_response_text)
+    yield {
+        "type": "done",
+        "message": ai_response_text,
+        "isTerminated": is_terminated,
+        "ttftMs": round(ttft * 1000, 1) if ttft is not None else None,
+        "promptTokens": context_stats["prompt_tokens_sent"],
+        "promptTokensSaved": context_stats["prompt_tokens_saved"],
+    }
+
+@timed()
+async def a_create_and_save_report(db: AsyncSession, interview_id: int):
+    """
+    Generates and saves the final performance report using the Evaluation Agent.
+    Raises if the agent's output is not a valid report, so the report job retries instead of saving a score of 0.
+    """
+    interview = await db.get(tables.Interview, interview_id)
+    if not interview:
+        return None
+    # Relationships cannot be lazy-loaded on an AsyncSession, so check for an existing report explicitly.
+    existing = await db.execute(select(tables.Report.id).filter(tables.Report.interview_id == interview_id))
+    if existing.first():
+        return None
+
+    messages = await _a_load_messages(db, interview_id)
     transcript = "\n".join([f"{msg.sender.capitalize()}: {msg.text}" for msg in messages])
-    
-    orchestrator = AgentOrchestrator()
-    report_json_str = orchestrator.generate_report(transcript)
-    
+
+    report_json_str = await get_orchestrator().a_generate_report(transcript)
+    if report_json_str == FALLBACK_REPORT_JSON:
+        raise RuntimeError(f"The Evaluation_Agent did not return a valid report for interview {interview_id}.")
+
     try:
         report_data = json.loads(report_json_str)
         new_report = tables.Report(
@@ -94,35 +294,43 @@ def create_and_save_report(db: Session, interview_id: int):
             weaknesses=report_data.get("weaknesses"),
         )
         db.add(new_report)
-        db.commit()
-        db.refresh(new_report)
+        await db.commit()
+        await report_cache.invalidate(interview_id)
+        await summary_cache.clear()
         return new_report
     except (json.JSONDecodeError, TypeError) as e:
         print(f"Error decoding report JSON for interview {interview_id}: {e}")
         return None
 
-def save_and_process_feedback(db: Session, interview_id: int, feedback_text: str):
+@timed()
+async def a_save_and_process_feedback(db: AsyncSession, interview_id: int, feedback_text: str):
     """Saves admin feedback and uses the Feedback Agent to generate an actionable suggestion."""
     new_feedback = tables.AgentFeedback(interview_id=interview_id, feedback_text=feedback_text)
     db.add(new_feedback)
-    db.commit()
+    await db.commit()
+    await asyncio.to_thread(_feedback_index().add, "feedback", [(new_feedback.id, feedback_text)])
+    await feedback_cache.clear()
 
-    messages = db.query(tables.Message).filter(tables.Message.interview_id == interview_id).all()
+    messages = await _a_load_messages(db, interview_id)
     transcript = "\n".join([f"{msg.sender.capitalize()}: {msg.text}" for msg in messages])
-    
-    orchestrator = AgentOrchestrator()
-    suggestion = orchestrator.process_feedback(transcript, feedback_text)
-    
+
+    suggestion = await get_orchestrator().a_process_feedback(transcript, feedback_text)
+
+    if suggestion and suggestion.strip():
+        new_suggestion = tables.AgentSuggestion(
+            interview_id=interview_id, feedback_id=new_feedback.id, suggestion_text=suggestion.strip()
+        )
+        db.add(new_suggestion)
+        await db.commit()
+        await asyncio.to_thread(
+            _feedback_index().add, "suggestion", [(new_suggestion.id, new_suggestion.suggestion_text)]
+        )
+        await feedback_cache.clear()
+
     print("\n" + "---" * 20)
     print(f"FEEDBACK ANALYSIS FOR INTERVIEW {interview_id}")
     print(f"Admin Feedback: {feedback_text}")
     print(f"AI Suggestion for Improvement: {suggestion}")
     print("---" * 20 + "\n")
-    
-    return {"status": "success", "message": "Feedback processed and logged for agent improvement."}
 
-def run_simulation_service():
-    """Runs a full, automated interview simulation."""
-    orchestrator = AgentOrchestrator()
-    transcript = orchestrator.run_simulation()
-    return {"transcript": transcript}
\ No newline at end of file
+    return {"status": "success", "message": "Feedback processed and logged for agent improvement."}
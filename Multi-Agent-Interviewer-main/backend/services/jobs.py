@@ -0,0 +1,266 @@
+# services/jobs.py
+import asyncio
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models import tables
+from services import interview_service
+
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+class JobQueue:
+    """
+    In-process background job runner backed by the `jobs` table.
+    - Jobs are idempotent per `dedupe_key` (one row per key, enforced by a unique constraint).
+    - Concurrent triggers for the same key share one execution and one result.
+    - Failures are retried with exponential backoff up to JOB_MAX_ATTEMPTS.
+    - On shutdown, jobs that could not finish are marked `interrupted`. A sweeper resumes them at the
+      next startup (in whichever worker claims them first), together with queued/running jobs
+      abandoned by a crashed process once they are older than JOB_STALE_SECONDS.
+    Workers are started by the app lifespan (`start`), or lazily the first time a job is enqueued.
+    """
+    def __init__(self):
+        self._handlers = {}  # kind -> async callable(target_id)
+        self._queue = None
+        self._workers = []
+        self._busy = set()  # worker tasks currently running a job
+        self._interrupted = []  # ids of jobs cancelled mid-run by shutdown
+        self._sweeper = None
+        self._closing = False
+        self._inflight = {}  # dedupe_key -> asyncio.Future resolved with the final job status
+        self._enqueue_lock = None
+
+    def register(self, kind: str, handler):
+        self._handlers[kind] = handler
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue()
+        self._enqueue_lock = asyncio.Lock()
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(settings.JOB_WORKERS)
+        ]
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    def start(self):
+        """Starts the workers and the sweeper that resumes unfinished jobs. Call on the running loop."""
+        self._ensure_workers()
+
+    async def enqueue(self, kind: str, target_id: int) -> tables.Job:
+        """
+        Queues `kind` for `target_id` unless an equivalent job is already queued, running or done.
+        Returns the job row either way, so callers can poll its status.
+        """
+        self._ensure_workers()
+        dedupe_key = f"{kind}:{target_id}"
+        # Serialises the check-then-insert below so two triggers in this process can't both queue the job.
+        async with self._enqueue_lock:
+            async with AsyncSessionLocal() as db:
+                job = await self._get_by_key(db, dedupe_key)
+                if job and not self._needs_run(job, dedupe_key):
+                    return job
+                if job is None:
+                    job = tables.Job(kind=kind, dedupe_key=dedupe_key, status="queued", attempts=0)
+                    db.add(job)
+                    try:
+                        await db.commit()
+                    except IntegrityError:
+                        # Another worker process created the job first.
+                        await db.rollback()
+                        return await self._get_by_key(db, dedupe_key)
+                else:
+                    job.status, job.attempts, job.last_error = "queued", 0, None
+                    await db.commit()
+
+            self._inflight[dedupe_key] = asyncio.get_running_loop().create_future()
+        await self._queue.put((job.id, kind, target_id, dedupe_key))
+        return job
+
+    def _needs_run(self, job: tables.Job, dedupe_key: str) -> bool:
+        if dedupe_key in self._inflight or job.status == "succeeded":
+            return False
+        if job.status in ("failed", "interrupted"):
+            # An explicit new trigger gets a fresh set of attempts.
+            return True
+        # queued/running but not owned by this process: only take over if it looks abandoned.
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        return (job.updated_at or job.created_at) < stale_before
+
+    async def wait(self, job: tables.Job, timeout: float):
+        """
+        Waits up to `timeout` seconds for a job to finish and returns its final status ("succeeded"
+        or "failed"), or None if it is still pending. A job run by another process is followed by
+        polling its row.
+        """
+        future = self._inflight.get(job.dedupe_key)
+        if future is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        status = job.status
+        while status not in FINISHED_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(settings.JOB_POLL_INTERVAL, remaining))
+            current = await self.get(job.id)
+            if current is None:
+                return None
+            status = current.status
+        return status
+
+    async def get(self, job_id: int):
+        async with AsyncSessionLocal() as db:
+            return await db.get(tables.Job, job_id)
+
+    @staticmethod
+    async def _get_by_key(db, dedupe_key: str):
+        result = await db.execute(select(tables.Job).filter(tables.Job.dedupe_key == dedupe_key))
+        return result.scalars().first()
+
+    async def _set_status(self, job_id: int, **fields):
+        async with AsyncSessionLocal() as db:
+            job = await db.get(tables.Job, job_id)
+            for name, value in fields.items():
+                setattr(job, name, value)
+            await db.commit()
+
+    async def _worker(self, worker_index: int):
+        worker = asyncio.current_task()
+        while not self._closing:
+            job_id, kind, target_id, dedupe_key = await self._queue.get()
+            self._busy.add(worker)
+            status = "failed"
+            try:
+                status = await self._run_with_retries(job_id, kind, target_id)
+            except asyncio.CancelledError:
+                self._interrupted.append(job_id)
+                raise
+            except Exception as e:
+                print(f"Job worker {worker_index} could not update job {job_id}: {e}")
+            finally:
+                self._busy.discard(worker)
+                future = self._inflight.pop(dedupe_key, None)
+                if future and not future.done():
+                    future.set_result(status)
+                self._queue.task_done()
+
+    async def _run_with_retries(self, job_id: int, kind: str, target_id: int) -> str:
+        handler = self._handlers[kind]
+        for attempt in range(1, settings.JOB_MAX_ATTEMPTS + 1):
+            await self._set_status(job_id, status="running", attempts=attempt)
+            try:
+                await handler(target_id)
+                await self._set_status(job_id, status="succeeded", last_error=None)
+                return "succeeded"
+            except Exception as e:
+                print(f"Job {kind}:{target_id} failed on attempt {attempt}: {e}")
+                await self._set_status(job_id, last_error=str(e)[:2000])
+                if attempt < settings.JOB_MAX_ATTEMPTS:
+                    # Exponential backoff with jitter so retries of many jobs don't line up.
+                    delay = settings.JOB_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+                    await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+        await self._set_status(job_id, status="failed")
+        return "failed"
+
+    async def _sweep(self):
+        """Resumes interrupted and abandoned jobs: once at startup, then every JOB_SWEEP_INTERVAL seconds."""
+        while True:
+            try:
+                await self._resume_unfinished()
+            except Exception as e:
+                print(f"Job sweeper could not resume unfinished jobs: {e}")
+            await asyncio.sleep(settings.JOB_SWEEP_INTERVAL)
+
+    async def _resume_unfinished(self):
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(tables.Job).filter(tables.Job.status.in_(("interrupted", "queued", "running"))))
+            for job in result.scalars().all():
+                if job.kind not in self._handlers or job.dedupe_key in self._inflight:
+                    continue
+                if job.status != "interrupted" and (job.updated_at or job.created_at) >= stale_before:
+                    continue  # probably still being run by another process
+                # Claim the job only if nobody changed it since it was read, so one process resumes it.
+                previous_status = job.status
+                unchanged = (tables.Job.updated_at.is_(None) if job.updated_at is None
+                             else tables.Job.updated_at == job.updated_at)
+                claimed = await db.execute(
+                    update(tables.Job)
+                    .where(tables.Job.id == job.id, tables.Job.status == job.status, unchanged)
+                    .values(status="queued", updated_at=datetime.utcnow())
+                )
+                await db.commit()
+                if claimed.rowcount != 1:
+                    continue
+                print(f"Resuming {previous_status} job {job.dedupe_key}.")
+                target_id = int(job.dedupe_key.split(":", 1)[1])
+                self._inflight[job.dedupe_key] = asyncio.get_running_loop().create_future()
+                await self._queue.put((job.id, job.kind, target_id, job.dedupe_key))
+
+    async def shutdown(self, timeout: float = None):
+        """
+        Stops the workers. Running jobs get up to `timeout` seconds (JOB_SHUTDOWN_TIMEOUT) to finish;
+        the rest, and jobs still waiting in the queue, are marked `interrupted` for the next startup.
+        """
+        if not self._workers:
+            return
+        self._closing = True
+        self._sweeper.cancel()
+        for worker in self._workers:
+            if worker not in self._busy:
+                worker.cancel()
+        timeout = settings.JOB_SHUTDOWN_TIMEOUT if timeout is None else timeout
+        _, pending = await asyncio.wait(self._workers, timeout=timeout)
+        for worker in pending:
+            worker.cancel()
+        await asyncio.gather(self._sweeper, *self._workers, return_exceptions=True)
+
+        unfinished = self._interrupted
+        while not self._queue.empty():
+            unfinished.append(self._queue.get_nowait()[0])
+        if unfinished:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(tables.Job)
+                    .where(tables.Job.id.in_(unfinished), tables.Job.status.in_(("queued", "running")))
+                    .values(status="interrupted")
+                )
+                await db.commit()
+            print(f"Job queue stopped with {len(unfinished)} unfinished job(s); they resume at the next startup.")
+        for future in self._inflight.values():
+            if not future.done():
+                future.set_result(None)  # waiters see the job as still pending
+        self._inflight.clear()
+        self._workers, self._busy, self._interrupted, self._sweeper = [], set(), [], None
+
+
+# --- JOB HANDLERS ---
+
+async def _generate_report(interview_id: int):
+    """Generates the report for an interview; succeeds without work if it already exists."""
+    async with AsyncSessionLocal() as db:
+        await interview_service.a_create_and_save_report(db, interview_id)
+        existing = await db.execute(select(tables.Report.id).filter(tables.Report.interview_id == interview_id))
+        if not existing.first():
+            raise RuntimeError(f"Report for interview {interview_id} was not saved.")
+
+
+job_queue = JobQueue()
+job_queue.register("report", _generate_report)
+
+
+async def enqueue_report(interview_id: int) -> tables.Job:
+    """Queues report generation for an interview (deduplicated per interview)."""
+    return await job_queue.enqueue("report", interview_id)
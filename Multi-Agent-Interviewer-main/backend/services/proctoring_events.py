@@ -0,0 +1,154 @@
+# services/proctoring_events.py
+import asyncio
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import update, func
+from core.config import settings
+from core.caching import summary_cache
+from core.database import AsyncSessionLocal
+from models import tables
+
+
+class ProctoringEventLog:
+    """
+    Write-behind log of proctoring anomalies.
+    - The WebSocket loop only appends to an in-memory queue; it never holds a DB session.
+    - A single writer task inserts events in batches, flushing when PROCTORING_EVENT_BATCH_SIZE
+      events are buffered or PROCTORING_EVENT_FLUSH_INTERVAL seconds after the first one arrived.
+    - Interview.warnings is incremented by each batch's event count in the same transaction as
+      its inserts, so the column (legacy count plus committed events) stays consistent with the log.
+    - A batch that fails to write stays buffered and is retried with backoff; after
+      PROCTORING_EVENT_WRITE_RETRIES retries its events are logged and dropped.
+    The writer is started lazily on the running event loop the first time an event is recorded.
+    """
+    def __init__(self):
+        self._queue = None
+        self._writer = None
+        self._buffered = Counter()  # interview_id -> events queued but not yet committed
+        self._stats = {"events": 0, "batches": 0, "failed_batches": 0}
+
+    def _ensure_writer(self):
+        if self._writer is None or self._writer.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._writer = asyncio.create_task(self._run())
+
+    def record(self, interview_id: int, anomaly_type: str, message: str, frame_stats: dict):
+        """Queues one event; returns immediately."""
+        self._ensure_writer()
+        self._buffered[interview_id] += 1
+        self._queue.put_nowait({
+            "interview_id": interview_id,
+            "created_at": datetime.utcnow(),
+            "anomaly_type": anomaly_type,
+            "message": message,
+            **frame_stats,
+        })
+
+    async def warning_count(self, interview_id: int):
+        """
+        Returns the interview's warning count (the committed counter plus events still buffered),
+        or None if the interview doesn't exist. Uses a short-lived session.
+        """
+        async with AsyncSessionLocal() as db:
+            interview = await db.get(tables.Interview, interview_id)
+            if interview is None:
+                return None
+        return (interview.warnings or 0) + self._buffered[interview_id]
+
+    async def flush(self):
+        """Waits until every event recorded so far has been written."""
+        if self._writer is None or self._writer.done():
+            return
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(done)
+        await done
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            batch, waiters = [], []
+            deadline = asyncio.get_running_loop().time() + settings.PROCTORING_EVENT_FLUSH_INTERVAL
+            while True:
+                if isinstance(item, asyncio.Future):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= settings.PROCTORING_EVENT_BATCH_SIZE:
+                    break
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if batch:
+                await self._write(batch)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def _write(self, batch: list):
+        counts = Counter(event["interview_id"] for event in batch)
+        try:
+            for attempt in range(settings.PROCTORING_EVENT_WRITE_RETRIES + 1):
+                try:
+                    await self._insert(batch, counts)
+                    self._stats["events"] += len(batch)
+                    self._stats["batches"] += 1
+                    return
+                except Exception as e:
+                    self._stats["failed_batches"] += 1
+                    if attempt == settings.PROCTORING_EVENT_WRITE_RETRIES:
+                        print(f"Dropping {len(batch)} proctoring events after {attempt + 1} failed writes: {e}")
+                        for event in batch:
+                            print(f"  dropped: interview {event['interview_id']} at {event['created_at']:%H:%M:%S} "
+                                  f"{event['anomaly_type']}: {event['message']}")
+                        return
+                    delay = settings.PROCTORING_EVENT_RETRY_INTERVAL * 2 ** attempt
+                    print(f"Failed to write {len(batch)} proctoring events, retrying in {delay:g}s: {e}")
+                    # New events keep queueing meanwhile; they are written after this batch.
+                    await asyncio.sleep(delay)
+        finally:
+            for interview_id, count in counts.items():
+                self._buffered[interview_id] -= count
+                if self._buffered[interview_id] <= 0:
+                    del self._buffered[interview_id]
+
+    async def _insert(self, batch: list, counts: Counter):
+        async with AsyncSessionLocal() as db:
+            db.add_all(tables.ProctoringEvent(**event) for event in batch)
+            for interview_id, count in counts.items():
+                # Incremented rather than recounted: interviews proctored before the event log
+                # existed keep their legacy count, and new events add to it.
+                await db.execute(
+                    update(tables.Interview)
+                    .where(tables.Interview.id == interview_id)
+                    .values(warnings=func.coalesce(tables.Interview.warnings, 0) + count)
+                )
+            await db.commit()
+
+    async def set_status(self, interview_id: int, status: str):
+        """Flushes pending events, then updates the interview's status in a short-lived session."""
+        await self.flush()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(tables.Interview).where(tables.Interview.id == interview_id).values(status=status)
+            )
+            await db.commit()
+        await summary_cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "buffered_by_interview": dict(self._buffered),
+        }
+
+    async def shutdown(self):
+        await self.flush()
+        if self._writer:
+            self._writer.cancel()
+
+
+proctoring_event_log = ProctoringEventLog()
@@ -0,0 +1,253 @@
+# services/simulation_batch.py
+"""
+Batch simulation engine: runs simulated interviews over a matrix of candidate personas and
+round counts, concurrently, and scores every transcript with the Evaluation_Agent.
+
+Each simulation is a row in `simulation_runs`. Its transcript is checkpointed as soon as the
+simulation finishes and its report once it is evaluated, so re-running an interrupted batch
+only redoes the unfinished work.
+
+API: POST /simulations/batches, GET /simulations/batches/{id}, POST /simulations/batches/{id}/resume.
+CLI, from the backend directory:
+    python -m services.simulation_batch --personas beginner intermediate advanced --rounds 6 8 --repeats 5 --concurrency 8
+    python -m services.simulation_batch --resume 3
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from sqlalchemy import select, update, func
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models import tables
+from agents.interview_autogen import get_orchestrator, CANDIDATE_PERSONAS, FALLBACK_REPORT_JSON
+from agents.rate_limiter import llm_priority
+
+
+def resolve_personas(names: list, custom_personas: dict = None) -> dict:
+    """Maps persona names to candidate system messages; custom personas override built-in ones."""
+    custom_personas = custom_personas or {}
+    personas = {}
+    for name in names:
+        prompt = custom_personas.get(name) or CANDIDATE_PERSONAS.get(name)
+        if prompt is None:
+            raise ValueError(f"Unknown persona '{name}'. Built-in personas: {', '.join(CANDIDATE_PERSONAS)}.")
+        personas[name] = prompt
+    return personas
+
+
+async def create_batch(personas: dict, round_counts: list, repeats: int = 1, concurrency: int = None, name: str = None) -> int:
+    """Creates the batch and one pending run per (persona, round count, repeat); returns the batch id."""
+    if not personas or not round_counts:
+        raise ValueError("A batch needs at least one persona and one round count.")
+    if min(round_counts) < 2 or repeats < 1:
+        raise ValueError("Round counts must be at least 2 and repeats at least 1.")
+    round_counts = sorted(set(round_counts))
+    async with AsyncSessionLocal() as db:
+        batch = tables.SimulationBatch(
+            name=name,
+            status="queued",
+            personas=json.dumps(personas),
+            concurrency=concurrency,
+            total_runs=len(personas) * len(round_counts) * repeats,
+        )
+        db.add(batch)
+        await db.flush()
+        db.add_all(
+            tables.SimulationRun(batch_id=batch.id, persona=persona, rounds=rounds, repeat_index=repeat)
+            for persona in personas for rounds in round_counts for repeat in range(repeats)
+        )
+        await db.commit()
+        return batch.id
+
+
+def _format_transcript(transcript: list) -> str:
+    return "\n".join(f"{turn['sender'].replace('_Agent', '')}: {turn['text']}" for turn in transcript)
+
+
+async def _update_run(run_id: int, **fields):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(tables.SimulationRun).where(tables.SimulationRun.id == run_id).values(**fields))
+        await db.commit()
+
+
+async def _execute_run(run_id: int, rounds: int, persona_prompt: str, transcript_json: str = None) -> bool:
+    """
+    Simulates (unless a checkpointed transcript exists) and evaluates one run, retrying with
+    jittered exponential backoff. Returns whether a simulation was generated in this call.
+    """
+    orchestrator = get_orchestrator()
+    transcript = json.loads(transcript_json) if transcript_json else None
+    simulated = False
+    for attempt in range(1, settings.SIMULATION_MAX_ATTEMPTS + 1):
+        await _update_run(run_id, attempts=tables.SimulationRun.attempts + 1)
+        try:
+            if transcript is None:
+                started = time.perf_counter()
+                transcript = [turn async for turn in orchestrator.a_run_simulation(rounds, persona_prompt)]
+                # Checkpoint before evaluating, so a failure or restart doesn't cost the simulation.
+                await _update_run(
+                    run_id, status="simulated", transcript=json.dumps(transcript),
+                    duration_seconds=round(time.perf_counter() - started, 3), last_error=None,
+                )
+                simulated = True
+
+            report_json = await orchestrator.a_generate_report(_format_transcript(transcript))
+            if report_json == FALLBACK_REPORT_JSON:
+                raise RuntimeError("The Evaluation_Agent did not return a valid report.")
+            report = json.loads(report_json)
+            await _update_run(
+                run_id, status="evaluated", report=report_json, score=report.get("score"), last_error=None
+            )
+            return simulated
+        except Exception as e:
+            print(f"Simulation run {run_id} failed on attempt {attempt}: {e}")
+            await _update_run(run_id, last_error=str(e)[:2000])
+            if attempt < settings.SIMULATION_MAX_ATTEMPTS:
+                delay = settings.SIMULATION_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+    await _update_run(run_id, status="failed")
+    return simulated
+
+
+async def run_batch(batch_id: int, concurrency: int = None) -> dict:
+    """
+    Runs every run of the batch that isn't evaluated yet (pending, interrupted or failed), at most
+    `concurrency` at a time, and records the throughput. Returns the batch status.
+    """
+    async with AsyncSessionLocal() as db:
+        batch = await db.get(tables.SimulationBatch, batch_id)
+        if batch is None:
+            raise ValueError(f"Simulation batch {batch_id} not found.")
+        personas = json.loads(batch.personas)
+        concurrency = concurrency or batch.concurrency or settings.SIMULATION_CONCURRENCY
+        result = await db.execute(
+            select(tables.SimulationRun.id, tables.SimulationRun.persona, tables.SimulationRun.rounds,
+                   tables.SimulationRun.transcript)
+            .filter(tables.SimulationRun.batch_id == batch_id, tables.SimulationRun.status != "evaluated")
+            .order_by(tables.SimulationRun.id)
+        )
+        todo = result.all()
+        batch.status = "running"
+        await db.commit()
+
+    print(f"Simulation batch {batch_id}: {len(todo)} runs to do, concurrency {concurrency}")
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limited(run_id, persona, rounds, transcript_json):
+        # Batch work, including its evaluations, queues behind live interviews for LLM capacity.
+        with llm_priority("simulation"):
+            async with limit:
+                return await _execute_run(run_id, rounds, personas[persona], transcript_json)
+
+    started = time.perf_counter()
+    simulated = sum(await asyncio.gather(*(limited(*run) for run in todo)))
+    elapsed_minutes = (time.perf_counter() - started) / 60
+
+    async with AsyncSessionLocal() as db:
+        failed = await db.scalar(
+            select(func.count(tables.SimulationRun.id))
+            .filter(tables.SimulationRun.batch_id == batch_id, tables.SimulationRun.status != "evaluated")
+        )
+        batch = await db.get(tables.SimulationBatch, batch_id)
+        batch.status = "failed" if failed else "completed"
+        if simulated:
+            batch.simulations_per_minute = round(simulated / elapsed_minutes, 2)
+        await db.commit()
+    return await batch_status(batch_id)
+
+
+async def batch_status(batch_id: int):
+    """Progress counts, throughput and average Evaluation_Agent score per (persona, rounds) cell; None if not found."""
+    async with AsyncSessionLocal() as db:
+        batch = await db.get(tables.SimulationBatch, batch_id)
+        if batch is None:
+            return None
+        counts = await db.execute(
+            select(tables.SimulationRun.status, func.count(tables.SimulationRun.id))
+            .filter(tables.SimulationRun.batch_id == batch_id)
+            .group_by(tables.SimulationRun.status)
+        )
+        cells = await db.execute(
+            select(
+                tables.SimulationRun.persona,
+                tables.SimulationRun.rounds,
+                func.count(tables.SimulationRun.id),
+                func.count(tables.SimulationRun.score),
+                func.avg(tables.SimulationRun.score),
+            )
+            .filter(tables.SimulationRun.batch_id == batch_id)
+            .group_by(tables.SimulationRun.persona, tables.SimulationRun.rounds)
+            .order_by(tables.SimulationRun.persona, tables.SimulationRun.rounds)
+        )
+        return {
+            "id": batch.id,
+            "name": batch.name,
+            "status": batch.status,
+            "total_runs": batch.total_runs,
+            "counts": dict(counts.all()),
+            "simulations_per_minute": batch.simulations_per_minute,
+            "results": [
+                {
+                    "persona": persona, "rounds": rounds, "runs": runs, "evaluated": evaluated,
+                    "avg_score": round(avg_score, 2) if avg_score is not None else None,
+                }
+                for persona, rounds, runs, evaluated, avg_score in cells.all()
+            ],
+        }
+
+
+# --- BACKGROUND EXECUTION (API) ---
+
+_active_batches = {}  # batch_id -> asyncio.Task
+
+def start_batch(batch_id: int) -> bool:
+    """Runs the batch in the background on the current event loop; False if it is already running here."""
+    task = _active_batches.get(batch_id)
+    if task is not None and not task.done():
+        return False
+
+    def finished(task):
+        _active_batches.pop(batch_id, None)
+        if not task.cancelled() and task.exception():
+            print(f"Simulation batch {batch_id} stopped with an error: {task.exception()}")
+
+    task = asyncio.create_task(run_batch(batch_id))
+    task.add_done_callback(finished)
+    _active_batches[batch_id] = task
+    return True
+
+
+# --- CLI ---
+
+def _print_status(status: dict):
+    print(f"Batch {status['id']} {status['status']}: {status['counts']}  "
+          f"throughput={status['simulations_per_minute'] or 0:.1f} simulations/min")
+    for cell in status["results"]:
+        avg_score = "-" if cell["avg_score"] is None else f"{cell['avg_score']:.2f}"
+        print(f"  {cell['persona']:<15} rounds={cell['rounds']:<3} evaluated={cell['evaluated']}/{cell['runs']}  avg_score={avg_score}")
+
+
+async def _main(args):
+    from core.caching import connect_redis
+    from core.database import create_db_and_tables
+    create_db_and_tables()
+    await connect_redis()
+    batch_id = args.resume
+    if batch_id is None:
+        batch_id = await create_batch(
+            resolve_personas(args.personas), args.rounds, args.repeats, args.concurrency, args.name
+        )
+    _print_status(await run_batch(batch_id, args.concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a batch of simulated interviews and evaluate them.")
+    parser.add_argument("--personas", nargs="+", default=["intermediate"], help=f"Any of: {', '.join(CANDIDATE_PERSONAS)}")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[8], help="Round counts (messages per simulation).")
+    parser.add_argument("--repeats", type=int, default=1, help="Simulations per persona and round count.")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--name", default=None)
+    parser.add_argument("--resume", type=int, default=None, help="Resume an existing batch by id.")
+    asyncio.run(_main(parser.parse_args()))
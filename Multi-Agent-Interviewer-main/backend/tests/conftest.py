@@ -0,0 +1,32 @@
+# tests/conftest.py
+"""
+Shared test setup. Settings are read when core.config is first imported, so the environment is
+prepared here, before any backend module is loaded:
+- a temporary SQLite database (tables are created once per session) and feedback index directory;
+- placeholder API keys; Redis is never connected, so every cache runs on its in-process tier.
+Run from the backend directory:
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_tmp_dir = tempfile.mkdtemp(prefix="backend_tests_")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ["FEEDBACK_INDEX_DIR"] = os.path.join(_tmp_dir, "feedback_index")
+for key in ("GROQ_API_KEY_INTERVIEWER", "GROQ_API_KEY_EVALUATOR", "GROQ_API_KEY_SIMULATOR"):
+    os.environ.setdefault(key, "test-key")
+os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+os.environ.setdefault("REDIS_PORT", "6379")
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from core.database import create_db_and_tables
+    create_db_and_tables()
@@ -0,0 +1,102 @@
+# tests/test_conditional_gets.py
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.endpoints import router
+from core.caching import transcript_cache
+from core.database import SessionLocal
+from models import tables
+
+
+@pytest.fixture(scope="module")
+def client():
+    # The router alone: no lifespan, so no Redis connection or model warm-up.
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def interview():
+    with SessionLocal() as db:
+        interview = tables.Interview(candidate_name="ETag Candidate", status="completed")
+        db.add(interview)
+        db.commit()
+        db.add_all([tables.Message(interview_id=interview.id, sender=sender, text=text)
+                    for sender, text in (("ai", "Welcome!"), ("user", "Hello."), ("ai", "First question?"))])
+        db.commit()
+        return interview.id
+
+
+def _add_message(interview_id: int, text: str):
+    with SessionLocal() as db:
+        db.add(tables.Message(interview_id=interview_id, sender="user", text=text))
+        db.commit()
+    asyncio.run(transcript_cache.invalidate(interview_id))
+
+
+def test_transcript_carries_an_etag(client, interview):
+    response = client.get(f"/interview/{interview}/transcript")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert "last-modified" not in response.headers
+
+
+@pytest.mark.parametrize("header", ["{etag}", "W/{etag}", '"other", {etag}', "*"])
+def test_matching_if_none_match_gets_a_304(client, interview, header):
+    etag = client.get(f"/interview/{interview}/transcript").headers["etag"]
+    response = client.get(f"/interview/{interview}/transcript", headers={"If-None-Match": header.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_304_without_a_cached_entry_comes_from_the_aggregate_query(client, interview):
+    etag = client.get(f"/interview/{interview}/transcript").headers["etag"]
+    asyncio.run(transcript_cache.invalidate(interview))
+    response = client.get(f"/interview/{interview}/transcript", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_new_message_changes_the_etag(client, interview):
+    etag = client.get(f"/interview/{interview}/transcript").headers["etag"]
+    _add_message(interview, "Second answer.")
+    response = client.get(f"/interview/{interview}/transcript", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()[-1]["text"] == "Second answer."
+
+
+def test_if_modified_since_is_ignored(client, interview):
+    response = client.get(f"/interview/{interview}/transcript",
+                          headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
+
+
+def test_after_id_returns_only_newer_messages(client, interview):
+    messages = client.get(f"/interview/{interview}/transcript").json()
+    delta = client.get(f"/interview/{interview}/transcript", params={"after_id": messages[1]["id"]})
+    assert [message["text"] for message in delta.json()] == ["First question?"]
+    assert client.get(f"/interview/{interview}/transcript", params={"after_id": messages[-1]["id"]}).json() == []
+
+
+def test_unknown_interview_is_a_404_even_with_if_none_match(client):
+    response = client.get("/interview/999999/transcript", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+def test_report_etag_and_304(client, interview):
+    with SessionLocal() as db:
+        report = tables.Report(interview_id=interview, score=7, summary="Solid.")
+        db.add(report)
+        db.commit()
+        report_id = report.id
+    response = client.get(f"/report/{interview}")
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"report-{report_id}"'
+    assert client.get(f"/report/{interview}", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
@@ -0,0 +1,57 @@
+# tests/test_context_compaction.py
+import asyncio
+import redis
+import pytest
+from agents import context_compaction
+from agents.context_compaction import ContextCompactor
+from core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def small_budget(monkeypatch):
+    monkeypatch.setattr(settings, "CONTEXT_TOKEN_BUDGET", 50)
+    monkeypatch.setattr(settings, "CONTEXT_KEEP_MESSAGES", 2)
+    monkeypatch.setattr(settings, "CONTEXT_SUMMARY_BATCH", 2)
+
+
+def _history(n: int) -> list:
+    return [{"role": "user" if i % 2 else "assistant", "content": f"message {i} " * 10} for i in range(n)]
+
+
+def test_long_history_is_summarised():
+    async def summarize(previous, messages):
+        return f"{len(messages)} earlier messages"
+
+    messages, stats = asyncio.run(ContextCompactor(summarize).compact(1, _history(6)))
+    assert messages[0] == {"role": "system", "content": "Summary of the earlier part of this interview:\n4 earlier messages"}
+    assert messages[1:] == _history(6)[-2:]
+    assert stats["prompt_tokens_saved"] > 0
+
+
+def test_summarizer_failure_sends_the_history_uncompacted():
+    async def summarize(previous, messages):
+        raise RuntimeError("evaluator unavailable")
+
+    history = _history(6)
+    messages, stats = asyncio.run(ContextCompactor(summarize).compact(1, history))
+    assert messages == history
+    assert stats["prompt_tokens_saved"] == 0
+
+
+def test_redis_errors_do_not_fail_compaction(monkeypatch):
+    class BrokenRedis:
+        def __bool__(self):
+            return True
+
+        async def get(self, *args, **kwargs):
+            raise redis.exceptions.ConnectionError("Redis went away")
+
+        set = get
+
+    monkeypatch.setattr(context_compaction, "async_redis_client", BrokenRedis())
+
+    async def summarize(previous, messages):
+        return "summary"
+
+    messages, _ = asyncio.run(ContextCompactor(summarize).compact(1, _history(6)))
+    assert messages[0]["role"] == "system"
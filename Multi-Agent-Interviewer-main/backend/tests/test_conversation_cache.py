@@ -0,0 +1,63 @@
+# tests/test_conversation_cache.py
+import asyncio
+import redis
+import pytest
+from core.database import AsyncSessionLocal, SessionLocal
+from models import tables
+from services import conversation_cache as conversation_cache_module
+from services.conversation_cache import ConversationCache
+
+
+class BrokenRedis:
+    """Stands in for a connected Redis client whose every command fails."""
+    def __bool__(self):
+        return True
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.exceptions.ConnectionError("Redis went away")
+        return fail
+
+
+@pytest.fixture
+def interview():
+    with SessionLocal() as db:
+        interview = tables.Interview(candidate_name="Cache Candidate", status="in_progress")
+        db.add(interview)
+        db.commit()
+        db.add_all([tables.Message(interview_id=interview.id, sender=sender, text=text)
+                    for sender, text in (("ai", "Welcome!"), ("user", "Hello."))])
+        db.commit()
+        return interview.id
+
+
+def _add_message(interview_id: int, text: str):
+    with SessionLocal() as db:
+        db.add(tables.Message(interview_id=interview_id, sender="ai", text=text))
+        db.commit()
+
+
+def _get(cache: ConversationCache, interview_id: int) -> list:
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            return await cache.get(db, interview_id)
+    return asyncio.run(scenario())
+
+
+def test_redis_errors_fall_back_to_the_database(monkeypatch, interview):
+    monkeypatch.setattr(conversation_cache_module, "async_redis_client", BrokenRedis())
+    cache = ConversationCache(max_interviews=10, ttl_seconds=60, local_ttl_seconds=60)
+    assert [m["content"] for m in _get(cache, interview)] == ["Welcome!", "Hello."]
+    # A failed write is skipped, and a failed catch-up read reloads from the database.
+    asyncio.run(cache.append(interview, {"role": "assistant", "content": "First question?"}))
+    _add_message(interview, "First question?")
+    assert [m["content"] for m in _get(cache, interview)] == ["Welcome!", "Hello.", "First question?"]
+    assert cache.stats()["db_loads"] == 2
+
+
+def test_local_copy_expires(interview):
+    cache = ConversationCache(max_interviews=10, ttl_seconds=60, local_ttl_seconds=0)
+    assert len(_get(cache, interview)) == 2
+    # Without Redis, a turn saved by another worker shows up once the local copy expires.
+    _add_message(interview, "Asked elsewhere")
+    assert _get(cache, interview)[-1]["content"] == "Asked elsewhere"
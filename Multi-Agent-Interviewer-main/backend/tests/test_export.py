@@ -0,0 +1,112 @@
+# tests/test_export.py
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from core.database import SessionLocal
+from models import tables
+from services.export import TableExport
+
+
+def _max_message_id() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.max(tables.Message.id))) or 0
+
+
+def _add_messages(*texts) -> list:
+    with SessionLocal() as db:
+        interview = tables.Interview(candidate_name="Export Candidate")
+        db.add(interview)
+        db.commit()
+        messages = [tables.Message(interview_id=interview.id, sender="user", text=text) for text in texts]
+        db.add_all(messages)
+        db.commit()
+        return [message.id for message in messages]
+
+
+async def _collect(export: TableExport) -> list:
+    data = b"".join([chunk async for chunk in export.chunks()])
+    if export.compression == "gzip":
+        data = gzip.decompress(data)
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+def test_export_covers_rows_after_the_watermark_up_to_the_max_id():
+    start = _max_message_id()
+    ids = _add_messages("one", "two", "three")
+
+    async def scenario():
+        export = TableExport("messages", after_id=start)
+        await export.prepare()
+        assert export.watermark == ids[-1]
+        rows = await _collect(export)
+        return export, rows
+
+    export, rows = asyncio.run(scenario())
+    assert [row["id"] for row in rows] == ids
+    assert [row["text"] for row in rows] == ["one", "two", "three"]
+    assert export.rows == 3
+    assert export.filename == f"messages-{start}-{ids[-1]}.ndjson.gz"
+
+
+def test_rows_added_after_prepare_are_left_for_the_next_export():
+    start = _max_message_id()
+    first_ids = _add_messages("before")
+
+    async def scenario():
+        export = TableExport("messages", after_id=start, compression="none")
+        await export.prepare()
+        late_ids = _add_messages("during")
+        rows = await _collect(export)
+
+        following = TableExport("messages", after_id=export.watermark, compression="none")
+        await following.prepare()
+        return rows, await _collect(following), late_ids
+
+    rows, next_rows, late_ids = asyncio.run(scenario())
+    assert [row["id"] for row in rows] == first_ids
+    assert [row["id"] for row in next_rows] == late_ids
+
+
+def test_nothing_new_keeps_the_watermark():
+    async def scenario():
+        export = TableExport("messages", after_id=_max_message_id())
+        await export.prepare()
+        return export, await _collect(export)
+
+    export, rows = asyncio.run(scenario())
+    assert export.watermark == export.after_id
+    assert rows == []
+
+
+def test_since_filters_on_created_at():
+    with SessionLocal() as db:
+        interview = tables.Interview(candidate_name="Export Candidate")
+        db.add(interview)
+        db.commit()
+        old = tables.AgentFeedback(interview_id=interview.id, feedback_text="old",
+                                   created_at=datetime.utcnow() - timedelta(days=2))
+        new = tables.AgentFeedback(interview_id=interview.id, feedback_text="new")
+        db.add_all([old, new])
+        db.commit()
+        start = min(old.id, new.id) - 1
+
+    async def scenario():
+        export = TableExport("feedback", after_id=start, since=datetime.utcnow() - timedelta(days=1))
+        await export.prepare()
+        return await _collect(export)
+
+    assert [row["feedback_text"] for row in asyncio.run(scenario())] == ["new"]
+
+
+@pytest.mark.parametrize("options, error", [
+    ({"table": "users"}, "Unknown table"),
+    ({"table": "messages", "format": "csv"}, "Unknown format"),
+    ({"table": "messages", "compression": "zstd"}, "Unknown compression"),
+    ({"table": "messages", "since": datetime(2024, 1, 1)}, "no created_at column"),
+])
+def test_invalid_options_are_rejected(options, error):
+    with pytest.raises(ValueError, match=error):
+        asyncio.run(TableExport(**options).prepare())
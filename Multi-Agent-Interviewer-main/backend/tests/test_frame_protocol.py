@@ -0,0 +1,82 @@
+# tests/test_frame_protocol.py
+import pytest
+from agents import frame_protocol
+from agents.frame_protocol import Frame, FrameProtocolError, FRAME_HEADER, MESSAGE_HEADER, encode_message, parse_message
+from core.config import settings
+
+
+def _luma(seq=1, width=4, height=2, data=None):
+    return Frame(seq, 1000 + seq, "luma", width, height, bytes(width * height) if data is None else data)
+
+
+def _jpeg(seq=1, data=b"\xff\xd8jpeg\xff\xd9"):
+    return Frame(seq, 1000 + seq, "gray_jpeg", 320, 240, data)
+
+
+def test_round_trip_keeps_every_frame():
+    frames = [_jpeg(seq=7), _luma(seq=8)]
+    assert parse_message(encode_message(frames)) == frames
+
+
+def test_empty_message_has_no_frames():
+    assert parse_message(encode_message([])) == []
+
+
+@pytest.mark.parametrize("payload, error", [
+    (b"PF", "shorter than its header"),
+    (MESSAGE_HEADER.pack(b"XX", frame_protocol.VERSION, 0), "bad magic"),
+    (MESSAGE_HEADER.pack(frame_protocol.MAGIC, frame_protocol.VERSION + 1, 0), "bad magic or version"),
+])
+def test_rejects_bad_message_headers(payload, error):
+    with pytest.raises(FrameProtocolError, match=error):
+        parse_message(payload)
+
+
+def test_rejects_more_frames_than_allowed():
+    frames = [_jpeg(seq=i) for i in range(settings.PROCTORING_MAX_FRAMES_PER_MESSAGE + 1)]
+    with pytest.raises(FrameProtocolError, match="Too many frames"):
+        parse_message(encode_message(frames))
+
+
+def test_accepts_the_maximum_frame_count():
+    frames = [_jpeg(seq=i) for i in range(settings.PROCTORING_MAX_FRAMES_PER_MESSAGE)]
+    assert len(parse_message(encode_message(frames))) == settings.PROCTORING_MAX_FRAMES_PER_MESSAGE
+
+
+def test_rejects_truncated_frame_header():
+    payload = encode_message([_jpeg()])
+    with pytest.raises(FrameProtocolError, match="Truncated frame header"):
+        parse_message(payload[:MESSAGE_HEADER.size + FRAME_HEADER.size - 1])
+
+
+def test_rejects_truncated_payload():
+    with pytest.raises(FrameProtocolError, match="Truncated frame payload"):
+        parse_message(encode_message([_jpeg()])[:-1])
+
+
+def test_rejects_trailing_bytes():
+    with pytest.raises(FrameProtocolError, match="Trailing bytes"):
+        parse_message(encode_message([_jpeg()]) + b"\x00")
+
+
+def test_rejects_unknown_encoding():
+    payload = MESSAGE_HEADER.pack(frame_protocol.MAGIC, frame_protocol.VERSION, 1) + FRAME_HEADER.pack(1, 0, 9, 0, 0, 0)
+    with pytest.raises(FrameProtocolError, match="Unknown frame encoding 9"):
+        parse_message(payload)
+
+
+def test_rejects_luma_plane_that_does_not_match_its_dimensions():
+    with pytest.raises(FrameProtocolError, match="does not match its dimensions"):
+        parse_message(encode_message([_luma(width=4, height=2, data=bytes(7))]))
+
+
+def test_rejects_luma_plane_larger_than_the_pixel_limit(monkeypatch):
+    monkeypatch.setattr(settings, "PROCTORING_MAX_FRAME_PIXELS", 4 * 2 - 1)
+    with pytest.raises(FrameProtocolError, match="does not match its dimensions"):
+        parse_message(encode_message([_luma(width=4, height=2)]))
+
+
+def test_negotiate_falls_back_to_legacy_for_unknown_formats():
+    assert frame_protocol.negotiate({"type": "hello", "format": "gray_jpeg"})["format"] == "gray_jpeg"
+    assert frame_protocol.negotiate({"type": "hello", "format": "h264"})["format"] == "legacy"
+    assert frame_protocol.negotiate({"type": "hello"})["format"] == "legacy"
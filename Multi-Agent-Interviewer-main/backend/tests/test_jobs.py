@@ -0,0 +1,160 @@
+# tests/test_jobs.py
+import asyncio
+import pytest
+from sqlalchemy import select
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models import tables
+from services import interview_service
+from services.jobs import JobQueue, _generate_report
+
+
+@pytest.fixture(autouse=True)
+def fast_jobs(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(settings, "JOB_POLL_INTERVAL", 0.01)
+
+
+def _queue(kind: str, handler) -> JobQueue:
+    # Each test uses its own job kind, so the shared database never mixes their rows.
+    queue = JobQueue()
+    queue.register(kind, handler)
+    return queue
+
+
+def test_concurrent_triggers_share_one_run():
+    calls = []
+
+    async def handler(target_id):
+        calls.append(target_id)
+        await asyncio.sleep(0.05)
+
+    async def scenario():
+        queue = _queue("dedupe", handler)
+        first, second = await asyncio.gather(queue.enqueue("dedupe", 1), queue.enqueue("dedupe", 1))
+        assert first.id == second.id
+        assert await asyncio.gather(queue.wait(first, 1), queue.wait(second, 1)) == ["succeeded", "succeeded"]
+        # A finished job is not run again by a later trigger.
+        again = await queue.enqueue("dedupe", 1)
+        assert (again.id, again.status) == (first.id, "succeeded")
+        await queue.shutdown()
+
+    asyncio.run(scenario())
+    assert calls == [1]
+
+
+def test_wait_returns_none_while_the_job_is_pending():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def handler(target_id):
+            await release.wait()
+
+        queue = _queue("pending", handler)
+        job = await queue.enqueue("pending", 1)
+        assert await queue.wait(job, 0.05) is None
+        release.set()
+        assert await queue.wait(job, 1) == "succeeded"
+        await queue.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_wait_polls_jobs_run_by_another_process():
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            job = tables.Job(kind="elsewhere", dedupe_key="elsewhere:1", status="running", attempts=1)
+            db.add(job)
+            await db.commit()
+        queue = JobQueue()
+        # Not owned by this queue: the status it reports comes from the row, not job.status.
+        assert await queue.wait(job, 0.05) is None
+
+        async def finish_elsewhere():
+            await asyncio.sleep(0.05)
+            async with AsyncSessionLocal() as db:
+                (await db.get(tables.Job, job.id)).status = "succeeded"
+                await db.commit()
+
+        status, _ = await asyncio.gather(queue.wait(job, 1), finish_elsewhere())
+        assert status == "succeeded"
+
+    asyncio.run(scenario())
+
+
+def test_failing_job_is_retried_then_marked_failed(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    calls = []
+
+    async def handler(target_id):
+        calls.append(target_id)
+        raise RuntimeError("LLM unavailable")
+
+    async def scenario():
+        queue = _queue("failing", handler)
+        job = await queue.enqueue("failing", 1)
+        assert await queue.wait(job, 1) == "failed"
+        stored = await queue.get(job.id)
+        assert (stored.attempts, stored.last_error) == (2, "LLM unavailable")
+        # A new trigger gives a failed job a fresh set of attempts.
+        assert await queue.wait(await queue.enqueue("failing", 1), 1) == "failed"
+        await queue.shutdown()
+
+    asyncio.run(scenario())
+    assert calls == [1, 1, 1, 1]
+
+
+def test_job_interrupted_by_shutdown_resumes_at_next_start():
+    runs = []
+
+    async def scenario():
+        async def stuck(target_id):
+            runs.append("stuck")
+            await asyncio.Event().wait()
+
+        queue = _queue("resume", stuck)
+        job = await queue.enqueue("resume", 1)
+        await asyncio.sleep(0.05)
+        await queue.shutdown(timeout=0.05)
+        assert (await queue.get(job.id)).status == "interrupted"
+
+        async def works(target_id):
+            runs.append("resumed")
+
+        next_queue = _queue("resume", works)
+        next_queue.start()
+        for _ in range(100):
+            if (await next_queue.get(job.id)).status == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        await next_queue.shutdown()
+
+    asyncio.run(scenario())
+    assert runs == ["stuck", "resumed"]
+
+
+def test_invalid_report_is_retried_and_not_saved(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 2)
+    calls = []
+
+    class MalformedEvaluator:
+        async def a_generate_report(self, transcript):
+            calls.append(transcript)
+            return interview_service.FALLBACK_REPORT_JSON
+
+    monkeypatch.setattr(interview_service, "get_orchestrator", MalformedEvaluator)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            interview = tables.Interview(candidate_name="Report Candidate", status="completed")
+            db.add(interview)
+            await db.commit()
+        queue = _queue("report", _generate_report)
+        job = await queue.enqueue("report", interview.id)
+        assert await queue.wait(job, 1) == "failed"
+        await queue.shutdown()
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(tables.Report).filter(tables.Report.interview_id == interview.id))).first()
+
+    assert asyncio.run(scenario()) is None
+    assert len(calls) == 2
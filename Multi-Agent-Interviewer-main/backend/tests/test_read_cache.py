@@ -0,0 +1,111 @@
+# tests/test_read_cache.py
+import asyncio
+from core.caching import ReadCache
+
+
+class CountingLoader:
+    """Async loader returning "<key>-v<n>" for its n-th call, after an optional delay."""
+    def __init__(self, key="k", delay=0.0):
+        self.key = key
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        version = self.calls
+        await asyncio.sleep(self.delay)
+        return f"{self.key}-v{version}"
+
+
+def _cache(namespace: str, clearable: bool = False) -> ReadCache:
+    return ReadCache(f"test:{namespace}", max_entries=16, ttl_seconds=60, clearable=clearable)
+
+
+def test_concurrent_misses_share_one_load():
+    cache, loader = _cache("single-flight"), CountingLoader(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == ["k-v1"] * 10
+    assert loader.calls == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_loaded_value_is_served_from_memory():
+    cache, loader = _cache("hit"), CountingLoader()
+
+    async def scenario():
+        return [await cache.get_or_load("k", loader) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == ["k-v1"] * 3
+    assert loader.calls == 1
+    assert cache.peek("k") == "k-v1"
+
+
+def test_none_is_returned_but_not_cached():
+    cache, calls = _cache("none"), []
+
+    async def missing():
+        calls.append(1)
+        return None
+
+    async def scenario():
+        return [await cache.get_or_load("k", missing) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [None, None]
+    assert len(calls) == 2
+
+
+def test_invalidate_forces_a_reload():
+    cache, loader = _cache("invalidate"), CountingLoader()
+
+    async def scenario():
+        first = await cache.get_or_load("k", loader)
+        await cache.invalidate("k")
+        assert cache.peek("k") is None
+        return first, await cache.get_or_load("k", loader)
+
+    assert asyncio.run(scenario()) == ("k-v1", "k-v2")
+
+
+def test_load_straddling_an_invalidation_is_not_stored():
+    cache, loader = _cache("straddle"), CountingLoader(delay=0.05)
+
+    async def scenario():
+        stale = asyncio.ensure_future(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        await cache.invalidate("k")
+        # A read after the invalidation starts its own load instead of joining the stale one.
+        fresh = await cache.get_or_load("k", loader)
+        return await stale, fresh, cache.peek("k")
+
+    assert asyncio.run(scenario()) == ("k-v1", "k-v2", "k-v2")
+
+
+def test_clear_drops_every_key():
+    cache = _cache("clear", clearable=True)
+    loaders = {key: CountingLoader(key) for key in ("a", "b")}
+
+    async def scenario():
+        for key, loader in loaders.items():
+            await cache.get_or_load(key, loader)
+        await cache.clear()
+        assert cache.peek("a") is None and cache.peek("b") is None
+        return [await cache.get_or_load(key, loader) for key, loader in loaders.items()]
+
+    assert asyncio.run(scenario()) == ["a-v2", "b-v2"]
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_load():
+    cache, loader = _cache("cancel"), CountingLoader(delay=0.05)
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_load("k", loader))
+        second = asyncio.ensure_future(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "k-v1"
+    assert loader.calls == 1
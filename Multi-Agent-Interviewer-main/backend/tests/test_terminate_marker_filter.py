@@ -0,0 +1,46 @@
+# tests/test_terminate_marker_filter.py
+import pytest
+from services.interview_service import TerminateMarkerFilter
+
+
+def _stream(chunks):
+    marker_filter = TerminateMarkerFilter()
+    forwarded = "".join(marker_filter.feed(chunk) for chunk in chunks) + marker_filter.flush()
+    return forwarded, marker_filter.found
+
+
+def test_text_without_the_marker_passes_through():
+    assert _stream(["Tell me about ", "PivotTables."]) == ("Tell me about PivotTables.", False)
+
+
+@pytest.mark.parametrize("chunks", [
+    ["Thank you for your time. TERMINATE"],
+    ["Thank you for your time. TERM", "INATE"],
+    ["Thank you for your time. T", "ERMINAT", "E"],
+    ["Thank you for your time. terminate"],
+])
+def test_marker_is_stripped_even_when_split_across_chunks(chunks):
+    assert _stream(chunks) == ("Thank you for your time. ", True)
+
+
+def test_marker_split_one_character_per_chunk():
+    text = "Goodbye! TERMINATE"
+    assert _stream(list(text)) == ("Goodbye! ", True)
+
+
+def test_nothing_after_the_marker_is_forwarded():
+    assert _stream(["Bye. TERMINATE", " and some trailing text"]) == ("Bye. ", True)
+
+
+def test_possible_marker_prefix_is_held_back_until_resolved():
+    marker_filter = TerminateMarkerFilter()
+    assert marker_filter.feed("That was ter") == "That was "
+    assert marker_filter.feed("rific work.") == "terrific work."
+    assert not marker_filter.found
+
+
+def test_flush_returns_an_unfinished_prefix_at_the_end_of_the_stream():
+    marker_filter = TerminateMarkerFilter()
+    assert marker_filter.feed("Next question on TERM") == "Next question on "
+    assert marker_filter.flush() == "TERM"
+    assert not marker_filter.found
@@ -0,0 +1,47 @@
+# tests/test_turn_feedback.py
+import asyncio
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models import tables
+from services import interview_service
+
+HISTORY = [{"role": "assistant", "content": "Welcome!"}, {"role": "user", "content": "I use INDEX/MATCH."}]
+
+
+def _turn_feedback(monkeypatch, stored):
+    queries = []
+
+    async def relevant_feedback(query, db=None):
+        queries.append(query)
+        return [f"retrieved for {query!r}"]
+
+    monkeypatch.setattr(interview_service, "_a_relevant_feedback", relevant_feedback)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            interview = tables.Interview(candidate_name="Feedback Candidate", past_feedback=stored)
+            db.add(interview)
+            await db.commit()
+            turns = [await interview_service._a_turn_feedback(db, interview.id, HISTORY) for _ in range(2)]
+        return turns
+
+    return asyncio.run(scenario()), queries
+
+
+def test_turns_reuse_the_feedback_stored_at_start(monkeypatch):
+    turns, queries = _turn_feedback(monkeypatch, "Ask about XLOOKUP")
+    assert turns == ["Ask about XLOOKUP"] * 2
+    assert queries == []
+
+
+def test_interview_without_stored_feedback_retrieves_it_once(monkeypatch):
+    turns, queries = _turn_feedback(monkeypatch, None)
+    assert turns == ["retrieved for ''"] * 2
+    assert queries == [""]
+
+
+def test_per_turn_retrieval_queries_the_latest_answers(monkeypatch):
+    monkeypatch.setattr(settings, "FEEDBACK_PER_TURN_RETRIEVAL", True)
+    turns, queries = _turn_feedback(monkeypatch, "Ask about XLOOKUP")
+    assert turns == ["retrieved for 'I use INDEX/MATCH.'"] * 2
+    assert queries == ["I use INDEX/MATCH."] * 2
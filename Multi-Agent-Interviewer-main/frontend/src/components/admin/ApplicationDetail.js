@@ -12,6 +12,8 @@ const ApplicationDetail = ({ candidate, onBack }) => {
   const [modalContent, setModalContent] = useState([]);
   // State to manage loading indicators on buttons while fetching data
   const [isLoading, setIsLoading] = useState(false);
+  // True while waiting for a report that is still being generated in the background
+  const [isGenerating, setIsGenerating] = useState(false);
   // State for the feedback textarea
   const [feedbackText, setFeedbackText] = useState("");
 
@@ -52,7 +54,7 @@ const ApplicationDetail = ({ candidate, onBack }) => {
             text: msg.text 
           }));
         } else {
-          const reportData = await getReport(candidate.id);
+          const reportData = await getReport(candidate.id, () => setIsGenerating(true));
           // Format the API response for the modal component
           content = [
             { type: 'report', speaker: 'Overall Recommendation', text: reportData.summary, highlight: true },
@@ -68,6 +70,7 @@ const ApplicationDetail = ({ candidate, onBack }) => {
       setModalType(null); // Close the modal if there's an error
     } finally {
       setIsLoading(false); // Stop the loading indicator
+      setIsGenerating(false);
     }
   };
 
@@ -100,7 +103,7 @@ const ApplicationDetail = ({ candidate, onBack }) => {
     
     return ReactDOM.createPortal(
       <TranscriptModal
-        title={isLoading ? "Loading..." : (modalType === 'transcript' ? 'Interview Transcript' : 'AI Generated Report')}
+        title={isGenerating ? "The report is being generated. This can take a minute..." : isLoading ? "Loading..." : (modalType === 'transcript' ? 'Interview Transcript' : 'AI Generated Report')}
         content={isLoading ? [] : modalContent}
         showDownload={modalType === 'report'}
         onClose={() => setModalType(null)}
@@ -1,7 +1,9 @@
 import React, { useState, useEffect } from 'react';
-import { getInterviews } from '../../services/api';
+import { getInterviewSummaries } from '../../services/api';
 import './CandidateApplications.css';
 
+const PAGE_SIZE = 200;
+
 const dummyInterviews = [
   { id: 101, candidate_name: "Priya Sharma", status: "selected", isDummy: true },
   { id: 102, candidate_name: "Rahul Kumar", status: "rejected", isDummy: true },
@@ -26,26 +28,37 @@ const getUniqueLatestInterviews = (interviews) => {
   return Array.from(latestInterviews.values());
 };
 
+/**
+ * Builds the displayed list: the latest interview per real candidate, then the dummies whose names are not taken.
+ * @param {Array<object>} realInterviews - Every summary loaded so far, newest first.
+ * @returns {Array<object>}
+ */
+const combineWithDummies = (realInterviews) => {
+  const combined = getUniqueLatestInterviews(realInterviews);
+  dummyInterviews.forEach(dummy => {
+      if (!combined.some(real => real.candidate_name === dummy.candidate_name)) {
+          combined.push(dummy);
+      }
+  });
+  return combined;
+};
+
 const CandidateApplications = ({ onSelectCandidate }) => {
   const [interviews, setInterviews] = useState([]);
+  // Every real summary loaded so far (newest first) and the cursor for the next, older page
+  const [realInterviews, setRealInterviews] = useState([]);
+  const [nextBeforeId, setNextBeforeId] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
 
   useEffect(() => {
     const fetchInterviews = async () => {
       try {
-        const realInterviews = await getInterviews();
-        const uniqueRealInterviews = getUniqueLatestInterviews(realInterviews);
-
-        // Combine with dummies, ensuring no name conflicts.
-        const combined = [...uniqueRealInterviews];
-        dummyInterviews.forEach(dummy => {
-            if (!combined.some(real => real.candidate_name === dummy.candidate_name)) {
-                combined.push(dummy);
-            }
-        });
-        
-        setInterviews(combined);
+        const { items, next_before_id } = await getInterviewSummaries({ limit: PAGE_SIZE });
+        setRealInterviews(items);
+        setNextBeforeId(next_before_id);
+        setInterviews(combineWithDummies(items));
 
       } catch (err) {
         setError('Failed to fetch applications. Displaying sample data.');
@@ -57,6 +70,25 @@ const CandidateApplications = ({ onSelectCandidate }) => {
     fetchInterviews();
   }, []);
 
+  /**
+   * Fetches the next, older page of summaries and merges it into the list.
+   */
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const { items, next_before_id } = await getInterviewSummaries({ limit: PAGE_SIZE, before_id: nextBeforeId });
+      const loaded = [...realInterviews, ...items];
+      setRealInterviews(loaded);
+      setNextBeforeId(next_before_id);
+      setInterviews(combineWithDummies(loaded));
+      setError('');
+    } catch (err) {
+      setError('Failed to load more applications.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) return <p>Loading applications...</p>;
 
   return (
@@ -83,6 +115,11 @@ const CandidateApplications = ({ onSelectCandidate }) => {
           ))}
         </ul>
       )}
+      {nextBeforeId !== null && nextBeforeId !== undefined && (
+        <button className="action-btn load-more-btn" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load older applications'}
+        </button>
+      )}
     </div>
   );
 };
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import { FaPaperPlane, FaFileAlt } from 'react-icons/fa';
 import { sendMessage } from '../../services/api';
+import { helloMessage, captureGrayFrame, encodeFrames, FRAME_FORMAT } from '../../services/frameProtocol';
 import WorksheetModal from './WorksheetModal';
 import './InterviewUI.css';
 
@@ -20,6 +21,8 @@ const InterviewUI = () => {
   const [proctoring, setProctoring] = useState({ warnings: 0, message: '', terminated: false });
   const videoRef = useRef(null);
   const wsRef = useRef(null);
+  // Set once the server accepts the compact frame format; until then frames are sent as color JPEGs.
+  const frameFormatRef = useRef({ compact: false, seq: 0 });
   const chatWindowRef = useRef(null);
 
   // This is the useEffect that was causing the warning.
@@ -44,12 +47,15 @@ const InterviewUI = () => {
 
     ws.onopen = () => {
       console.log('Proctoring WebSocket connected.');
+      ws.send(helloMessage());
       startVideoStream();
     };
 
     ws.onmessage = (event) => {
       const data = JSON.parse(event.data);
-      if (data.type === 'warning') {
+      if (data.type === 'format') {
+        frameFormatRef.current = { ...frameFormatRef.current, compact: data.format === FRAME_FORMAT };
+      } else if (data.type === 'warning') {
         setProctoring(prev => ({ ...prev, warnings: data.count, message: data.message }));
       } else if (data.type === 'terminate') {
         setProctoring({ warnings: 3, message: data.message, terminated: true });
@@ -81,8 +87,18 @@ const InterviewUI = () => {
         videoRef.current.srcObject = stream;
       }
       
-      const sendFrame = () => {
+      const sendFrame = async () => {
         if (wsRef.current?.readyState === WebSocket.OPEN && videoRef.current?.readyState === 4) {
+          const format = frameFormatRef.current;
+          if (format.compact) {
+            // Full resolution, like the legacy frames, so eye detection (and warnings) are unchanged.
+            const frame = await captureGrayFrame(videoRef.current);
+            if (frame && wsRef.current?.readyState === WebSocket.OPEN) {
+              format.seq += 1;
+              wsRef.current.send(encodeFrames([{ ...frame, seq: format.seq }]));
+            }
+            return;
+          }
           const canvas = document.createElement('canvas');
           canvas.width = videoRef.current.videoWidth;
           canvas.height = videoRef.current.videoHeight;
@@ -65,21 +65,70 @@ export const getInterviews = () => {
 };
 
 /**
- * Fetches the full transcript for a specific interview.
+ * Fetches one page of lightweight interview summaries (no transcripts), newest first.
+ * @param {object} params - Optional `limit`, `before_id` (cursor from `next_before_id`), `status` and `name` filters.
+ * @returns {Promise<{items: Array<object>, next_before_id: number|null}>}
+ */
+export const getInterviewSummaries = (params = {}) => {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== '')
+  ).toString();
+  return request(`/interviews/summary${query ? `?${query}` : ''}`);
+};
+
+/**
+ * Fetches the transcript for a specific interview. Responses carry an ETag, so the browser
+ * revalidates repeated fetches and an unchanged transcript comes back as a 304.
  * @param {number} interviewId - The ID of the interview.
+ * @param {number} [afterId] - Only fetch messages newer than this message id (delta polling).
  * @returns {Promise<Array<object>>}
  */
-export const getTranscript = (interviewId) => {
-  return request(`/interview/${interviewId}/transcript`);
+export const getTranscript = (interviewId, afterId) => {
+  const query = afterId !== undefined && afterId !== null ? `?after_id=${afterId}` : '';
+  return request(`/interview/${interviewId}/transcript${query}`);
+};
+
+const REPORT_POLL_INTERVAL_MS = 3000;
+const REPORT_MAX_WAIT_MS = 5 * 60 * 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Fetches the status of a background job (e.g. report generation).
+ * @param {number} jobId - The ID returned with a 202 "pending" response.
+ * @returns {Promise<{id: number, kind: string, status: string, attempts: number, last_error: string|null}>}
+ */
+export const getJob = (jobId) => {
+  return request(`/jobs/${jobId}`);
 };
 
 /**
  * Fetches the AI-generated report for a specific interview.
+ * If the report is still being generated the API answers 202 `{status: 'pending', jobId}`; the job
+ * is then polled until it finishes and the report is fetched again.
  * @param {number} interviewId - The ID of the interview.
+ * @param {function} [onPending] - Called once if the report has to be waited for (e.g. to show a "generating" state).
  * @returns {Promise<object>}
  */
-export const getReport = (interviewId) => {
-  return request(`/report/${interviewId}`);
+export const getReport = async (interviewId, onPending) => {
+  const result = await request(`/report/${interviewId}`);
+  if (result.status !== 'pending' || !result.jobId) {
+    return result;
+  }
+  if (onPending) onPending();
+
+  const deadline = Date.now() + REPORT_MAX_WAIT_MS;
+  while (Date.now() < deadline) {
+    await sleep(REPORT_POLL_INTERVAL_MS);
+    const job = await getJob(result.jobId);
+    if (job.status === 'succeeded') {
+      return request(`/report/${interviewId}`);
+    }
+    if (job.status === 'failed') {
+      throw new Error(`Report generation failed: ${job.last_error || 'unknown error'}`);
+    }
+  }
+  throw new Error('The report is still being generated. Please try again in a few minutes.');
 };
 
 /**
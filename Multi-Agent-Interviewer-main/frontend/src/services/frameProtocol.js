@@ -0,0 +1,65 @@
+// src/services/frameProtocol.js
+
+// Compact proctoring frame protocol (mirrors backend/agents/frame_protocol.py).
+// Frames are grayscale JPEGs at the camera's resolution, with a small binary header
+// carrying a sequence number and capture timestamp.
+
+const MESSAGE_HEADER_SIZE = 4; // magic "PF", version u8, frame count u8
+const FRAME_HEADER_SIZE = 22; // seq u32, timestamp u64, encoding u8, reserved u8, width u16, height u16, length u32
+const VERSION = 1;
+const ENCODING_GRAY_JPEG = 0;
+
+export const FRAME_FORMAT = 'gray_jpeg';
+export const helloMessage = () => JSON.stringify({ type: 'hello', format: FRAME_FORMAT });
+
+/**
+ * Draws the video frame in grayscale, downscaled to `targetWidth` if given, and resolves to JPEG bytes.
+ * The interview UI sends full-resolution frames: the server downscales for the face search itself,
+ * but looks for eyes in the full-resolution face region, where they are large enough to detect.
+ * @returns {Promise<{data: Uint8Array, width: number, height: number, timestamp: number} | null>}
+ */
+export const captureGrayFrame = (video, targetWidth = video.videoWidth, quality = 0.6) => {
+  const scale = Math.min(1, targetWidth / video.videoWidth);
+  const canvas = document.createElement('canvas');
+  canvas.width = Math.round(video.videoWidth * scale);
+  canvas.height = Math.round(video.videoHeight * scale);
+  const ctx = canvas.getContext('2d');
+  ctx.filter = 'grayscale(1)';
+  ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+  const timestamp = Date.now();
+  return new Promise((resolve) => {
+    canvas.toBlob(async (blob) => {
+      if (!blob) return resolve(null);
+      const data = new Uint8Array(await blob.arrayBuffer());
+      resolve({ data, width: canvas.width, height: canvas.height, timestamp });
+    }, 'image/jpeg', quality);
+  });
+};
+
+/**
+ * Packs frames ({seq, timestamp, data, width, height}) into one binary message.
+ * @returns {ArrayBuffer}
+ */
+export const encodeFrames = (frames) => {
+  const total = MESSAGE_HEADER_SIZE + frames.reduce((sum, f) => sum + FRAME_HEADER_SIZE + f.data.length, 0);
+  const buffer = new ArrayBuffer(total);
+  const view = new DataView(buffer);
+  const bytes = new Uint8Array(buffer);
+  bytes[0] = 0x50; // 'P'
+  bytes[1] = 0x46; // 'F'
+  view.setUint8(2, VERSION);
+  view.setUint8(3, frames.length);
+
+  let offset = MESSAGE_HEADER_SIZE;
+  frames.forEach((frame) => {
+    view.setUint32(offset, frame.seq, true);
+    view.setBigUint64(offset + 4, BigInt(frame.timestamp), true);
+    view.setUint8(offset + 12, ENCODING_GRAY_JPEG);
+    view.setUint16(offset + 14, frame.width, true);
+    view.setUint16(offset + 16, frame.height, true);
+    view.setUint32(offset + 18, frame.data.length, true);
+    bytes.set(frame.data, offset + FRAME_HEADER_SIZE);
+    offset += FRAME_HEADER_SIZE + frame.data.length;
+  });
+  return buffer;
+};